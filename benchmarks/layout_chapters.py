@@ -0,0 +1,163 @@
+"""
+Benchmark: chapter layout (chapter_layout.layout_chapter) for every chapter of a Bible.
+
+The scripture panel lays a chapter out whenever it's shown at a new width. This script
+lays out every chapter with made-up font metrics, so it runs without a display, and
+prints the time per chapter: once with empty word-width caches (like the first chapters
+shown after starting) and once with them filled.
+
+By default it uses a synthetic Bible with the usual 66 books and 1,189 chapters, with
+footnotes and cross-references on some verses. Pass --bible to use a real Bible JSON or
+compiled .btb file instead.
+
+Usage:
+    python benchmarks/layout_chapters.py [--bible bible_KJV.json] [--width 600] [--seed 1]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bibledb_lib
+import bible_binary
+import chapter_layout
+
+
+# chapters in each book of the Protestant canon, Genesis to Revelation (1,189 in all)
+CHAPTER_COUNTS = [50, 40, 27, 36, 34, 24, 21, 4, 31, 24, 22, 25, 29, 36, 10, 13, 10, 42, 150, 31, 12, 8,
+                  66, 52, 5, 48, 12, 14, 3, 9, 1, 4, 7, 3, 3, 3, 2, 14, 4,
+                  28, 16, 24, 21, 28, 16, 16, 13, 6, 6, 4, 4, 5, 3, 6, 4, 3, 1, 13, 5, 5, 3, 5, 1, 1, 1, 22]
+
+WORDS = ("and the of that he unto in shall for his they be is him not them it with all thou thy was "
+         "which my me said but ye their have will thee from as are when this out were upon man by "
+         "you israel king up there hath then people came had house into on her come one we children "
+         "before your also day land men against shalt if so hand us did god lord jerusalem righteousness "
+         "everlasting tabernacle congregation wilderness commandments").split()
+
+
+class FakeFont:
+    # stands in for tkinter.font.Font: a fixed width per character, a little wider for capitals
+    def __init__(self, char_width, linespace):
+        self.char_width = char_width
+        self.linespace = linespace
+
+    def measure(self, text):
+        return sum(self.char_width + 2 if c.isupper() else self.char_width for c in text)
+
+    def metrics(self, option):
+        return self.linespace
+
+
+def fake_metrics():
+    return chapter_layout.FontMetrics({"text": FakeFont(6, 15), "italic": FakeFont(6, 15),
+                                       "bold": FakeFont(7, 16), "italic_underline": FakeFont(6, 15)})
+
+
+def make_bible(rng):
+    # a Bible JSON dict with the real number of chapters per book and 10-50 verses of random words each
+    books = []
+    for b, chapter_count in enumerate(CHAPTER_COUNTS):
+        name = "Book" + str(b + 1)
+        chapters = []
+        for c in range(1, chapter_count + 1):
+            verses = []
+            for v in range(1, rng.randint(10, 50) + 1):
+                words = [rng.choice(WORDS) for n in range(rng.randint(8, 60))]
+                words[0] = words[0].capitalize()
+                verse = {"verse": v, "text": " ".join(words) + "."}
+                if rng.random() < 0.05:
+                    verse["footnote"] = "Or, " + " ".join(rng.choice(WORDS) for n in range(rng.randint(3, 30)))
+                if rng.random() < 0.2:
+                    refs = []
+                    for n in range(rng.randint(1, 6)):
+                        ref_verse = rng.randint(1, 20)
+                        for k in range(rng.choice([1, 1, 2, 3])):
+                            refs.append({"book": "Book" + str(rng.randint(1, 66)), "chapter": rng.randint(1, 20), "verse": ref_verse + k})
+                    verse["cross_references"] = {"refers_to": refs}
+                verses.append(verse)
+            chapters.append({"chapter": c, "verses": verses})
+        books.append({"book": name, "names": [name], "chapters": chapters})
+    return {"books": books}
+
+
+def load_bible(path):
+    if bible_binary.is_compiled_bible(path):
+        return bible_binary.load_bible(path)
+    with open(path, 'r', encoding='utf-8') as file:
+        return bibledb_lib.getBibleData(file.read())
+
+
+def make_annotations(rng, bible_index, b, c, count):
+    # rows like find_note_tag_verses returns: short ranges in the chapter, some running into the next one
+    rows = []
+    verse_count = bible_index.verse_count(b, c)
+    for n in range(count):
+        start = rng.randint(1, verse_count)
+        end_chapter, end = c, min(verse_count, start + rng.choice([0, 0, 1, 3, 10]))
+        if rng.random() < 0.1 and c < bible_index.chapter_count(b):
+            end_chapter, end = c + 1, 1
+        rows.append({"start_book": b, "start_chapter": c, "start_verse": start,
+                     "end_book": b, "end_chapter": end_chapter, "end_verse": end,
+                     "type": rng.choice(["tag", "note", "both"])})
+    return rows
+
+
+def percentile(sorted_times, p):
+    return sorted_times[min(len(sorted_times) - 1, int(len(sorted_times) * p))]
+
+
+def run(chapters, metrics, width, annotations):
+    # lays out every chapter; returns the seconds each took, and the ops drawn in all
+    times = []
+    op_count = 0
+    for book_name, c, data, notestags in chapters:
+        # like ScripturePanel: the text is laid out without the note/tag bars, which go left of it
+        start = time.perf_counter()
+        layout = chapter_layout.layout_chapter(book_name, c, data, width, 5, metrics)
+        ops = chapter_layout.layout_annotations(layout, notestags, 5 + len(notestags)*2) if annotations else []
+        times.append(time.perf_counter() - start)
+        op_count += len(layout.ops) + len(ops)
+    return times, op_count
+
+
+def report(label, times):
+    times = sorted(times)
+    print(f"  {label}: total {sum(times) * 1000:8.1f} ms   p50 {percentile(times, 0.5) * 1000:.3f} ms   "
+          f"p99 {percentile(times, 0.99) * 1000:.3f} ms   max {times[-1] * 1000:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark laying out every chapter of a Bible, without a display")
+    parser.add_argument("--bible", help="Bible JSON or compiled .btb file (default: a synthetic Bible)")
+    parser.add_argument("--width", type=int, default=600, help="Width of the verse area in pixels")
+    parser.add_argument("--annotations", type=int, default=5, help="Note/tag bars per chapter")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.bible:
+        bible_data = load_bible(args.bible)
+    else:
+        bible_data = bibledb_lib.parseBibleData(make_bible(rng))
+    bible_index = bibledb_lib.active_bible_index
+
+    # decode every chapter up front, so the timings are only the layout
+    chapters = []
+    for b, (book_name, book_chapters) in enumerate(bible_data.items()):
+        for c, data in enumerate(book_chapters, start=1):
+            chapters.append((book_name, c, data, make_annotations(rng, bible_index, b, c, args.annotations)))
+
+    metrics = fake_metrics()
+    cold_times, op_count = run(chapters, metrics, args.width, args.annotations > 0)
+    warm_times, op_count = run(chapters, metrics, args.width, args.annotations > 0)
+
+    print(f"{len(chapters)} chapters, {len(bible_index)} verses, {op_count} draw ops at width {args.width}")
+    report("cold word widths", cold_times)
+    report("warm word widths", warm_times)
+
+
+if __name__ == "__main__":
+    main()
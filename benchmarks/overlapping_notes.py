@@ -0,0 +1,145 @@
+"""
+Benchmark: get_overlapping_notes, one range-overlap query vs. one query per verse.
+
+get_overlapping_notes runs every time a verse range is selected in the TaggerPanel.
+It used to expand the selection into single verses and run a SELECT for each one,
+then another SELECT per matching verse_group to get its bounds. This script builds a
+synthetic Bible and a densely annotated database, runs both versions over the same
+random chapter selections, checks that they agree, and prints the timings.
+
+Usage:
+    python benchmarks/overlapping_notes.py [--notes 20000] [--selections 100] [--seed 1]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bibledb_lib
+
+
+def make_bible(rng, book_count=66):
+    """
+    A Bible JSON dict with book_count books of 1-50 chapters of 10-60 verses.
+    Book names are fixed-width codes (Xaa, Xab, ...) so no name is a substring of another.
+    """
+    books = []
+    for b in range(book_count):
+        name = "X" + chr(ord('a') + b // 26) + chr(ord('a') + b % 26)
+        chapters = []
+        for c in range(1, rng.randint(1, 50) + 1):
+            verses = [{"verse": v, "text": "verse text"} for v in range(1, rng.randint(10, 60) + 1)]
+            chapters.append({"chapter": c, "verses": verses})
+        books.append({"book": name, "names": [name], "chapters": chapters})
+    return {"books": books}
+
+
+def make_ref(start, end):
+    # "Book c:v-c:v" reference for two (book, chapter, verse) tuples in the same book
+    book = bibledb_lib.book_proper_names[start[0]]
+    return f"{book} {start[1]}:{start[2]}-{end[1]}:{end[2]}"
+
+
+def fill_database(db_path, bible_data, rng, note_count):
+    # Mostly short noted ranges, with some whole-chapter and multi-chapter ones mixed in
+    verse_index = bibledb_lib.active_bible_index
+    last = len(verse_index) - 1
+    entries = []
+    for n in range(note_count):
+        start = rng.randint(0, last)
+        length = rng.choice([1, 1, 2, 3, 5, 8, 12, 30, 80])
+        end = start + length - 1
+        # keep each range inside one book, since make_ref only writes one book name
+        start_ref = verse_index.verse(start)
+        end_ref = verse_index.verse(min(end, last))
+        while end_ref[0] != start_ref[0]:
+            end = min(end, last) - 1
+            end_ref = verse_index.verse(end)
+        entries.append((make_ref(start_ref, end_ref), f"note {n}"))
+    bibledb_lib.add_verse_notes_bulk(db_path, entries, bible_data)
+
+
+def per_verse_overlapping_notes(session, verse_ref, bible_data):
+    # The old implementation: one SELECT per verse in the selection, then one per matching group
+    parsed = bibledb_lib.parseVerseReference(verse_ref)
+    verse_range = bibledb_lib.expand_verse_range(parsed["sb"], int(parsed["sc"]), int(parsed["sv"]), parsed["eb"], int(parsed["ec"]), int(parsed["ev"]), bible_data)
+    cursor = session.cursor()
+
+    verse_group_ids = set()
+    for verse in verse_range:
+        ordinal = bibledb_lib.make_verse_ordinal(verse[0], verse[1], verse[2])
+        cursor.execute("""
+            SELECT vg.verse_group_id
+            FROM verse_group vg
+            WHERE vg.note IS NOT NULL
+            AND vg.start_ordinal <= ? AND vg.end_ordinal >= ?
+        """, (ordinal, ordinal))
+        for row in cursor.fetchall():
+            verse_group_ids.add(row[0])
+
+    results = []
+    for vg_id in verse_group_ids:
+        cursor.execute("""
+            SELECT start_ordinal, end_ordinal
+            FROM verse_group
+            WHERE verse_group_id = ?
+        """, (vg_id,))
+        start_ordinal, end_ordinal = cursor.fetchone()
+        results.append(bibledb_lib.normalize_vref(bibledb_lib.verse_group_range(vg_id, start_ordinal, end_ordinal)))
+    return results
+
+
+def time_it(function, selections):
+    start = time.perf_counter()
+    results = [function(ref) for ref in selections]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_overlapping_notes on a synthetic dense database")
+    parser.add_argument("--notes", type=int, default=20000, help="Number of noted verse ranges in the database")
+    parser.add_argument("--selections", type=int, default=100, help="Number of whole-chapter selections to look up")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bible_data = bibledb_lib.parseBibleData(make_bible(rng))
+    verse_index = bibledb_lib.active_bible_index
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, "benchmark.bdb")
+        bibledb_lib.makeDB(db_path)
+        fill_database(db_path, bible_data, rng, args.notes)
+        session = bibledb_lib.get_session(db_path)
+
+        # whole-chapter selections, like shift-clicking the first and last verse of a chapter
+        selections = []
+        for n in range(args.selections):
+            book = rng.randrange(verse_index.book_count())
+            chapter = rng.randint(1, verse_index.chapter_count(book))
+            selections.append(make_ref((book, chapter, 1), (book, chapter, verse_index.verse_count(book, chapter))))
+
+        print(f"{len(verse_index)} verses, {args.notes} noted ranges, {len(selections)} chapter selections")
+
+        old_time, old_results = time_it(lambda ref: per_verse_overlapping_notes(session, ref, bible_data), selections)
+        new_time, new_results = time_it(lambda ref: session.get_overlapping_notes(ref, bible_data), selections)
+
+        for ref, old, new in zip(selections, old_results, new_results):
+            if sorted(old) != sorted(new):
+                print(f"MISMATCH for {ref}: {len(old)} vs {len(new)} notes")
+                break
+
+        print(f"  per-verse queries:   {old_time * 1000:8.1f} ms  ({old_time / len(selections) * 1000:.3f} ms per selection)")
+        print(f"  range-overlap query: {new_time * 1000:8.1f} ms  ({new_time / len(selections) * 1000:.3f} ms per selection)")
+        if new_time > 0:
+            print(f"  speedup: {old_time / new_time:.1f}x")
+
+        bibledb_lib.close_sessions(db_path)
+
+
+if __name__ == "__main__":
+    main()
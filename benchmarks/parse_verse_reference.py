@@ -0,0 +1,193 @@
+"""
+Benchmark: parseVerseReference, regex + alias table + cache vs. the old hand-split parser.
+
+The old parser split the reference by hand and resolved the book with qualifyBook, a
+substring scan over book_proper_names, and then again in getBookIndex with a list .index().
+The exports call it for every reference they touch, usually many times for the same ones.
+This script parses the same mix of references with both, checks they agree on every
+full book name, and prints the timings with the cache cold and warm.
+
+Usage:
+    python benchmarks/parse_verse_reference.py [--references 50000] [--unique 3000] [--seed 1]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bibledb_lib
+
+
+BOOK_NAMES = [
+    ("Genesis", "Gen"), ("Exodus", "Exod"), ("Leviticus", "Lev"), ("Numbers", "Num"), ("Deuteronomy", "Deut"),
+    ("Joshua", "Josh"), ("Judges", "Judg"), ("Ruth", "Ruth"), ("1 Samuel", "1 Sam"), ("2 Samuel", "2 Sam"),
+    ("1 Kings", "1 Kgs"), ("2 Kings", "2 Kgs"), ("1 Chronicles", "1 Chr"), ("2 Chronicles", "2 Chr"), ("Ezra", "Ezra"),
+    ("Nehemiah", "Neh"), ("Esther", "Esth"), ("Job", "Job"), ("Psalms", "Ps"), ("Proverbs", "Prov"),
+    ("Ecclesiastes", "Eccl"), ("Song of Solomon", "Song"), ("Isaiah", "Isa"), ("Jeremiah", "Jer"), ("Lamentations", "Lam"),
+    ("Ezekiel", "Ezek"), ("Daniel", "Dan"), ("Hosea", "Hos"), ("Joel", "Joel"), ("Amos", "Amos"),
+    ("Obadiah", "Obad"), ("Jonah", "Jonah"), ("Micah", "Mic"), ("Nahum", "Nah"), ("Habakkuk", "Hab"),
+    ("Zephaniah", "Zeph"), ("Haggai", "Hag"), ("Zechariah", "Zech"), ("Malachi", "Mal"), ("Matthew", "Matt"),
+    ("Mark", "Mark"), ("Luke", "Luke"), ("John", "John"), ("Acts", "Acts"), ("Romans", "Rom"),
+    ("1 Corinthians", "1 Cor"), ("2 Corinthians", "2 Cor"), ("Galatians", "Gal"), ("Ephesians", "Eph"), ("Philippians", "Phil"),
+    ("Colossians", "Col"), ("1 Thessalonians", "1 Thess"), ("2 Thessalonians", "2 Thess"), ("1 Timothy", "1 Tim"), ("2 Timothy", "2 Tim"),
+    ("Titus", "Titus"), ("Philemon", "Phlm"), ("Hebrews", "Heb"), ("James", "Jas"), ("1 Peter", "1 Pet"),
+    ("2 Peter", "2 Pet"), ("1 John", "1 John"), ("2 John", "2 John"), ("3 John", "3 John"), ("Jude", "Jude"),
+    ("Revelation", "Rev"),
+]
+
+
+def make_bible():
+    # a Bible JSON dict with the 66 book names and their abbreviations, 10 chapters of 10 verses each
+    books = []
+    for name, abbreviation in BOOK_NAMES:
+        chapters = [{"chapter": c, "verses": [{"verse": v, "text": "verse text"} for v in range(1, 11)]} for c in range(1, 11)]
+        books.append({"book": name, "names": [name, abbreviation], "chapters": chapters})
+    return {"books": books}
+
+
+def legacy_qualify_book(book_name):
+    # the old qualifyBook: first proper name containing book_name
+    if book_name == '':
+        return None
+    for name in bibledb_lib.book_proper_names:
+        if book_name.lower() in name.lower():
+            return name
+    return None
+
+
+def legacy_get_book_index(book):
+    book = legacy_qualify_book(book)
+    return bibledb_lib.book_proper_names.index(book) if book in bibledb_lib.book_proper_names else -1
+
+
+def legacy_parse_verse_reference(verse_ref):
+    # the old parseVerseReference, as it was before the regex parser
+    parts = verse_ref.split()
+    if len(parts) < 2:
+        return None
+    if '-' in verse_ref:
+        refs = verse_ref.split('-')
+        refs[0] = refs[0].strip()
+        refs[1] = refs[1].strip()
+        start = refs[0].split()
+        i = 0
+        sbname = ''
+        while i < len(start) - 1:
+            sbname += start[i] + " "
+            i += 1
+        sb = legacy_get_book_index(legacy_qualify_book(sbname.strip()))
+        sc = start[i].split(':')[0]
+        sv = start[i].split(':')[1]
+        if " " in refs[1]:
+            end = refs[1].split()
+            i = 0
+            ebname = ''
+            while i < len(start) - 1:
+                ebname += end[i] + " "
+                i += 1
+            eb = legacy_get_book_index(legacy_qualify_book(ebname.strip()))
+            ec = end[i].split(':')[0]
+            ev = end[i].split(':')[1]
+        elif ":" in refs[1].strip():
+            eb = sb
+            ec = refs[1].strip().split(':')[0]
+            ev = refs[1].strip().split(':')[1]
+        else:
+            eb = sb
+            ec = sc
+            ev = refs[1].strip()
+    else:
+        i = 0
+        book_name = ''
+        while i < len(parts) - 1:
+            book_name += parts[i] + " "
+            i += 1
+        verse_nums = parts[i]
+        book_name = book_name.strip()
+        vparts = verse_nums.split(':')
+        sb = legacy_get_book_index(legacy_qualify_book(book_name))
+        eb = sb
+        sc = vparts[0].strip()
+        ec = sc
+        sv = vparts[1].strip()
+        ev = sv
+    return {'sb': sb, 'sc': sc, 'sv': sv, 'eb': eb, 'ec': ec, 'ev': ev}
+
+
+def make_references(rng, count):
+    # the shapes normalize_vref produces: single verses, verse ranges, chapter ranges, book ranges
+    references = []
+    for n in range(count):
+        book = rng.randrange(len(BOOK_NAMES))
+        name = BOOK_NAMES[book][0]
+        chapter = rng.randint(1, 10)
+        verse = rng.randint(1, 7)
+        shape = rng.randrange(4)
+        if shape == 0:
+            references.append(f"{name} {chapter}:{verse}")
+        elif shape == 1:
+            references.append(f"{name} {chapter}:{verse}-{verse + 3}")
+        elif shape == 2:
+            references.append(f"{name} {chapter}:{verse}-{chapter + 1}:{verse}")
+        else:
+            # the old parser reads as many end-book words as the start book has, so keep them the same
+            other = rng.choice([b for b in BOOK_NAMES if len(b[0].split()) == len(name.split())])[0]
+            references.append(f"{name} {chapter}:{verse} - {other} {chapter}:{verse}")
+    return references
+
+
+def time_it(function, references):
+    start = time.perf_counter()
+    for ref in references:
+        function(ref)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parseVerseReference against the old parser")
+    parser.add_argument("--references", type=int, default=50000, help="Number of references to parse")
+    parser.add_argument("--unique", type=int, default=3000, help="Number of distinct references among them")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bibledb_lib.parseBibleData(make_bible())
+
+    # there can't be more distinct references than references; each distinct one is parsed at least once
+    unique = min(args.unique, args.references)
+    unique_references = make_references(rng, unique)
+    references = unique_references + [rng.choice(unique_references) for n in range(args.references - unique)]
+    rng.shuffle(references)
+
+    for ref in unique_references:
+        if bibledb_lib.parseVerseReference(ref) != legacy_parse_verse_reference(ref):
+            print(f"MISMATCH for {ref}: {bibledb_lib.parseVerseReference(ref)} vs {legacy_parse_verse_reference(ref)}")
+            break
+
+    print(f"{len(references)} references, {len(set(references))} distinct")
+
+    legacy_time = time_it(legacy_parse_verse_reference, references)
+
+    # cold: nothing cached, every distinct reference goes through the regex and the alias table once
+    bible_index = bibledb_lib.active_bible_index
+    bible_index.find_book.cache_clear()
+    bible_index.parse_reference.cache_clear()
+    cold_time = time_it(bibledb_lib.parseVerseReference, references)
+    # warm: everything comes out of the cache
+    warm_time = time_it(bibledb_lib.parseVerseReference, references)
+
+    # uncached: the regex and alias table on their own
+    uncached_parse = bible_index._parse_reference
+    uncached_time = time_it(uncached_parse, references)
+
+    for label, elapsed in [("old parser", legacy_time), ("regex, no cache", uncached_time),
+                           ("regex, cold cache", cold_time), ("regex, warm cache", warm_time)]:
+        print(f"  {label:18s} {elapsed * 1000:8.1f} ms  ({elapsed / len(references) * 1e6:.2f} us per reference)"
+              f"  {legacy_time / elapsed:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: tag autocomplete, the in-memory TagIndex vs. a LIKE query per keystroke.
+
+The Add Tag dialog looks up suggestions as the user types. It used to run
+SELECT tag FROM tag WHERE tag LIKE '%...%' for every key, which scans the whole tag
+table each time and returns every match unranked. This script builds a database with
+many tags, types a few words one character at a time with both versions, checks that
+the index finds the same tags as LIKE, and prints the timings per keystroke.
+
+Usage:
+    python benchmarks/tag_autocomplete.py [--tags 50000] [--words 200] [--seed 1]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bibledb_lib
+
+
+SYLLABLES = ["an", "ba", "el", "is", "ra", "ho", "lu", "me", "ti", "go", "sa", "ve", "ch", "ri", "de", "om"]
+
+
+def make_tags(rng, count):
+    # made-up words of two to four syllables, some with a second word, like "grace", "mount zion"
+    tags = set()
+    while len(tags) < count:
+        words = ["".join(rng.choice(SYLLABLES) for n in range(rng.randint(2, 4))) for w in range(rng.choice([1, 1, 1, 2]))]
+        tags.add(" ".join(words))
+    return sorted(tags)
+
+
+def fill_database(db_path, tags, rng):
+    # the tags, each used by 0-20 verse groups so the ranking has something to go on
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO tag (tag) VALUES (?)", [(tag,) for tag in tags])
+    rows = []
+    verse_group_id = 0
+    for tag_id in range(1, len(tags) + 1):
+        for n in range(rng.choice([0, 0, 1, 2, 5, 20])):
+            verse_group_id += 1
+            rows.append((verse_group_id, tag_id))
+    cursor.executemany("INSERT INTO verse_group (verse_group_id, start_ordinal, end_ordinal) VALUES (?, 1001001, 1001001)",
+                       [(row[0],) for row in rows])
+    cursor.executemany("INSERT INTO verse_group_tag (verse_group_id, tag_id) VALUES (?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def like_query(cursor, partial_tag):
+    # the old get_tags_like
+    cursor.execute("SELECT tag FROM tag WHERE tag LIKE ?;", ("%" + partial_tag.lower() + "%",))
+    return cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tag autocomplete on a database with many tags")
+    parser.add_argument("--tags", type=int, default=50000, help="Number of tags in the database")
+    parser.add_argument("--words", type=int, default=200, help="Number of tags to type, one keystroke at a time")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tags = make_tags(rng, args.tags)
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, "benchmark.bdb")
+        bibledb_lib.makeDB(db_path)
+        fill_database(db_path, tags, rng)
+        session = bibledb_lib.get_session(db_path)
+
+        # every prefix of some tags, as the dialog sees them while they're typed
+        keystrokes = []
+        for tag in rng.sample(tags, args.words):
+            keystrokes += [tag[:n] for n in range(1, len(tag) + 1)]
+
+        start = time.perf_counter()
+        session.tag_index()
+        build_time = time.perf_counter() - start
+
+        cursor = session.cursor()
+        start = time.perf_counter()
+        like_results = [like_query(cursor, partial) for partial in keystrokes]
+        like_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index_results = [session.get_tags_like(partial) for partial in keystrokes]
+        index_time = time.perf_counter() - start
+
+        index = session.tag_index()
+        for partial, like in zip(keystrokes, like_results):
+            if sorted(index.search(partial, limit=len(index))) != sorted(row[0] for row in like):
+                print(f"MISMATCH for {partial!r}")
+                break
+        for partial, results in zip(keystrokes, index_results):
+            if partial in index and results[0][0] != partial:
+                print(f"exact match for {partial!r} not ranked first")
+                break
+
+        print(f"{len(tags)} tags, {len(keystrokes)} keystrokes, index built in {build_time * 1000:.0f} ms")
+        print(f"  LIKE query: {like_time * 1000:8.1f} ms  ({like_time / len(keystrokes) * 1000:.3f} ms per keystroke)")
+        print(f"  TagIndex:   {index_time * 1000:8.1f} ms  ({index_time / len(keystrokes) * 1000:.3f} ms per keystroke)")
+        if index_time > 0:
+            print(f"  speedup: {like_time / index_time:.1f}x")
+
+        bibledb_lib.close_sessions(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Compiled (binary) Bible files, for fast startup.
+
+A Bible JSON is 10-20 MB, and json.loads builds nested dicts for every verse, footnote
+and cross-reference in it before the window can open. compile_bible turns the JSON into
+a .btb file that load_bible memory-maps instead: only the small book/chapter index is
+read at startup, and each chapter is decoded the first time something asks for it.
+
+File layout (all integers little-endian):
+
+    header      "<8sIII": MAGIC, FORMAT_VERSION, flags, index length in bytes
+    index       UTF-8 JSON: {"books": [{"book": ..., "names": [...],
+                                        "chapters": [[offset, length, verse_count], ...]}]}
+                offsets are from the start of the chapters
+    chapters    one blob per chapter: the chapter's object from the Bible JSON, as UTF-8
+                JSON, zlib-compressed if flags has FLAG_ZLIB
+
+The chapter objects are stored as they are in the JSON, so once decoded they are exactly
+what getBibleData would have given (see bibledb_lib.validate_bible_schema).
+
+For a plain Bible JSON, load_bible_json keeps a sidecar cache next to it (bible_VER.json.cache)
+holding the book index and each chapter's marshal blob (see bibledb_lib.PackedChapters), so a
+warm start doesn't parse the JSON. The cache is written with marshal rather than pickle, so
+loading it doesn't call anything named in the file. marshal isn't meant to be safe against
+damaged or hostile data either, so what's read back is checked by _valid_cache_data (the
+expected lists, dicts and bytes) before it's used, and a cache that fails is rebuilt.
+"""
+
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from collections.abc import Sequence
+
+import bibledb_lib
+
+MAGIC = b"BTBIBLE\0"
+FORMAT_VERSION = 1
+FLAG_ZLIB = 1
+
+HEADER = struct.Struct("<8sIII")
+
+BINARY_EXTENSION = ".btb"
+
+CACHE_EXTENSION = ".cache"
+# bump this when the layout of the cache changes, so old caches are rebuilt instead of misread
+CACHE_FORMAT_VERSION = 3
+
+
+def is_compiled_bible(path):
+    # True if path has the compiled Bible extension (load_bible checks the header itself)
+    return bool(path) and os.path.splitext(path)[1].lower() == BINARY_EXTENSION
+
+
+def compile_bible(json_path, output_path=None, compress=True):
+    """
+    Compile a Bible JSON file into a .btb file.
+
+    Args:
+        json_path: Path to the Bible JSON
+        output_path: Where to write the compiled Bible (defaults to json_path with a .btb extension)
+        compress: zlib-compress each chapter (smaller file, slightly slower to open a chapter)
+
+    Returns: output_path
+    """
+    if output_path is None:
+        output_path = os.path.splitext(json_path)[0] + BINARY_EXTENSION
+
+    with open(json_path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+
+    is_valid, error_msg = bibledb_lib.validate_bible_schema(data)
+    if not is_valid:
+        raise ValueError(f"Invalid Bible JSON schema: {error_msg}")
+
+    blobs = []
+    index_books = []
+    offset = 0
+    for book in data["books"]:
+        chapters = []
+        for chapter in book["chapters"]:
+            blob = json.dumps(chapter, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            if compress:
+                blob = zlib.compress(blob, 9)
+            chapters.append([offset, len(blob), len(chapter["verses"])])
+            blobs.append(blob)
+            offset += len(blob)
+        index_books.append({"book": book.get("book", ""), "names": book.get("names", []), "chapters": chapters})
+    index = json.dumps({"books": index_books}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    flags = FLAG_ZLIB if compress else 0
+    temp_path = output_path + ".tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(index)))
+        file.write(index)
+        for blob in blobs:
+            file.write(blob)
+    # only replace an existing compiled Bible once the new one is completely written
+    os.replace(temp_path, output_path)
+
+    return output_path
+
+
+class CompiledChapters(Sequence):
+    """
+    The chapters of one book of a compiled Bible.
+
+    Behaves like the book's "chapters" list from the Bible JSON, but each chapter is only
+    read out of the mapped file and decoded when it is indexed.
+    """
+
+    def __init__(self, mapped, data_offset, chapters, compressed):
+        self._mapped = mapped
+        self._data_offset = data_offset
+        self._chapters = chapters
+        self._compressed = compressed
+
+    def __len__(self):
+        return len(self._chapters)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        offset, length, verse_count = self._chapters[i]
+        offset += self._data_offset
+        blob = self._mapped[offset:offset + length]
+        if self._compressed:
+            blob = zlib.decompress(blob)
+        return json.loads(blob.decode('utf-8'))
+
+    def verse_counts(self):
+        # verses per chapter, straight from the index
+        return [chapter[2] for chapter in self._chapters]
+
+
+def load_bible(path):
+    """
+    Open a compiled Bible and make it the active Bible (like bibledb_lib.getBibleData).
+
+    Returns:
+    bibleData: dict - {book_name: CompiledChapters}
+        Each book's chapters are decoded from the file when indexed
+    """
+    with open(path, 'rb') as file:
+        # the map stays valid after the file is closed, and is released with the last CompiledChapters
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < HEADER.size:
+        raise ValueError(f"Not a compiled Bible file: {path}")
+    magic, version, flags, index_length = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"Not a compiled Bible file: {path}")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Compiled Bible format version {version} is not supported (expected {FORMAT_VERSION}). "
+                         "Compile it again from the Bible JSON.")
+
+    index = json.loads(mapped[HEADER.size:HEADER.size + index_length].decode('utf-8'))
+    compressed = bool(flags & FLAG_ZLIB)
+    data_offset = HEADER.size + index_length
+
+    books = []
+    book_chapters = []
+    for book in index["books"]:
+        chapters = CompiledChapters(mapped, data_offset, book["chapters"], compressed)
+        books.append((book, chapters.verse_counts()))
+        book_chapters.append(chapters)
+    bible_index = bibledb_lib.BibleIndex(books)
+
+    bibleData = dict(zip(bible_index.book_names, book_chapters))
+
+    bibledb_lib.set_active_bible_index(bible_index)
+
+    return bibleData
+
+
+def _cache_stamp(json_path, file_stat, content_hash):
+    # everything the cache is keyed on. marshal's format depends on the Python version, so that's in here too
+    return {
+        "format": CACHE_FORMAT_VERSION,
+        "python": (marshal.version,) + tuple(sys.version_info[:2]),
+        "path": os.path.abspath(json_path),
+        "size": file_stat.st_size,
+        "mtime_ns": file_stat.st_mtime_ns,
+        "hash": content_hash,
+    }
+
+
+def _read_cache(cache_path, json_path, file_stat):
+    # the cached (index, chapters) for json_path, or None if there's no usable cache.
+    # The file's size and mtime are enough to trust the cache; if only the mtime (or path)
+    # differs, the file is hashed and the cache is still used if the content is the same.
+    try:
+        with open(cache_path, 'rb') as file:
+            stamp = marshal.load(file)
+            if not isinstance(stamp, dict):
+                raise ValueError("not a Bible cache")
+            expected = _cache_stamp(json_path, file_stat, stamp.get("hash"))
+            if any(stamp.get(key) != expected[key] for key in ("format", "python", "size")):
+                return None
+            if stamp != expected:
+                with open(json_path, 'rb') as json_file:
+                    if hashlib.blake2b(json_file.read()).hexdigest() != stamp.get("hash"):
+                        return None
+                stale_stamp = True
+            else:
+                stale_stamp = False
+            index, chapters = marshal.load(file)
+            if not _valid_cache_data(index, chapters):
+                raise ValueError("unexpected cache contents")
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable Bible cache {cache_path}: {e}")
+        return None
+
+    if stale_stamp:
+        # same content under a new mtime or path: re-stamp so the next start doesn't hash it again
+        _write_cache(cache_path, _cache_stamp(json_path, file_stat, stamp["hash"]), index, chapters)
+    return index, chapters
+
+
+def _valid_cache_data(index, chapters):
+    # index is [(book header dict, [verse count, ...]), ...] and chapters is [[chapter blob, ...], ...], one per book
+    if not isinstance(index, list) or not isinstance(chapters, list) or len(index) != len(chapters):
+        return False
+    for entry, blobs in zip(index, chapters):
+        if not isinstance(entry, (tuple, list)) or len(entry) != 2:
+            return False
+        book, counts = entry
+        if not isinstance(book, dict) or not isinstance(counts, list) or not all(type(count) is int for count in counts):
+            return False
+        if not isinstance(blobs, list) or len(blobs) != len(counts) or not all(type(blob) is bytes for blob in blobs):
+            return False
+    return True
+
+
+def _write_cache(cache_path, stamp, index, chapters):
+    temp_path = cache_path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as file:
+            # the stamp is written on its own first, so checking it doesn't load the chapters
+            marshal.dump(stamp, file)
+            marshal.dump((index, chapters), file)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        # e.g. the Bible is in a read-only folder; it still loads, just without a cache
+        print(f"Could not write Bible cache {cache_path}: {e}")
+
+
+def load_bible_json(json_path, rebuild_cache=False):
+    """
+    Load a Bible JSON and make it the active Bible, using its sidecar cache when it's valid.
+
+    The cache (json_path + ".cache") is keyed by the file's path, size, mtime and content hash,
+    and is rebuilt whenever the JSON changes, or always with rebuild_cache=True.
+
+    Returns:
+    bibleData: dict - {book_name: chapters}
+        Each book's chapters are PackedChapters, decoded when indexed (see bibledb_lib.getBibleData)
+    """
+    start = time.perf_counter()
+    cache_path = json_path + CACHE_EXTENSION
+    file_stat = os.stat(json_path)
+
+    cached = None if rebuild_cache else _read_cache(cache_path, json_path, file_stat)
+    if cached is not None:
+        index, chapters = cached
+        bible_index = bibledb_lib.BibleIndex(index)
+        bibleData = {book_name: bibledb_lib.PackedChapters(blobs) for book_name, blobs in zip(bible_index.book_names, chapters)}
+        bibledb_lib.set_active_bible_index(bible_index)
+        print(f"Loaded Bible from cache in {(time.perf_counter() - start) * 1000:.0f} ms (warm)")
+        return bibleData
+
+    with open(json_path, 'rb') as file:
+        content = file.read()
+    content_hash = hashlib.blake2b(content).hexdigest()
+    content = content.decode('utf-8')
+    bibleData = bibledb_lib.getBibleData(content)
+    del content
+    parse_time = time.perf_counter() - start
+
+    # the chapters are already marshal blobs, so the cache is just those and the book index
+    bible_index = bibledb_lib.active_bible_index
+    index = list(zip(bible_index.book_headers, bible_index.chapter_verse_counts))
+    chapters = [book_chapters.blobs for book_chapters in bibleData.values()]
+    _write_cache(cache_path, _cache_stamp(json_path, file_stat, content_hash), index, chapters)
+
+    print(f"Parsed Bible JSON in {parse_time * 1000:.0f} ms (cold), "
+          f"cache written in {(time.perf_counter() - start - parse_time) * 1000:.0f} ms")
+    return bibleData
@@ -0,0 +1,141 @@
+"""
+Full-text search over the loaded Bible's verse text, using an SQLite FTS5 index.
+
+The index is built once per translation and kept next to the Bible file
+(bible_VER.json.search.db). It's rebuilt when the Bible file's size or mtime changes.
+Each verse is one row, with the packed verse ordinal (see bibledb_lib.make_verse_ordinal)
+as its rowid, so results come back in canonical order and map straight to references.
+
+Queries use FTS5 syntax:
+    love one another        all three words, anywhere in the verse
+    "love one another"      the phrase
+    belie*                  words starting with "belie"
+    faith OR hope           either word
+    grace NOT works         "grace" but not "works"
+    (faith OR hope) AND love
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+import bibledb_lib
+
+SEARCH_INDEX_EXTENSION = ".search.db"
+# bump this when the index layout changes, so old indexes are rebuilt
+SEARCH_INDEX_VERSION = 2
+
+
+def _source_stamp(bible_path, bible_index):
+    # what the index was built from; if any of it changes the index is rebuilt
+    file_stat = os.stat(bible_path)
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "size": file_stat.st_size,
+        "mtime_ns": file_stat.st_mtime_ns,
+        "book_names": list(bible_index.book_names),
+    }
+
+
+class BibleSearchIndex:
+    """
+    FTS5 index of one Bible's verse text.
+
+    Opening it builds the index file if it's missing or out of date, which takes a moment
+    for a whole Bible; after that, searches take a few milliseconds.
+    """
+
+    def __init__(self, bible_path, bible_data, bible_index=None, rebuild=False):
+        self.bible_path = bible_path
+        self.bible_index = bibledb_lib._bible_index(bible_index)
+        self.index_path = bible_path + SEARCH_INDEX_EXTENSION
+
+        stamp = _source_stamp(bible_path, self.bible_index)
+        if rebuild or self._read_stamp() != stamp:
+            self._build(bible_data, stamp)
+        self.conn = sqlite3.connect(self.index_path, check_same_thread=False)
+
+    def _read_stamp(self):
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            conn = sqlite3.connect(self.index_path)
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+            finally:
+                conn.close()
+            return json.loads(row[0]) if row else None
+        except sqlite3.Error:
+            return None
+
+    def _build(self, bible_data, stamp):
+        start = time.perf_counter()
+        temp_path = self.index_path + ".tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        conn = sqlite3.connect(temp_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            cursor.execute("CREATE VIRTUAL TABLE verse_text USING fts5(text, tokenize = 'unicode61 remove_diacritics 2')")
+
+            # bible_data's books are in the same order as bible_index's (both come from the same JSON),
+            # so a book's position is its number; looking it up by name could land on another book's alias
+            rows = []
+            for book, (book_name, chapters) in enumerate(bible_data.items()):
+                for chapter_number, chapter in enumerate(chapters, start=1):
+                    for verse in chapter["verses"]:
+                        rows.append((bibledb_lib.make_verse_ordinal(book, chapter_number, verse["verse"]), verse["text"]))
+            # a plain INSERT, so a verse that's in the Bible twice is an error instead of quietly replacing the first
+            cursor.executemany("INSERT INTO verse_text (rowid, text) VALUES (?, ?)", rows)
+            # merge the index into one b-tree, so queries don't have to check several segments
+            cursor.execute("INSERT INTO verse_text (verse_text) VALUES ('optimize')")
+            cursor.execute("INSERT INTO meta (key, value) VALUES ('stamp', ?)", (json.dumps(stamp),))
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(temp_path, self.index_path)
+
+        print(f"Built Bible search index ({len(rows)} verses) in {(time.perf_counter() - start) * 1000:.0f} ms: {self.index_path}")
+
+    def close(self):
+        self.conn.close()
+
+    def search(self, query, limit=500):
+        """
+        Verses matching an FTS5 query, in canonical order.
+
+        Input that isn't valid FTS5 syntax (e.g. a stray quote or an apostrophe in a word)
+        is searched as plain words instead.
+
+        Returns: list of (verse_ref, text) with the matched words in [brackets], at most limit of them
+        """
+        query = query.strip()
+        if not query:
+            return []
+        try:
+            rows = self._match(query, limit)
+        except sqlite3.OperationalError:
+            try:
+                rows = self._match(bibledb_lib.fts_plain_words(query), limit)
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search: {e}")
+
+        results = []
+        for ordinal, text in rows:
+            book, chapter, verse = bibledb_lib.split_verse_ordinal(ordinal)
+            results.append((f"{self.bible_index.book_names[book]} {chapter}:{verse}", text))
+        return results
+
+    def _match(self, fts_query, limit):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT rowid, highlight(verse_text, 0, '[', ']')
+            FROM verse_text
+            WHERE verse_text MATCH ?
+            ORDER BY rowid
+            LIMIT ?
+        """, (fts_query, limit))
+        return cursor.fetchall()
@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
 import bibledb_lib
+import bible_binary
+import bible_search
+import chapter_layout
 from tkinter.font import Font
 from tkinter import simpledialog
 from tkinter import messagebox
@@ -11,6 +14,9 @@ import os
 import sys
 import configparser
 import argparse
+import time
+import bisect
+from collections import OrderedDict
 
 textlinegap = 2
 textelbowroom = 6 #that's "elbow room" for left and right spacing
@@ -23,20 +29,10 @@ open_db_file = None
 current_bible_json = None
 
 
-def wrapText(text, width, font):
-    line = ''
-        
-    lines = []
-    for word in text.split(' '):
-        linewidth = font.measure(line + " " + word)
-        if linewidth < width:
-            line += " " + word
-        else:
-            lines.append(line)
-            line = word
-    if line != '':
-        lines.append(line)
-    return lines
+# how many chapter layouts ScripturePanel keeps
+LAYOUT_CACHE_SIZE = 32
+# how far above and below the visible part of a chapter ScripturePanel draws, in pixels
+RENDER_MARGIN = 600
 
 
 class BibleTaggerApp:
@@ -74,6 +70,7 @@ class BibleTaggerApp:
         self.navigation_tree = NavigationTree(self)
         self.scripture_panel = ScripturePanel(self)
         self.tagger_panel = TaggerPanel(self)
+        self.search_panel = BibleSearchPanel(self)
         
         # Now that navigation_tree is created, set the load_bible callback
         self.db_manager.load_bible_callback = lambda: self.navigation_tree.load_bible()
@@ -101,8 +98,8 @@ class BibleTaggerApp:
         #fixing the scrollbar behavior
         self.active_panel = None
         self.master.bind("<MouseWheel>", self.scroll_active_panel)
-        self.scripture_panel.canvas.bind("<Enter>", self.set_active_panel)
-        self.scripture_panel.canvas.bind("<Leave>", self.clear_active_panel)
+        self.scripture_panel.canvas.bind("<Enter>", self.set_active_panel, add="+")
+        self.scripture_panel.canvas.bind("<Leave>", self.clear_active_panel, add="+")
         self.tagger_panel.canvas.bind("<Enter>", self.set_active_panel)
         self.tagger_panel.canvas.bind("<Leave>", self.clear_active_panel)
         #self.tagger_panel.canvas_frame.bind("<MouseWheel>", self.scroll_active_panel)
@@ -111,7 +108,7 @@ class BibleTaggerApp:
         bible_loaded = False
         if jsonpath:
             try:
-                self.navigation_tree.load_json(jsonpath)
+                self.navigation_tree.load_json(jsonpath, rebuild_cache=cli_args.rebuild_cache)
                 bible_loaded = True
             except Exception as e:
                 print("Failed to load JSON file from config:", e)
@@ -132,10 +129,10 @@ class BibleTaggerApp:
                     parent=self.master,
                     title="Select Bible JSON File",
                     defaultextension=".json",
-                    filetypes=[("JSON Bibles", "*.json"), ("All files", "*.*")]
+                    filetypes=[("JSON Bibles", "*.json"), ("Compiled Bibles", "*.btb"), ("All files", "*.*")]
                 )
                 
-                if file_path and file_path[-5:] == '.json':
+                if file_path and (file_path[-5:] == '.json' or bible_binary.is_compiled_bible(file_path)):
                     try:
                         self.navigation_tree.load_json(file_path)
                         bible_loaded = True
@@ -356,6 +353,8 @@ class BibleTaggerApp:
         file_path = filedialog.asksaveasfilename(parent=parent, defaultextension=".bdb", filetypes=[("Sqlite Bible Files", "*.bdb"), ("All files", "*.*")])
 
         if file_path:
+            # drop any pooled connection to a file we're about to overwrite
+            bibledb_lib.close_sessions(file_path)
             with open(file_path, 'w') as f:
                 f.write("")
                 bibledb_lib.makeDB(file_path)
@@ -397,6 +396,8 @@ class BibleTaggerApp:
         file_path = filedialog.asksaveasfilename(parent=parent, defaultextension=".bdb", filetypes=[("Sqlite Bible Files", "*.bdb"), ("All files", "*.*")])
 
         if file_path:
+            # drop any pooled connection to a file we're about to overwrite
+            bibledb_lib.close_sessions(file_path)
             if open_db_file is None:
                 with open(file_path, 'w') as f:
                     f.write("")
@@ -418,7 +419,22 @@ class BibleTaggerApp:
             elif not os.path.exists(file_path):
                 print("That file doesn't exist!")
             elif file_path[-4:] == ".bdb":
-                bibledb_lib.merge_dbs(open_db_file, file_path)
+                progress_window = tk.Toplevel(parent)
+                progress_window.title("Merging Databases")
+                progress_window.geometry("350x110")
+                progress_label = tk.Label(progress_window, text="Preparing...")
+                progress_label.pack(pady=8)
+                progress_bar = ttk.Progressbar(progress_window, orient="horizontal", length=300, mode="determinate")
+                progress_bar.pack(pady=6)
+                progress_window.update_idletasks()
+
+                def show_progress(fraction, message):
+                    progress_label.config(text=message.strip())
+                    progress_bar['value'] = fraction * 100
+                    progress_window.update_idletasks()
+
+                bibledb_lib.merge_dbs(open_db_file, file_path, show_progress)
+                progress_window.destroy()
                 self.cause_canvas_to_refresh()
                 self.update_tree_colors()
             else:
@@ -657,6 +673,9 @@ class NavigationTree:
         self.open_db_manager_button = tk.Button(self.db_buttons_frame, text="Open DB Manager", 
                                                 command=lambda: self.bta.db_manager.show(self.bta.db_explorer_callback, open_db_file))
         self.open_db_manager_button.grid(row=0, column=0, sticky="ew")
+
+        self.search_bible_button = tk.Button(self.db_buttons_frame, text="Search Bible", command=lambda: self.bta.search_panel.show())
+        self.search_bible_button.grid(row=1, column=0, sticky="ew", pady=(3, 0))
         
         self.bta.paned_window.add(self.tree_frame)
         self.tree.bind("<ButtonRelease-1>", self.on_tree_item_click)
@@ -674,8 +693,9 @@ class NavigationTree:
                 tagID = item_id+"/Ch "+str(i+1)
                 chapter_id = self.tree.insert(item_id, 'end', text="Ch "+str(i+1), iid=tagID, tags=(tagID,))
                 #print(tagID)
-                self.tree_item_data[chapter_id] = value[i]  # Store the associated data
-                #TO DO: Remove the above line (self.tree_item_data[chapter_id] = value[i]) if not used
+                # store where the chapter is, not the chapter itself; it's only looked up
+                # (and for a compiled Bible, decoded) when the chapter is displayed
+                self.tree_item_data[chapter_id] = (value, i)
                 i += 1
 
     def recolor(self, marked_chapters):
@@ -750,6 +770,9 @@ class NavigationTree:
 
             #get the data associated with that item and pass it to the canvas for display
             item_data = self.tree_item_data.get(item_id)
+            if isinstance(item_data, tuple):
+                chapters, i = item_data
+                item_data = chapters[i]
             #print("sending..." + str(attributes))
             # Use the callback in the NavigationTree class to handle the canvas update
             self.bta.tree_callback(item_id, item_data, reset_scroll_region)
@@ -758,14 +781,17 @@ class NavigationTree:
             #clicking white space on the list throws this error. Just don't update the item.
             pass 
 
-    def load_json(self, bible_file_path):
+    def load_json(self, bible_file_path, rebuild_cache=False):
         global bible_data, cfg, config_filename, current_bible_json
         
         try:
             current_bible_json = bible_file_path
-            with open(bible_file_path, 'r', encoding='utf-8') as file:
-                bible_file_content = file.read()
-                bible_data = bibledb_lib.getBibleData(bible_file_content)
+            if bible_binary.is_compiled_bible(bible_file_path):
+                # compiled Bible: only the index is read now, chapters are decoded when displayed
+                bible_data = bible_binary.load_bible(bible_file_path)
+            else:
+                # reuses the parsed Bible from its sidecar cache if the JSON hasn't changed
+                bible_data = bible_binary.load_bible_json(bible_file_path, rebuild_cache=rebuild_cache)
             #print("dumping output from open_file_dialog")
             #print(bible_data)
         except ValueError as e:
@@ -851,13 +877,111 @@ class NavigationTree:
         global bible_data
         # Use DB Manager window as parent if it's open
         parent = self.bta.db_manager.top_window if hasattr(self.bta.db_manager, 'top_window') and self.bta.db_manager.top_window else self.bta.master
-        file_path = filedialog.askopenfilename(parent=parent, defaultextension=".json", filetypes=[("JSON Bibles", "*.json"), ("All files", "*.*")])
+        file_path = filedialog.askopenfilename(parent=parent, defaultextension=".json", filetypes=[("JSON Bibles", "*.json"), ("Compiled Bibles", "*.btb"), ("All files", "*.*")])
         if file_path:
-            if file_path[-5:] == '.json':
+            if file_path[-5:] == '.json' or bible_binary.is_compiled_bible(file_path):
                 #print(f"Selected file: {file_path}")
                 self.load_json(file_path)
             else:
-                print("Invalid file! JSON file expected.")
+                print("Invalid file! JSON or compiled (.btb) Bible file expected.")
+
+class BibleSearchPanel:
+    #window for full-text search of the loaded Bible's verse text. Clicking a result navigates to that verse.
+    result_limit = 500
+
+    def __init__(self, bta):
+        self.bta = bta
+        self.top_window = None
+        self.search_index = None
+        self.search_bible_data = None #the bible_data the search index was opened for
+
+    def show(self):
+        if self.top_window and self.top_window.winfo_exists():
+            self.top_window.lift()
+            self.query_entry.focus_set()
+            return
+        self.top_window = tk.Toplevel(self.bta.master)
+        self.top_window.title("Search Bible")
+        self.top_window.iconbitmap("./bibletaggericon.ico")
+        self.top_window.geometry("750x450")
+
+        def on_close():
+            self.top_window.destroy()
+            self.top_window = None
+        self.top_window.protocol("WM_DELETE_WINDOW", on_close)
+
+        query_frame = ttk.Frame(self.top_window)
+        query_frame.pack(fill="x", padx=5, pady=5)
+        self.query_entry = ttk.Entry(query_frame)
+        self.query_entry.pack(side="left", fill="x", expand=True)
+        self.query_entry.bind("<Return>", self.run_search)
+        ttk.Button(query_frame, text="Search", command=self.run_search).pack(side="left", padx=(5, 0))
+
+        ttk.Label(self.top_window, text='Words (all must match), "a phrase", prefix*, OR, NOT, (parentheses)',
+                  foreground="gray").pack(anchor="w", padx=5)
+
+        results_frame = ttk.Frame(self.top_window)
+        results_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        self.results = ttk.Treeview(results_frame, columns=("ref", "text"), show="headings")
+        self.results.heading("ref", text="Reference")
+        self.results.heading("text", text="Verse")
+        self.results.column("ref", width=130, stretch=False)
+        self.results.column("text", width=580)
+        vsb = ttk.Scrollbar(results_frame, orient="vertical", command=self.results.yview)
+        self.results.configure(yscrollcommand=vsb.set)
+        self.results.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
+        self.results.bind("<<TreeviewSelect>>", self.on_result_click)
+
+        self.status_label = ttk.Label(self.top_window, text="")
+        self.status_label.pack(anchor="w", padx=5, pady=(0, 5))
+
+        self.query_entry.focus_set()
+
+    def get_search_index(self):
+        # the search index for the Bible that's loaded now, building it the first time
+        global bible_data, current_bible_json
+        if not bible_data or not current_bible_json:
+            return None
+        if self.search_index is None or self.search_bible_data is not bible_data:
+            if self.search_index is not None:
+                self.search_index.close()
+            self.status_label.config(text="Building the search index for this Bible (only needed once)...")
+            self.top_window.update_idletasks()
+            self.search_index = bible_search.BibleSearchIndex(current_bible_json, bible_data)
+            self.search_bible_data = bible_data
+        return self.search_index
+
+    def run_search(self, event=None):
+        query = self.query_entry.get()
+        search_index = self.get_search_index()
+        if search_index is None:
+            self.status_label.config(text="No Bible loaded")
+            return
+
+        start = time.perf_counter()
+        try:
+            results = search_index.search(query, limit=self.result_limit)
+        except ValueError as e:
+            self.status_label.config(text=str(e))
+            return
+        elapsed = time.perf_counter() - start
+
+        self.results.delete(*self.results.get_children())
+        for ref, text in results:
+            self.results.insert("", "end", values=(ref, text))
+
+        status = f"{len(results)} verses ({elapsed * 1000:.0f} ms)"
+        if len(results) == self.result_limit:
+            status = f"Showing the first {self.result_limit} verses ({elapsed * 1000:.0f} ms)"
+        self.status_label.config(text=status)
+
+    def on_result_click(self, event=None):
+        selection = self.results.selection()
+        if not selection:
+            return
+        ref = self.results.item(selection[0], "values")[0]
+        self.bta.options_callback((ref, ref), True)
 
 class ScripturePanel:
     def __init__(self, bta):
@@ -867,6 +991,29 @@ class ScripturePanel:
         self.italicFont = Font(size = 10, slant = 'italic')
         self.boldFont = Font(size = 10, weight = 'bold')
         self.italicunderlineFont = Font(size=10, slant='italic', underline=True)
+        #chapter layouts refer to the fonts by these names (see chapter_layout)
+        self.fonts = {'text': self.canvasFont, 'italic': self.italicFont, 'bold': self.boldFont, 'italic_underline': self.italicunderlineFont}
+        self.font_spec = tuple((name, font.cget('size'), font.cget('weight'), font.cget('slant'), font.cget('underline')) for name, font in sorted(self.fonts.items()))
+        self.metrics = chapter_layout.FontMetrics(self.fonts)
+        #recently laid-out chapters, most recent last (see get_chapter_layout)
+        self.layout_cache = OrderedDict()
+
+        #the current chapter's draw ops, in layers that can be searched by y (see render_viewport),
+        #and the canvas items drawn for them so far
+        self.view_layers = []
+        self.view_items = {}
+        self.view_band = None
+        self.view_scrollregion = None
+        #what the canvas is showing: the layout, the note/tag rows its bars were drawn for, and the
+        #verse numbers drawn as selected. display_chapter starts over when the layout changes.
+        self.current_layout = None
+        self.current_notestags = None
+        self.selected_verses = set()
+        #how far right of the layout the text is drawn, to make room for the note/tag bars
+        self.text_dx = 0
+        #what the mouse is over: a verse_heights entry, and the (position, op) of a cross-reference
+        self.hover_verse = None
+        self.hover_link = None
 
         self.canvas_frame = ttk.Frame(self.bta.paned_window)
         self.canvas_frame.grid(row=0, column=1, sticky="nsew")
@@ -877,15 +1024,21 @@ class ScripturePanel:
         self.canvas = tk.Canvas(self.canvas_frame)
         self.canvas.grid(row=0, column=0, sticky="nsew")
 
-        self.canvas.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        self.canvas_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        self.canvas.bind("<Configure>", self.reset_scrollregion)
+        self.canvas_frame.bind("<Configure>", self.reset_scrollregion)
+
+        # one handler each for clicks and hovering over the whole chapter; they work out which verse
+        # or cross-reference is under the mouse from the layout (see verse_at and link_at)
+        self.canvas.bind("<Button-1>", self.on_canvas_click, add="+")
+        self.canvas.bind("<Motion>", self.on_canvas_motion, add="+")
+        self.canvas.bind("<Leave>", self.on_canvas_leave, add="+")
 
         # Create vertical and horizontal scrollbars
         self.v_scrollbar = tk.Scrollbar(self.canvas_frame, orient="vertical", command=self.canvas.yview)
         self.h_scrollbar = tk.Scrollbar(self.canvas_frame, orient="horizontal", command=self.canvas.xview)
 
-        # Configure canvas to use scrollbars
-        self.canvas.configure(yscrollcommand=self.v_scrollbar.set, xscrollcommand=self.h_scrollbar.set)
+        # Configure canvas to use scrollbars; scrolling also draws whatever comes into view (see render_viewport)
+        self.canvas.configure(yscrollcommand=self.on_yscroll, xscrollcommand=self.h_scrollbar.set)
 
         # Add scrollbars to the canvas frame
         self.v_scrollbar.grid(row=0, column=1, sticky="ns")
@@ -1086,14 +1239,226 @@ class ScripturePanel:
             self.selected_end_v = vv
             self.selected_start_c = cc
             self.selected_end_c = cc
-        self.display_chapter()
+        #the clicked verse is in the chapter on screen, so only the verses that change color are redrawn
+        self.update_selection()
         #self.display_chapter()
         #print(f"Text clicked: {clicked_text}")
         #print(f"Scope: {scopename}")
         
     def reset_scrollregion(self, event = None):
-        self.canvas.configure(scrollregion=self.canvas.bbox("ALL"))
-    
+        #a chapter's scroll region comes from its layout, since most of it isn't on the canvas
+        if self.view_scrollregion is not None:
+            self.canvas.configure(scrollregion=self.view_scrollregion)
+            self.render_viewport()
+        else:
+            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+    def on_yscroll(self, first, last):
+        #called by the canvas whenever its view moves
+        self.v_scrollbar.set(first, last)
+        self.render_viewport()
+
+    def render_viewport(self, force = False):
+        # Only the part of the chapter in view, and RENDER_MARGIN pixels above and below it, is on the canvas.
+        # Once the view scrolls to within half a margin of the edge of what's drawn, what's scrolled
+        # out of the band is deleted and what's come into it is drawn, so the number of canvas items
+        # depends on the window's height and not the chapter's length.
+        if not self.view_layers:
+            return
+        view_top = self.canvas.canvasy(0)
+        view_bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        if not force and self.view_band is not None:
+            band_top, band_bottom = self.view_band
+            if band_top <= max(0, view_top - RENDER_MARGIN/2) and band_bottom >= min(self.view_scrollregion[3], view_bottom + RENDER_MARGIN/2):
+                return
+        band_top = view_top - RENDER_MARGIN
+        band_bottom = view_bottom + RENDER_MARGIN
+        self.view_band = (band_top, band_bottom)
+
+        wanted = set()
+        for layer, index in enumerate(self.view_layers):
+            wanted.update((layer, position) for position in index.in_band(band_top, band_bottom))
+        for key in [key for key in self.view_items if key not in wanted]:
+            self.canvas.delete(self.view_items.pop(key))
+        for key in sorted(wanted):
+            if key not in self.view_items:
+                layer, position = key
+                self.view_items[key] = self.draw_view_op(self.view_layers[layer].ops[position], layer)
+
+    def get_chapter_layout(self, item, data, verse_area_width):
+        # the layout for this chapter at this width (see chapter_layout) and an OpIndex of its ops,
+        # from the cache if it's been laid out already.
+        # The text is laid out as if there were no note/tag bars, and moved right past them when it's drawn
+        # (see draw_view_op), so selecting verses and editing tags or notes don't change it.
+        global textlinegap, textelbowroom
+        key = (bibledb_lib.active_bible_index, item, verse_area_width, self.font_spec,
+               self.bta.show_footnotes, self.bta.show_crossrefs, self.bta.footnote_tooltip_delay >= 0)
+        cached = self.layout_cache.get(key)
+        if cached is None:
+            item_hierarchy = item.split('/')
+            x_offset = 5 #initial x offset...
+            layout = chapter_layout.layout_chapter(item_hierarchy[-2], int(item_hierarchy[-1].replace("Ch ","")), data,
+                                                   verse_area_width, x_offset, self.metrics,
+                                                   show_footnotes=self.bta.show_footnotes,
+                                                   show_crossrefs=self.bta.show_crossrefs,
+                                                   footnote_tooltips=self.bta.footnote_tooltip_delay >= 0,
+                                                   line_gap=textlinegap, elbow_room=textelbowroom)
+            cached = self.layout_cache[key] = (layout, chapter_layout.OpIndex(layout.ops, self.metrics))
+            if len(self.layout_cache) > LAYOUT_CACHE_SIZE:
+                self.layout_cache.popitem(last=False)
+        else:
+            self.layout_cache.move_to_end(key)
+        return cached
+
+    def draw_op(self, op, fill=None, tags=(), dx=0):
+        # put one chapter_layout draw operation on the canvas, dx pixels right of where the layout put it
+        if type(op) is chapter_layout.LineOp:
+            return self.canvas.create_line(op.x + dx, op.y, op.x2 + dx, op.y2, fill=op.fill, width=op.width, tags=tags)
+        return self.canvas.create_text(op.x + dx, op.y, text=op.text, anchor=op.anchor, fill=fill or op.fill, font=self.fonts[op.font], tags=tags)
+
+    def draw_view_op(self, op, layer):
+        # draw one of the current chapter's ops, with the selection color.
+        # The chapter's text (layer 0) is tagged "chaptertext" and drawn text_dx pixels right, past the note/tag bars.
+        # Each verse's items are tagged "verse<n>" so its color can be changed in one call (see update_selection),
+        # and the note/tag bars (layer 1) are tagged "annotation".
+        if layer == 1:
+            return self.draw_op(op, tags="annotation")
+        if type(op) is chapter_layout.LineOp or (op.verse is None and op.link is None):
+            return self.draw_op(op, tags="chaptertext", dx=self.text_dx)
+        if op.verse is not None:
+            return self.draw_op(op, fill="maroon" if op.verse in self.selected_verses else "black", tags=("chaptertext", "verse"+str(op.verse)), dx=self.text_dx)
+        # cross-reference; underlined while the mouse is over it
+        font = self.italicunderlineFont if self.hover_link is not None and self.hover_link[1] is op else None
+        ref_obj = self.draw_op(op, tags=("chaptertext", "xref_link"), dx=self.text_dx)
+        if font is not None:
+            self.canvas.itemconfig(ref_obj, font=font)
+        return ref_obj
+
+    def verse_at(self, y):
+        # the verse_heights entry for the verse at canvas y, or None if y isn't on a verse
+        if self.current_layout is None:
+            return None
+        i = bisect.bisect_right(self.verse_tops, y) - 1
+        if i >= 0 and y <= self.current_layout.verse_heights[i]['bot']:
+            return self.current_layout.verse_heights[i]
+        return None
+
+    def link_at(self, x, y):
+        # (position, op) of the cross-reference at canvas x, y, or None
+        if not self.view_layers:
+            return None
+        text_index = self.view_layers[0]
+        x -= self.text_dx
+        for position in text_index.in_band(y, y):
+            op = text_index.ops[position]
+            if type(op) is chapter_layout.TextOp and op.link is not None and op.x <= x <= op.x + self.metrics.measure(op.font, op.text):
+                return position, op
+        return None
+
+    def on_canvas_click(self, event):
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        link = self.link_at(x, y)
+        if link is not None:
+            self.on_xref_click(link[1].link)
+            return
+        verse = self.verse_at(y)
+        if verse is not None:
+            v = verse['v']
+            self.on_text_click(event, self.verse_texts.get(v, ""), self.chapter_ref+":"+str(v), v)
+
+    def on_canvas_motion(self, event):
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        self.set_hover_link(self.link_at(x, y))
+
+        # footnote tooltip for the verse under the mouse
+        verse = self.verse_at(y)
+        if verse is not self.hover_verse:
+            if self.hover_verse is not None and self.hover_verse['v'] in self.current_layout.footnotes:
+                self.hide_footnote_tooltip()
+            self.hover_verse = verse
+            if verse is not None and verse['v'] in self.current_layout.footnotes:
+                self.show_footnote_tooltip(event, self.current_layout.footnotes[verse['v']])
+
+    def on_canvas_leave(self, event):
+        self.set_hover_link(None)
+        if self.hover_verse is not None:
+            self.hide_footnote_tooltip()
+            self.hover_verse = None
+
+    def set_hover_link(self, link):
+        # underline the cross-reference the mouse is over, and put the last one back
+        if link == self.hover_link:
+            return
+        if self.hover_link is not None and (0, self.hover_link[0]) in self.view_items:
+            self.canvas.itemconfig(self.view_items[(0, self.hover_link[0])], font=self.italicFont)
+        if link is not None and (0, link[0]) in self.view_items:
+            self.canvas.itemconfig(self.view_items[(0, link[0])], font=self.italicunderlineFont)
+        self.hover_link = link
+
+    def clear_chapter(self):
+        self.canvas.delete("all")
+        self.view_layers = []
+        self.view_items = {}
+        self.view_band = None
+        self.view_scrollregion = None
+        self.current_layout = None
+        self.current_notestags = None
+        self.selected_verses = set()
+        self.hover_verse = None
+        self.hover_link = None
+        self.hide_footnote_tooltip()
+
+    def update_selection(self):
+        # recolor the verses that were selected and aren't now, or the other way round.
+        # Returns the top of the first selected verse in this chapter, or None.
+        verse_index = bibledb_lib.active_bible_index
+
+        #the user-selected range. Nothing is selected until a verse is clicked.
+        sb = int(bibledb_lib.getBookIndex(self.selected_start_b))
+        eb = int(bibledb_lib.getBookIndex(self.selected_end_b))
+        if sb == -1 or eb == -1:
+            selected_lo, selected_hi = 0, -1
+        else:
+            selected_lo = verse_index.ordinal(sb, self.selected_start_c, self.selected_start_v, clamp=True)
+            selected_hi = verse_index.ordinal(eb, self.selected_end_c, self.selected_end_v, clamp=True)
+
+        #the verses are in order, so the selected ones are a slice of them
+        verse_heights = self.current_layout.verse_heights
+        first = bisect.bisect_left(self.verse_ordinals, selected_lo)
+        last = bisect.bisect_right(self.verse_ordinals, selected_hi)
+        selected = {verse['v'] for verse in verse_heights[first:last]}
+
+        #verses in the user-selected range are highlighted
+        for v in self.selected_verses - selected:
+            self.canvas.itemconfig("verse"+str(v), fill="black")
+        for v in selected - self.selected_verses:
+            self.canvas.itemconfig("verse"+str(v), fill="maroon")
+        self.selected_verses = selected
+
+        if first < last:
+            return verse_heights[first]['top']
+        return None
+
+    def update_annotations(self, notestags, x_offset):
+        # replace the note/tag bars with ones for notestags, and move the text that's already drawn
+        # left or right if the number of bars changed. Nothing else on the canvas is redrawn.
+        self.canvas.delete("annotation")
+        for key in [key for key in self.view_items if key[0] == 1]:
+            del self.view_items[key]
+        #move the verses over to make room for the lines. Two pixels for each unique verse ID.
+        gutter = len(notestags)*2
+        if gutter != self.text_dx:
+            self.canvas.move("chaptertext", gutter - self.text_dx, 0)
+            self.text_dx = gutter
+            self.view_scrollregion = (0, 0, self.view_width + gutter, self.current_layout.height)
+            self.canvas.configure(scrollregion=self.view_scrollregion)
+        self.view_layers[1] = chapter_layout.OpIndex(chapter_layout.layout_annotations(self.current_layout, notestags, x_offset + gutter), self.metrics)
+        self.current_notestags = notestags
+        #so render_viewport draws the new ones
+        self.view_band = None
+
     def display_chapter(self, item = None, data = None, reset_scrollbar = False):
         #items are like, "/Genesis/Ch 1"
         #data is a list of verse text:
@@ -1106,305 +1471,71 @@ class ScripturePanel:
             item = self.current_item
             data = self.current_data
         #print(item)
-        self.canvas.delete("all")
-        y_offset = 40  # Initial Y offset
         x_offset = 5 #initial x offset...
-        rung_number = 0
-        Label_offset = -25
-        textlineheight = Font.metrics(self.canvasFont)["linespace"]
-        boldlineheight = Font.metrics(self.boldFont)["linespace"]
+        boldlineheight = self.metrics.linespace("bold")
         global textlinegap, fbdCircleDiam, textelbowroom
         selected_y_offset = None
         item_hierarchy = item.split('/')
         #print(item_hierarchy)
         if len(item_hierarchy) > 2:
-            #print(item)
-            #print(item_hierarchy)
-            #print(self.selected_start_b)
-            #print(self.selected_end_b)
             thisbook = item.split('/')[-2]
             thischapter = item.split(' ')[-1]
 
             #we're going to draw vertical lines left of the verses to indicate which verses have notes and tags.
             #get the tagged and noted verse rows
             notestags = bibledb_lib.find_note_tag_verses(open_db_file, thisbook, thischapter)
-            #move the verses over to make room for the lines. Two pixels for each unique verse ID.
-            id_lines = len(notestags)*2
-            if id_lines > 0:
-                x_offset += id_lines
-
-            #show the chapter header 
-            self.canvas.create_text(x_offset, y_offset, text=str(thisbook)+" Chapter "+str(thischapter), anchor=tk.W, font = self.boldFont)
-            y_offset += boldlineheight + textlinegap*2
-            
             verse_area_width = self.bta.paned_window.sashpos(1) - self.bta.paned_window.sashpos(0) - self.scrollbar_width - textelbowroom*2
-            c = int(item_hierarchy[-1].replace("Ch ",""))
-            b = int(bibledb_lib.getBookIndex(item_hierarchy[-2]))
-            sv = int(self.selected_start_v)
-            ev = int(self.selected_end_v)
-            sc = int(self.selected_start_c)
-            ec = int(self.selected_end_c)
-            sb = int(bibledb_lib.getBookIndex(self.selected_start_b))
-            eb = int(bibledb_lib.getBookIndex(self.selected_end_b))
-
-            #print("book:",sb, b, eb,"\nchapter:",sc,c,ec,"\nverse:",sv, v, ev)
-            verse_heights = []
-            footnotes = []  # Collect footnotes for display at bottom
-            cross_refs = []  # Collect cross-references for display at bottom
-
-            # data is now a chapter dict with a "verses" array
-            verses = data.get("verses", []) if isinstance(data, dict) else data
-
-            for verse_obj in verses:
-
-                v = verse_obj.get("verse")
-                verse_text = verse_obj.get("text", "")
-                has_footnote = bool(verse_obj.get("footnote")) if self.bta.footnote_tooltip_delay >= 0 else False
-
-                textColor = "black"
-                #if the current verse is in the user-selected range, highlight it.
-                if ((sb == b and sc == c and sv <= v) or\
-                    (sb == b and sc < c) or\
-                    (sb < b)) and\
-                   ((eb == b and ec == c and ev >= v) or\
-                    (eb == b and ec > c) or\
-                    (eb > b)):
-                    textColor = "maroon"
-                    #record the y-offset of the first selected verse so we can navigate to it later.
-                    if selected_y_offset is None:
-                        selected_y_offset = y_offset - textlinegap - boldlineheight*2
-                        if selected_y_offset < 0:
-                            selected_y_offset = 0
 
-                
-                vtop = y_offset - textlinegap
-                
-                verseRef = str(item).replace("/Ch "," ").replace("/","")+":"+str(v)
-                footnote_text = verse_obj.get("footnote", "")
-                #print(verseRef)
-                #Print the verse number in italics (underline if it has a footnote)
-                verse_font = self.italicunderlineFont if has_footnote else self.italicFont
-                text_object = self.canvas.create_text(x_offset, y_offset, text=str(v), anchor=tk.NW, fill = textColor, font = verse_font)
-                self.canvas.tag_bind(text_object, '<Button-1>', lambda event, item_id=text_object, vref=verseRef, verse=verse_text, vnum = v: self.on_text_click(event, verse_text, vref, vnum))
-                
-                # Add hover tooltip for footnotes
-                if has_footnote:
-                    self.canvas.tag_bind(text_object, '<Enter>', lambda event, fn=footnote_text: self.show_footnote_tooltip(event, fn))
-                    self.canvas.tag_bind(text_object, '<Leave>', lambda event: self.hide_footnote_tooltip())
-                
-                v_offset = verse_font.measure(str(v)) + textelbowroom + x_offset #offset for the verse, to the right of the verse number.
-                # print the verse; wrap to the size of the middle column
-                for line in wrapText(verse_text, verse_area_width - v_offset, self.canvasFont):
-                    text_object = self.canvas.create_text(v_offset, y_offset, text=line, anchor=tk.NW, fill = textColor, font = self.canvasFont)
-                    self.canvas.tag_bind(text_object, '<Button-1>', lambda event, item_id=text_object, vref=verseRef, verse=verse_text, vnum = v: self.on_text_click(event, verse_text, vref, vnum))
-                    
-                    # Add hover tooltip for footnotes on verse text too
-                    if has_footnote:
-                        self.canvas.tag_bind(text_object, '<Enter>', lambda event, fn=footnote_text: self.show_footnote_tooltip(event, fn))
-                        self.canvas.tag_bind(text_object, '<Leave>', lambda event: self.hide_footnote_tooltip())
-                    
-                    y_offset += textlineheight + textlinegap
-
-                vbot = y_offset - textlinegap
+            layout, text_index = self.get_chapter_layout(item, data, verse_area_width)
+
+            if layout is not self.current_layout:
+                #a different chapter, a new width or new display settings: start over. Nothing's drawn yet; render_viewport draws the part that's in view
+                self.clear_chapter()
+                self.text_dx = 0
+                self.view_width = verse_area_width
+                verses = data.get("verses", []) if isinstance(data, dict) else data
+                self.verse_texts = {verse_obj.get("verse"): verse_obj.get("text", "") for verse_obj in verses}
+                self.chapter_ref = str(item).replace("/Ch "," ").replace("/","")
+                #verses are compared as integer ordinals from the verse index (see bibledb_lib.VerseIndex)
+                self.verse_ordinals = [verse['ordinal'] for verse in layout.verse_heights]
+                #and found under the mouse by their tops (see verse_at)
+                self.verse_tops = [verse['top'] for verse in layout.verse_heights]
+                self.current_layout = layout
+                self.view_layers = [text_index, None]
+                self.view_scrollregion = (0, 0, verse_area_width, layout.height)
+
+            #lines next to every verse that has a note or a tag associated with it; only redrawn when they've changed.
+            #Tag and note edits end up here, and only replace the bars (and move the text if there are more or fewer of them).
+            if notestags != self.current_notestags:
+                self.update_annotations(notestags, x_offset)
+
+            first_selected_top = self.update_selection()
+            if first_selected_top is not None:
+                #record the y-offset of the first selected verse so we can navigate to it later.
+                selected_y_offset = max(0, first_selected_top - boldlineheight*2)
+        else:
+            self.clear_chapter()
 
-                #keep track of the top and bottom coord for each verse, to mark which ones have notes and tags.
-                verse_heights.append({'v':v,'top':vtop,'bot':vbot})
-                
-                # Collect footnotes and cross-references if present
-                if verse_obj.get("footnote") and self.bta.show_footnotes:
-                    footnotes.append((v, verse_obj["footnote"]))
-                if verse_obj.get("cross_references") and self.bta.show_crossrefs:
-                    # Extract refers_to array from cross_references object
-                    refs = verse_obj["cross_references"].get("refers_to", [])
-                    if refs:
-                        cross_refs.append((v, refs))
-
-            #draw lines next to every verse that has a note or a tag associated with it.
-            for row in notestags:
-                sb = row['start_book']
-                sc = row['start_chapter']
-                eb = row['end_book']
-                ec = row['end_chapter']
-                sv = row['start_verse']
-                ev = row['end_verse']
-                t = row['type']
-                #purple if there's both a note and a tag.
-                color = "maroon"
-                lx = x_offset - id_lines
-                if t == "tag": #blue if just a tag
-                    color = "blue"
-                elif t == "note": #orange if just a note
-                    color = "orange2"
-
-                #capture the top and bottom verse in a group which spans multiple chapters
-                lowest_v = 999999
-                highest_v = -5
-                low_vh = None
-                high_vh = None
-                for verse in verse_heights:
-                    v = verse['v']
-                    if ((sb == b and sc == c and sv <= v) or\
-                        (sb == b and sc < c) or\
-                        (sb < b)) and\
-                       ((eb == b and ec == c and ev >= v) or\
-                        (eb == b and ec > c) or\
-                        (eb > b)):
-                        if v < lowest_v:
-                            lowest_v = v
-                            low_vh = verse
-                        if v > highest_v:
-                            highest_v = v
-                            high_vh = verse
-                        self.canvas.create_line(lx, verse['top'], lx, verse['bot'], fill=color, width=1)
-                if ec > c or eb > b or sc < c or sb < b:
-                    #if this group spans multiple chapters, give it a little hat and a little shoe to indicate it.
-                    self.canvas.create_line(lx, high_vh['bot'], lx+2, high_vh['bot'], fill=color, width=5)
-                    self.canvas.create_line(lx, low_vh['top'], lx+2, low_vh['top'], fill=color, width=5)
-                id_lines -= 2
-            
-            # Display footnotes and cross-references at the bottom
-            if (footnotes and self.bta.show_footnotes) or (cross_refs and self.bta.show_crossrefs):
-                y_offset += textlinegap * 3
-                
-                # Draw horizontal separator line
-                self.canvas.create_line(x_offset, y_offset, verse_area_width, y_offset, fill="gray", width=1)
-                y_offset += textlinegap * 2
-                
-                # Display footnotes
-                if footnotes and self.bta.show_footnotes:
-                    for verse_num, footnote in footnotes:
-                        # Display verse number in regular font, then footnote in italic
-                        verse_label = f"[{verse_num}]"
-                        
-                        # Create the verse number label (not italic)
-                        self.canvas.create_text(x_offset, y_offset, text=verse_label, anchor=tk.NW, 
-                                               fill="darkblue", font=self.canvasFont)
-                        
-                        # Calculate offset for footnote text after verse number
-                        label_width = self.canvasFont.measure(verse_label) + textelbowroom
-                        
-                        # Wrap and display footnote text in italic
-                        first_line = True
-                        for line in wrapText(footnote, verse_area_width - x_offset - label_width, self.canvasFont):
-                            if first_line:
-                                # First line goes next to verse number
-                                self.canvas.create_text(x_offset + label_width, y_offset, text=line, anchor=tk.NW, 
-                                                       fill="darkblue", font=self.italicFont)
-                                first_line = False
-                            else:
-                                # Subsequent lines are indented to align with first line
-                                self.canvas.create_text(x_offset + label_width, y_offset, text=line, anchor=tk.NW, 
-                                                       fill="darkblue", font=self.italicFont)
-                            y_offset += textlineheight + textlinegap
-                        y_offset += textlinegap  # Extra space between footnotes
-                
-                # Display cross-references
-                if cross_refs and self.bta.show_crossrefs:
-                    if footnotes:  # Add extra space if there were footnotes
-                        y_offset += textlinegap * 2
-                    
-                    for verse_num, refs in cross_refs:
-                        # Display verse number in regular font
-                        verse_label = f"[{verse_num}]"
-                        self.canvas.create_text(x_offset, y_offset, text=verse_label, anchor=tk.NW,
-                                               fill="darkgreen", font=self.canvasFont)
-                        
-                        # Calculate offset for xref text after verse number
-                        label_width = self.canvasFont.measure(verse_label) + textelbowroom
-                        
-                        # Display "See also:" prefix in italic
-                        see_also_text = "See also: "
-                        text_obj = self.canvas.create_text(x_offset + label_width, y_offset, text=see_also_text, anchor=tk.NW,
-                                                           fill="darkgreen", font=self.italicFont)
-                        current_x = x_offset + label_width + self.italicFont.measure(see_also_text)
-                        
-                        # Group consecutive references by book and chapter
-                        grouped_refs = []
-                        i = 0
-                        while i < len(refs):
-                            ref = refs[i]
-                            book = ref['book']
-                            chapter = ref['chapter']
-                            verses = [ref['verse']]
-                            
-                            # Look ahead for consecutive verses in same book/chapter
-                            j = i + 1
-                            while j < len(refs):
-                                next_ref = refs[j]
-                                if next_ref['book'] == book and next_ref['chapter'] == chapter:
-                                    # Check if verse is consecutive
-                                    try:
-                                        if int(next_ref['verse']) == int(verses[-1]) + 1:
-                                            verses.append(next_ref['verse'])
-                                            j += 1
-                                        else:
-                                            break
-                                    except:
-                                        break
-                                else:
-                                    break
-                            
-                            # Format the grouped reference
-                            if len(verses) == 1:
-                                grouped_refs.append({
-                                    'text': f"{book} {chapter}:{verses[0]}",
-                                    'ref': f"{book} {chapter}:{verses[0]}"
-                                })
-                            else:
-                                grouped_refs.append({
-                                    'text': f"{book} {chapter}:{verses[0]}-{verses[-1]}",
-                                    'ref': f"{book} {chapter}:{verses[0]}-{verses[-1]}"
-                                })
-                            
-                            i = j
-                        
-                        # Display each reference as a clickable link
-                        for idx, ref_data in enumerate(grouped_refs):
-                            # Add comma separator if not first
-                            if idx > 0:
-                                comma_obj = self.canvas.create_text(current_x, y_offset, text=", ", anchor=tk.NW,
-                                                                   fill="darkgreen", font=self.italicFont)
-                                current_x += self.italicFont.measure(", ")
-                            
-                            # Check if we need to wrap to next line
-                            ref_width = self.italicFont.measure(ref_data['text'])
-                            if current_x + ref_width > verse_area_width:
-                                y_offset += textlineheight + textlinegap
-                                current_x = x_offset + label_width
-                            
-                            # Create clickable reference text
-                            ref_obj = self.canvas.create_text(current_x, y_offset, text=ref_data['text'], anchor=tk.NW,
-                                                             fill="blue", font=self.italicFont, tags="xref_link")
-                            
-                            # Make it clickable
-                            self.canvas.tag_bind(ref_obj, '<Button-1>', 
-                                               lambda event, ref=ref_data['ref']: self.on_xref_click(ref))
-                            self.canvas.tag_bind(ref_obj, '<Enter>', 
-                                               lambda event, obj=ref_obj: self.canvas.itemconfig(obj, font=self.italicunderlineFont))
-                            self.canvas.tag_bind(ref_obj, '<Leave>', 
-                                               lambda event, obj=ref_obj: self.canvas.itemconfig(obj, font=self.italicFont))
-                            
-                            current_x += ref_width
-                        
-                        y_offset += textlineheight + textlinegap * 2  # Extra space between cross-references
-                        
         #print(item_hierarchy)
         #print(data)
 
         # Configure the scroll region to make the canvas scrollable
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        if self.view_scrollregion is not None:
+            self.canvas.configure(scrollregion=self.view_scrollregion)
+        else:
+            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
         #if we're navigating to a new chapter, start at the top.
         if(reset_scrollbar):
             #if there is a verse selected in this chapter, go ahead and scroll to it.
             if selected_y_offset is not None:
-                canvas_height = self.canvas.winfo_height()
-                scroll_target = selected_y_offset/self.canvas.bbox("all")[3] #scroll percentage
+                scroll_target = selected_y_offset/self.view_scrollregion[3] #scroll percentage
                 self.canvas.yview_moveto(scroll_target)
             else:
                 #tbh I'm not sure when this part of the if-statement will ever be called anymore.
                 self.canvas.yview_moveto(0)
             self.canvas.xview_moveto(0)
+        self.render_viewport()
         #canvas_width = self.canvas.winfo_reqwidth()
         #canvas_height = self.canvas.winfo_reqheight()
         #print("width, height", canvas_width, canvas_height)
@@ -1498,6 +1629,8 @@ class TaggerPanel:
         self.canvasFont = Font(size = 10)
         self.italicFont = Font(size = 10, slant = 'italic')
         self.boldFont = Font(size = 10, weight = 'bold')
+        #note text is wrapped with the same word-width cache the scripture panel uses (see chapter_layout.FontMetrics)
+        self.metrics = chapter_layout.FontMetrics({"text": self.canvasFont})
         self.current_data = None
         self.current_item = None
 
@@ -1714,7 +1847,7 @@ class TaggerPanel:
             if self.note_area_text is not None:
                 text_to_render = []
                 for paragraph in self.note_area_text.split('\n'):
-                    for line in wrapText(paragraph, panelWidth - x_offset*2 - textlinegap*2, self.canvasFont):
+                    for line in chapter_layout.wrap_text(paragraph, panelWidth - x_offset*2 - textlinegap*2, lambda word: self.metrics.measure("text", word)):
                         text_to_render.append(line)
                         #self.canvas.tag_bind(text_object, '<Button-1>', self.edit_note_text)
                         noteTextHeight += textlineheight + textlinegap
@@ -1752,18 +1885,14 @@ class TaggerPanel:
             synonymlist = []
             #print("checklist",checklist)
             
-            #get all synonymous tags
+            #get all synonymous tags (get_synonyms gives the whole synonym group, not just direct synonyms)
             for tag in checklist:
-                synonyms = bibledb_lib.get_db_stuff(open_db_file,"tag","tag",tag['tag'])
-                while len(synonyms) > 0:
-                #for synonym in synonyms:
-                    synonym = synonyms.pop()
+                for synonym in bibledb_lib.get_synonyms(open_db_file, tag['tag']):
                     if synonym not in self.tags_list and synonym['tag'] != self.current_data["ref"]:
                         #synonyms won't have a delete button on the display, so we group them in the list in order to make it clear what they are.
                         index = self.tags_list.index(tag)
                         self.tags_list.insert(index+1,synonym)
                         synonymlist.append(synonym)
-                        synonyms += bibledb_lib.get_db_stuff(open_db_file,"tag","tag",synonym['tag'])
 
             #show the tags list
             for tag in self.tags_list:
@@ -1862,11 +1991,12 @@ class TaggerPanel:
             # VERSE LIST ##---- DONE
             #the verse list only appears when looking at tags.
             if self.current_item == "tagClick":
-                verses = bibledb_lib.get_db_stuff(open_db_file, "verse", "tag", self.current_data["ref"])
-
                 #in the case of a tag, all associated tags are synonyms.
+                ranges_by_tag = bibledb_lib.get_tag_verse_ranges(open_db_file, [self.current_data["ref"]] + [syntag['tag'] for syntag in self.tags_list])
+                verses = list(ranges_by_tag.get(self.current_data["ref"].lower(), []))
+
                 for syntag in self.tags_list:
-                    more_verses = bibledb_lib.get_db_stuff(open_db_file, "verse", "tag", syntag['tag'])
+                    more_verses = ranges_by_tag.get(syntag['tag'].lower(), [])
                     for another_verse in more_verses:
                         if another_verse not in verses:
                             verses.append(another_verse)
@@ -2082,6 +2212,8 @@ def migrate_db(db_path, interactive=True):
         # Call the migrate_database function from the migration script
         # Only create backup for the first migration in the chain
         if hasattr(migration_module, 'migrate_database'):
+            # the migration rewrites tables out from under any pooled connection
+            bibledb_lib.close_sessions(db_path)
             create_backup = (index == 0)  # Only backup on first migration
             success = migration_module.migrate_database(db_path, create_backup=create_backup)
             if not success:
@@ -2106,7 +2238,8 @@ if __name__ == "__main__":
 
     # Add optional arguments for the main GUI mode
     parser.add_argument("--db", dest="db_path", help="Path to database file (overrides config)")
-    parser.add_argument("--json", dest="json_path", help="Path to Bible JSON file (overrides config)")
+    parser.add_argument("--json", dest="json_path", help="Path to Bible JSON or compiled .btb file (overrides config)")
+    parser.add_argument("--rebuild-cache", dest="rebuild_cache", action="store_true", help="Re-parse the Bible JSON and rebuild its cache")
 
     subparsers = parser.add_subparsers(dest="command", required=False)
 
@@ -2125,6 +2258,12 @@ if __name__ == "__main__":
     scrape_parser = subparsers.add_parser("scrape", help="Scrape bible translation for use with Bible Tagger")
     scrape_parser.add_argument("version", help="Version to scrape")
 
+    # compile
+    compile_parser = subparsers.add_parser("compile", help="Compile a Bible JSON into a .btb file for faster startup")
+    compile_parser.add_argument("json_file", help="Path to the Bible JSON to compile")
+    compile_parser.add_argument("output", nargs='?', help="Path of the compiled Bible (defaults to the JSON path with a .btb extension)")
+    compile_parser.add_argument("--no-compress", action="store_true", help="Store chapters uncompressed")
+
     args = parser.parse_args()
 
     template_filename = f'template.{config_filename}'
@@ -2325,4 +2464,26 @@ if __name__ == "__main__":
         print("and convert them to JSON format for use with Bible Tagger.")
         print("\nFor now, you can use the SWORD-to-JSON converter in the project folder.")
         sys.exit(1)
+    elif args.command == "compile":
+        try:
+            start = time.perf_counter()
+            output_path = bible_binary.compile_bible(args.json_file, args.output, compress=not args.no_compress)
+            compile_time = time.perf_counter() - start
+        except Exception as e:
+            print(f"Error compiling Bible: {e}")
+            sys.exit(1)
+        print(f"Compiled {args.json_file} ({os.path.getsize(args.json_file) / 1e6:.1f} MB) "
+              f"to {output_path} ({os.path.getsize(output_path) / 1e6:.1f} MB) in {compile_time:.2f} s")
+
+        # compare startup cost: parsing the whole JSON vs. mapping the compiled file
+        start = time.perf_counter()
+        with open(args.json_file, 'r', encoding='utf-8') as file:
+            bibledb_lib.getBibleData(file.read())
+        json_time = time.perf_counter() - start
+        start = time.perf_counter()
+        bible_binary.load_bible(output_path)
+        binary_time = time.perf_counter() - start
+        print(f"Load time: JSON {json_time * 1000:.0f} ms, compiled {binary_time * 1000:.0f} ms")
+        print(f"Use it with: python bible_tagger.py --json {output_path}")
+        sys.exit(0)
 
@@ -1,8 +1,17 @@
+import bisect
+import functools
+import heapq
 import json
+import marshal
+import os
+import re
 import sqlite3
+import threading
+import time
+from collections.abc import Sequence
 
 # update this when breaking schema changes are made, prevents attempting to merge incompatible databases
-CURRENT_DATABASE_VERSION = 2
+CURRENT_DATABASE_VERSION = 5
 
 def get_database_version(database_file):
     """Get the user_version (schema version) of a database file.
@@ -34,7 +43,12 @@ def get_database_version(database_file):
 # use add_verse_tag, add_verse_note, and add_tag_note to add data to the DB
 
 
-#ordered list of names, to be used like: book_proper_names[0] #returns "Genesis"
+#the BibleIndex of the Bible loaded in the UI. Set by parseBibleData.
+#functions that take a bible_index argument use this one when it's None.
+active_bible_index = None
+
+#the active Bible's book names, to be used like: book_proper_names[0] #returns "Genesis"
+#parseBibleData replaces the list along with active_bible_index.
 book_proper_names = []
 
 ######################
@@ -42,17 +56,19 @@ book_proper_names = []
 ######################
 
 # Function to get fully qualified book names from partial names
-def qualifyBook(book_name):
-    global book_proper_names
-
-    if book_name == '':
-        return None
-    
-    for name in book_proper_names:
-        if book_name.lower() in name.lower():
-            return name
-        
-    return None
+def qualifyBook(book_name, bible_index=None):
+    # returns the proper name of the book book_name refers to, or None
+    bible_index = _bible_index(bible_index)
+    index = bible_index.find_book(book_name)
+    return bible_index.book_names[index] if index != -1 else None
+
+def _bible_index(bible_index=None):
+    # the BibleIndex to use for a bible_index argument: the one passed in, else the active one
+    if bible_index is not None:
+        return bible_index
+    if active_bible_index is not None:
+        return active_bible_index
+    return _empty_bible_index
 
 def copy_db(source_path, dest_path):
     source = sqlite3.connect(source_path)
@@ -61,256 +77,209 @@ def copy_db(source_path, dest_path):
     source.close()
     dest.close()
 
-def merge_dbs(current_db_path, other_db_path):
+# put between notes that get joined into one because they were on the same tag or verse range
+MERGED_NOTE_SEPARATOR = "\n\n---MERGED---\n\n"
+
+def merge_dbs(current_db_path, other_db_path, progress_callback=None):
     """
     Merge data from other_db into current_db.
-    
+
+    other_db is ATTACHed to the current database's connection and each table is reconciled
+    with a few INSERT ... SELECT statements and temp id-mapping tables, all in one transaction,
+    so the work doesn't grow with the number of rows going through Python.
+
+    Tags match by name and verse groups match by exact verse range. Where both databases
+    have a note for the same tag or range, the notes are joined with a ---MERGED--- line.
+
     Args:
         current_db_path: Path to the current/target database
         other_db_path: Path to the database to merge from
+        progress_callback: Optional function(fraction, message), called as each step starts
+            and with fraction 1.0 when the merge is done
 
     """
+    def progress(fraction, message):
+        print(message)
+        if progress_callback:
+            progress_callback(fraction, message)
+
+    merged_separator = MERGED_NOTE_SEPARATOR
+
+    # autocommit mode, so the transaction below is exactly BEGIN ... COMMIT
+    current_conn = sqlite3.connect(current_db_path, isolation_level=None)
+    cursor = current_conn.cursor()
     try:
-        # Connect to both databases
-        current_conn = sqlite3.connect(current_db_path)
-        current_conn.row_factory = sqlite3.Row
-        current_cursor = current_conn.cursor()
-        
-        other_conn = sqlite3.connect(other_db_path)
-        other_conn.row_factory = sqlite3.Row
-        other_cursor = other_conn.cursor()
-        
+        cursor.execute("ATTACH DATABASE ? AS other", (other_db_path,))
+
         # Check database versions
-        current_cursor.execute("PRAGMA user_version")
-        current_version = current_cursor.fetchone()[0]
-        
-        other_cursor.execute("PRAGMA user_version")
-        other_version = other_cursor.fetchone()[0]
-        
+        cursor.execute("PRAGMA main.user_version")
+        current_version = cursor.fetchone()[0]
+
+        cursor.execute("PRAGMA other.user_version")
+        other_version = cursor.fetchone()[0]
+
         if current_version != other_version:
             print(f"ERROR: Cannot merge databases with different schema versions. (This: {current_version}, Other: {other_version})")
-            current_conn.close()
-            other_conn.close()
-            return
+            return False
 
         if current_version != CURRENT_DATABASE_VERSION:
             print(f"ERROR: Both databases are version {current_version}, expected version {CURRENT_DATABASE_VERSION}")
-            current_conn.close()
-            other_conn.close()
-            return
+            return False
 
         print("Database versions match. Starting merge...")
+        cursor.execute("BEGIN IMMEDIATE")
+
+        # Mappings for ID translations: other db id -> current db id
+        cursor.execute("CREATE TEMP TABLE merge_tag_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+        cursor.execute("CREATE TEMP TABLE merge_group_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
 
-        # Create mappings for ID translations
-        tag_id_map = {}  # old_tag_id -> new_tag_id
-        verse_group_id_map = {}  # old_verse_group_id -> new_verse_group_id
-        
         # 1. Merge tags (with notes)
-        print("Merging tags...")
-        other_cursor.execute("SELECT tag_id, tag, note FROM tag")
-        other_tags = other_cursor.fetchall()
-        
-        for tag in other_tags:
-            old_tag_id = tag['tag_id']
-            tag_name = tag['tag']
-            other_note = tag['note']
-            
-            # Check if tag already exists in current db
-            current_cursor.execute("SELECT tag_id, note FROM tag WHERE tag = ?", (tag_name,))
-            existing = current_cursor.fetchone()
-            
-            if existing:
-                # Tag exists, use existing ID
-                tag_id_map[old_tag_id] = existing['tag_id']
-                
-                # Merge notes if both have notes
-                if other_note and existing['note']:
-                    merged_note = existing['note'] + "\n\n---MERGED---\n\n" + other_note
-                    current_cursor.execute("UPDATE tag SET note = ? WHERE tag_id = ?", 
-                                         (merged_note, existing['tag_id']))
-                elif other_note and not existing['note']:
-                    # Other has note, current doesn't - use other's note
-                    current_cursor.execute("UPDATE tag SET note = ? WHERE tag_id = ?", 
-                                         (other_note, existing['tag_id']))
-            else:
-                # Tag doesn't exist, insert it with note
-                current_cursor.execute("INSERT INTO tag (tag, note) VALUES (?, ?)", 
-                                     (tag_name, other_note))
-                new_tag_id = current_cursor.lastrowid
-                tag_id_map[old_tag_id] = new_tag_id
-        
-        current_conn.commit()
-        print(f"Merged {len(other_tags)} tags")
-        
+        progress(0.0, "Merging tags...")
+
+        # Tags in both databases: add the other note to ours, or use it if we have none
+        cursor.execute("""
+            UPDATE main.tag
+            SET note = CASE WHEN note IS NOT NULL AND note != ''
+                            THEN note || ? || (SELECT o.note FROM other.tag o WHERE o.tag = main.tag.tag)
+                            ELSE (SELECT o.note FROM other.tag o WHERE o.tag = main.tag.tag) END
+            WHERE tag IN (SELECT tag FROM other.tag WHERE note IS NOT NULL AND note != '')
+        """, (merged_separator,))
+
+        # Tags only in the other database come over with their notes
+        cursor.execute("""
+            INSERT INTO main.tag (tag, note)
+            SELECT o.tag, o.note FROM other.tag o
+            WHERE o.tag NOT IN (SELECT tag FROM main.tag)
+            ORDER BY o.tag_id
+        """)
+        cursor.execute("""
+            INSERT INTO merge_tag_map (old_id, new_id)
+            SELECT o.tag_id, t.tag_id FROM other.tag o JOIN main.tag t ON t.tag = o.tag
+        """)
+        cursor.execute("SELECT COUNT(*) FROM merge_tag_map")
+        tag_count = cursor.fetchone()[0]
+        print(f"Merged {tag_count} tags")
+
         # 2. Merge verse_groups (with notes)
-        print("Merging verse groups...")
-        other_cursor.execute("SELECT verse_group_id, note FROM verse_group")
-        other_verse_groups = other_cursor.fetchall()
+        # A verse group is uniquely identified by its range of verses
+        progress(0.25, "Merging verse groups...")
+        exact_match_query = """
+            INSERT INTO merge_group_map (old_id, new_id)
+            SELECT o.verse_group_id,
+                   (SELECT MIN(vg.verse_group_id) FROM main.verse_group vg
+                    WHERE vg.start_ordinal = o.start_ordinal AND vg.end_ordinal = o.end_ordinal)
+            FROM other.verse_group o
+            WHERE o.verse_group_id NOT IN (SELECT old_id FROM merge_group_map)
+              AND EXISTS (SELECT 1 FROM main.verse_group vg
+                          WHERE vg.start_ordinal = o.start_ordinal AND vg.end_ordinal = o.end_ordinal)
+        """
+        # Groups whose range already exists here map onto the existing group
+        cursor.execute(exact_match_query)
+
+        # Every other range gets one new group, carrying the note of the first group with
+        # that range, then gets mapped the same way. (AUTOINCREMENT puts the new ids after last_existing_id.)
+        cursor.execute("SELECT COALESCE(MAX(verse_group_id), 0) FROM main.verse_group")
+        last_existing_id = cursor.fetchone()[0]
+        cursor.execute("""
+            INSERT INTO main.verse_group (start_ordinal, end_ordinal, note)
+            SELECT start_ordinal, end_ordinal, note FROM (
+                SELECT o.start_ordinal, o.end_ordinal, o.note, MIN(o.verse_group_id) AS first_id
+                FROM other.verse_group o
+                WHERE o.verse_group_id NOT IN (SELECT old_id FROM merge_group_map)
+                GROUP BY o.start_ordinal, o.end_ordinal
+            )
+            ORDER BY first_id
+        """)
+        cursor.execute(exact_match_query)
+        cursor.execute("SELECT COUNT(*) FROM merge_group_map")
+        group_count = cursor.fetchone()[0]
 
-        for vg in other_verse_groups:
-            old_vg_id = vg['verse_group_id']
-            other_note = vg['note']
-            
-            # Get all verses in this group from other db
-            other_cursor.execute("""
-                SELECT verse_id FROM verse_group_verse
-                WHERE verse_group_id = ?
-                ORDER BY verse_id
-            """, (old_vg_id,))
-            verses_in_group = [row['verse_id'] for row in other_cursor.fetchall()]
-            
-            # Check if this exact verse group already exists in current db
-            # A verse group is uniquely identified by its set of verses
-            if len(verses_in_group) == 0:
-                # Empty verse group, skip it
-                continue
-                
-            # Check if this combination of verses already exists as a group
-            placeholders = ','.join('?' * len(verses_in_group))
-            current_cursor.execute(f"""
-                SELECT verse_group_id, COUNT(*) as count
-                FROM verse_group_verse
-                WHERE verse_id IN ({placeholders})
-                GROUP BY verse_group_id
-                HAVING count = ?
-            """, verses_in_group + [len(verses_in_group)])
-            
-            matching_groups = current_cursor.fetchall()
-            
-            # Verify it's an exact match (not a superset)
-            exact_match = None
-            for group in matching_groups:
-                current_cursor.execute("""
-                    SELECT verse_id FROM verse_group_verse
-                    WHERE verse_group_id = ?
-                    ORDER BY verse_id
-                """, (group['verse_group_id'],))
-                current_verses = [row['verse_id'] for row in current_cursor.fetchall()]
-                if current_verses == verses_in_group:
-                    exact_match = group['verse_group_id']
-                    break
-            
-            if exact_match:
-                # Group exists, use existing ID
-                verse_group_id_map[old_vg_id] = exact_match
-                
-                # Merge notes if both have notes
-                current_cursor.execute("SELECT note FROM verse_group WHERE verse_group_id = ?", 
-                                     (exact_match,))
-                current_note = current_cursor.fetchone()['note']
-                
-                if other_note and current_note:
-                    merged_note = current_note + "\n\n---MERGED---\n\n" + other_note
-                    current_cursor.execute("UPDATE verse_group SET note = ? WHERE verse_group_id = ?", 
-                                         (merged_note, exact_match))
-                elif other_note and not current_note:
-                    # Other has note, current doesn't - use other's note
-                    current_cursor.execute("UPDATE verse_group SET note = ? WHERE verse_group_id = ?", 
-                                         (other_note, exact_match))
-            else:
-                # Group doesn't exist, create new one
-                # Insert verse_group with note (AUTOINCREMENT handles ID)
-                current_cursor.execute("""
-                    INSERT INTO verse_group (note) VALUES (?)
-                """, (other_note,))
-                new_vg_id = current_cursor.lastrowid
-                
-                # Insert all verses in verse_group_verse junction table
-                for verse_id in verses_in_group:
-                    # Get book, chapter, verse for the junction table
-                    parts = verse_id.split('.')
-                    book = int(parts[0])
-                    chapter = int(parts[1])
-                    verse_num = int(parts[2])
-                    current_cursor.execute("""
-                        INSERT INTO verse_group_verse (verse_group_id, verse_id, book, chapter, verse)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (new_vg_id, verse_id, book, chapter, verse_num))
-                
-                verse_group_id_map[old_vg_id] = new_vg_id
-        
-        current_conn.commit()
-        print(f"Merged {len(other_verse_groups)} verse groups")
-        
-        # 4. Merge verse_group_tag relationships
-        print("Merging verse-tag relationships...")
-        other_cursor.execute("SELECT verse_group_id, tag_id FROM verse_group_tag")
-        vg_tags = other_cursor.fetchall()
-        
-        for vg_tag in vg_tags:
-            old_vg_id = vg_tag['verse_group_id']
-            old_tag_id = vg_tag['tag_id']
-            
-            new_vg_id = verse_group_id_map.get(old_vg_id)
-            new_tag_id = tag_id_map.get(old_tag_id)
-            
-            if new_vg_id is not None and new_tag_id is not None:
-                # Check if relationship already exists
-                current_cursor.execute("""
-                    SELECT 1 FROM verse_group_tag
-                    WHERE verse_group_id = ? AND tag_id = ?
-                """, (new_vg_id, new_tag_id))
-                
-                if not current_cursor.fetchone():
-                    current_cursor.execute("""
-                        INSERT INTO verse_group_tag (verse_group_id, tag_id)
-                        VALUES (?, ?)
-                    """, (new_vg_id, new_tag_id))
-        
-        current_conn.commit()
-        print(f"Merged {len(vg_tags)} verse-tag relationships")
-        
-        # 5. Merge tag_tag relationships
-        print("Merging tag-tag relationships...")
-        other_cursor.execute("SELECT tag_1_id, tag_2_id FROM tag_tag")
-        t_tags = other_cursor.fetchall()
-        
-        for t_tag in t_tags:
-            old_tag1_id = t_tag['tag_1_id']
-            old_tag_2_id = t_tag['tag_2_id']
-            new_tag_1_id = tag_id_map.get(old_tag1_id)
-            new_tag_2_id = tag_id_map.get(old_tag_2_id)
-            
-            if new_tag_1_id is not None and new_tag_2_id is not None:
-                # Ensure tag_1_id < tag_2_id per CHECK constraint
-                if new_tag_1_id > new_tag_2_id:
-                    new_tag_1_id, new_tag_2_id = new_tag_2_id, new_tag_1_id
-                
-                # Check if relationship already exists
-                current_cursor.execute("""
-                    SELECT 1 FROM tag_tag
-                    WHERE tag_1_id = ? AND tag_2_id = ?
-                """, (new_tag_1_id, new_tag_2_id))
-                
-                if not current_cursor.fetchone():
-                    current_cursor.execute("""
-                        INSERT INTO tag_tag (tag_1_id, tag_2_id)
-                        VALUES (?, ?)
-                    """, (new_tag_1_id, new_tag_2_id))
-        
-        current_conn.commit()
-        print(f"Merged {len(t_tags)} tag-tag relationships")
-        
-        # Close connections
-        other_conn.close()
-        current_conn.close()
-        
-        print("\nDatabase merge completed successfully!")
+        # Notes from the other database for ranges that were already here (or repeated there)
+        # get appended, in order, to the group's note
+        progress(0.5, "Merging verse group notes...")
+        cursor.execute("""
+            SELECT m.new_id, o.note
+            FROM other.verse_group o JOIN merge_group_map m ON m.old_id = o.verse_group_id
+            WHERE (o.note IS NOT NULL AND o.note != '') OR m.new_id > ?
+            ORDER BY o.verse_group_id
+        """, (last_existing_id,))
+        appended_notes = {}
+        new_groups = set()
+        for vg_id, note in cursor.fetchall():
+            if vg_id > last_existing_id and vg_id not in new_groups:
+                # the first group with a new range already brought its note along
+                new_groups.add(vg_id)
+            elif note:
+                appended_notes.setdefault(vg_id, []).append(note)
+        if appended_notes:
+            cursor.execute("""
+                SELECT vg.verse_group_id, vg.note FROM main.verse_group vg
+                WHERE vg.note IS NOT NULL AND vg.note != ''
+                  AND vg.verse_group_id IN (SELECT new_id FROM merge_group_map)
+            """)
+            current_notes = {vg_id: note for vg_id, note in cursor.fetchall() if vg_id in appended_notes}
+            cursor.executemany("UPDATE main.verse_group SET note = ? WHERE verse_group_id = ?",
+                               ((merged_separator.join(([current_notes[vg_id]] if vg_id in current_notes else []) + notes), vg_id)
+                                for vg_id, notes in appended_notes.items()))
+        print(f"Merged {group_count} verse groups")
+
+        # 3. Merge verse_group_tag relationships
+        progress(0.75, "Merging verse-tag relationships...")
+        cursor.execute("""
+            INSERT INTO main.verse_group_tag (verse_group_id, tag_id)
+            SELECT DISTINCT gm.new_id, tm.new_id
+            FROM other.verse_group_tag o
+            JOIN merge_group_map gm ON gm.old_id = o.verse_group_id
+            JOIN merge_tag_map tm ON tm.old_id = o.tag_id
+            WHERE NOT EXISTS (SELECT 1 FROM main.verse_group_tag x
+                              WHERE x.verse_group_id = gm.new_id AND x.tag_id = tm.new_id)
+        """)
+        print(f"Merged {cursor.rowcount} new verse-tag relationships")
+
+        # 4. Merge tag_tag relationships
+        progress(0.9, "Merging tag-tag relationships...")
+        # Ensure tag_1_id < tag_2_id per CHECK constraint
+        cursor.execute("""
+            INSERT INTO main.tag_tag (tag_1_id, tag_2_id)
+            SELECT DISTINCT MIN(t1.new_id, t2.new_id), MAX(t1.new_id, t2.new_id)
+            FROM other.tag_tag o
+            JOIN merge_tag_map t1 ON t1.old_id = o.tag_1_id
+            JOIN merge_tag_map t2 ON t2.old_id = o.tag_2_id
+            WHERE t1.new_id != t2.new_id
+              AND NOT EXISTS (SELECT 1 FROM main.tag_tag x
+                              WHERE x.tag_1_id = MIN(t1.new_id, t2.new_id) AND x.tag_2_id = MAX(t1.new_id, t2.new_id))
+        """)
+        print(f"Merged {cursor.rowcount} new tag-tag relationships")
+        if cursor.rowcount > 0:
+            # new pairs can join synonym groups together, so work them all out again
+            rebuild_synonym_groups(cursor)
+
+        cursor.execute("DROP TABLE temp.merge_tag_map")
+        cursor.execute("DROP TABLE temp.merge_group_map")
+        cursor.execute("COMMIT")
+
+        progress(1.0, "\nDatabase merge completed successfully!")
         return True
-        
+
     except Exception as e:
         print(f"\nError during merge: {e}")
         import traceback
         traceback.print_exc()
+        if current_conn.in_transaction:
+            current_conn.rollback()
         return False
 
-def normalize_vref(passage):
+    finally:
+        current_conn.close()
+
+def normalize_vref(passage, bible_index=None):
     # takes a verse reference in the form (1,1,1,2,2,2) like what we get from the verses db
     # and returns its normalized string name (Genesis 1:1-Exodus 2:2)
     vID, bA, cA, vA, bB, cB, vB = (str(n) for n in passage.values())
     
-    pA = book_proper_names[int(bA)]
-    pB = book_proper_names[int(bB)]
+    book_names = _bible_index(bible_index).book_names
+    pA = book_names[int(bA)]
+    pB = book_names[int(bB)]
     if bA != bB: #different book
         if bA < bB:
             return(pA+" "+cA + ":" + vA + " - " + pB + " " +cB + ":" + vB)
@@ -329,74 +298,29 @@ def normalize_vref(passage):
     else: #same book, same chapter, same verse
         return (pA + " " + cB + ":" + vB)
 
-def getBookIndex(book):
-    book = qualifyBook(book)
-    return book_proper_names.index(book) if book in book_proper_names else -1
-
-def parseVerseReference(verse_ref):
-    # Split the verse reference into parts
-    parts = verse_ref.split()
-
-    # Ensure that the verse reference has the correct format
-    if len(parts) < 2:
+def getBookIndex(book, bible_index=None):
+    return _bible_index(bible_index).find_book(book)
+
+# Gen 1:1 | Gen 1:1-5 | Gen 1:1-2:3 | Gen 1:1-Exod 2:3 (spaces around the '-' are allowed).
+# Book names can contain spaces and digits ("1 Samuel", "Song of Solomon").
+_verse_reference_pattern = re.compile(r"""
+    ^\s*(?P<sb>\S.*?)\s+(?P<sc>\d+):(?P<sv>\d+)
+    (?:\s*-\s*
+        (?:(?P<eb>\S.*?)\s+(?P<ec>\d+):(?P<ev>\d+)
+          |(?:(?P<ec_only>\d+):)?(?P<ev_only>\d+)
+        )
+    )?\s*$
+""", re.VERBOSE)
+
+def parseVerseReference(verse_ref, bible_index=None):
+    # Parses a verse reference like "Gen 1:1-Exod 2:3" into
+    # {'sb': book index, 'sc': chapter, 'sv': verse, 'eb': ..., 'ec': ..., 'ev': ...}
+    # with the chapters and verses as strings. Book indexes are -1 for unknown books.
+    # Returns None if verse_ref isn't a verse reference.
+    parsed = _bible_index(bible_index).parse_reference(verse_ref)
+    if parsed is None:
         return None
-    
-    #extract the book name, chapter, and verses.
-
-    #if two or more verses...
-    if '-' in verse_ref:
-        refs = verse_ref.split('-')
-        refs[0]=refs[0].strip()#important to strip here in case the '-' has spaces around it.
-        refs[1]=refs[1].strip()
-        start = refs[0].split()
-        i = 0
-        sbname = ''
-        while i < len(start)-1:
-            sbname += start[i] + " "
-            i += 1
-        sb = getBookIndex(qualifyBook(sbname.strip()))
-        sc = start[i].split(':')[0]
-        sv = start[i].split(':')[1]
-        #if two or more books... (e.g. Gen 1:1-Exod 1:1)
-        if " " in refs[1]:
-            end = refs[1].split()
-            i = 0
-            ebname = ''
-            while i < len(start)-1:
-                ebname += end[i] + " "
-                i += 1
-            eb = getBookIndex(qualifyBook(ebname.strip()))
-            ec = end[i].split(':')[0]
-            ev = end[i].split(':')[1]
-        #elif two or more chapters... (e.g. Gen 1:1-2:2)
-        elif ":" in refs[1].strip():
-            eb = sb
-            ec = refs[1].strip().split(':')[0]
-            ev = refs[1].strip().split(':')[1]
-        #two or more verses... (e.g. Gen 1:1-5)
-        else:
-            eb = sb
-            ec = sc
-            ev = refs[1].strip()
-    #just one verse...(e.g. Gen 1:1)
-    else:
-        i = 0
-        book_name = ''
-        while i < len(parts)-1:
-            book_name += parts[i] + " "
-            i += 1
-        verse_nums = parts[i]
-        book_name = book_name.strip()
-        vparts = verse_nums.split(':')
-        #start and end book chapter and verse are the same.
-        sb = getBookIndex(qualifyBook(book_name))
-        eb = sb
-        sc = vparts[0].strip()
-        ec = sc
-        sv = vparts[1].strip()
-        ev = sv
-
-    return {'sb':sb, 'sc':sc, 'sv': sv, 'eb':eb, 'ec':ec, 'ev': ev}
+    return dict(zip(('sb', 'sc', 'sv', 'eb', 'ec', 'ev'), parsed))
 
 def get_row_by_column(list_of_dicts, target_value, column_name):
     for row in list_of_dicts:
@@ -409,6 +333,152 @@ def make_verse_id(book, chapter, verse):
     """Generate a verse_id in format 'book.chapter.verse' (e.g., '0.1.1' for Gen 1:1)"""
     return f"{book}.{chapter}.{verse}"
 
+# Verse ordinals pack (book, chapter, verse) into one integer that sorts in Bible order,
+# e.g. Gen 1:1 is 1001 and Exod 2:3 is 1002003. verse_groups store their range as a
+# (start_ordinal, end_ordinal) pair of these. They don't depend on the loaded translation.
+def make_verse_ordinal(book, chapter, verse):
+    return int(book) * 1000000 + int(chapter) * 1000 + int(verse)
+
+def split_verse_ordinal(ordinal):
+    """Inverse of make_verse_ordinal. Returns (book, chapter, verse)."""
+    return ordinal // 1000000, (ordinal // 1000) % 1000, ordinal % 1000
+
+def expand_verse_ordinals(start_ordinal, end_ordinal, bible_index=None):
+    """
+    Generator over every (book, chapter, verse) from start_ordinal to end_ordinal (inclusive),
+    using the chapter lengths of the loaded Bible.
+    """
+    bible_index = _bible_index(bible_index)
+    if not bible_index.book_count():
+        raise Exception("Bible data is required to expand verse ranges.")
+    yield from bible_index.verses(bible_index.from_db_ordinal(start_ordinal), bible_index.from_db_ordinal(end_ordinal))
+
+def verse_group_range(verse_group_id, start_ordinal, end_ordinal):
+    # the range dict the read functions return for a verse_group. Key order matters to normalize_vref.
+    start_book, start_chapter, start_verse = split_verse_ordinal(start_ordinal)
+    end_book, end_chapter, end_verse = split_verse_ordinal(end_ordinal)
+    return {
+        'verse_group_id': verse_group_id,
+        'start_book': start_book,
+        'start_chapter': start_chapter,
+        'start_verse': start_verse,
+        'end_book': end_book,
+        'end_chapter': end_chapter,
+        'end_verse': end_verse
+    }
+
+def iterate_chapter_range(start_ordinal, end_ordinal, bible_index=None):
+    """Generator over every (book, chapter) touched by the range start_ordinal..end_ordinal."""
+    bible_index = _bible_index(bible_index)
+    if not bible_index.book_count():
+        raise Exception("Bible data is required to expand verse ranges.")
+    yield from bible_index.chapters(bible_index.from_db_ordinal(start_ordinal), bible_index.from_db_ordinal(end_ordinal))
+
+
+class VerseIndex:
+    """
+    Dense numbering of every verse in the loaded Bible: 0 is the first verse of the first book
+    and len(index) - 1 is the last verse of the last book.
+
+    Built once from the chapter lengths with prefix sums, so (book, chapter, verse) -> ordinal is
+    a list lookup and ordinal -> (book, chapter, verse) is a bisect over the chapter starts.
+    Comparing, sorting and range checks on verses are then plain integer operations.
+
+    Dense ordinals depend on the translation's versification, so the database doesn't store them.
+    It stores the packed ordinals from make_verse_ordinal instead; use from_db_ordinal and
+    to_db_ordinal to convert.
+    """
+
+    def __init__(self, chapter_verse_counts):
+        # chapter_verse_counts[book][chapter - 1] is the number of verses in that chapter
+        self.chapter_verse_counts = [list(counts) for counts in chapter_verse_counts]
+
+        # chapter_offsets[book][chapter - 1] is the ordinal of verse 1 of that chapter
+        self.chapter_offsets = []
+        # every non-empty chapter's first ordinal, in order, and its (book, chapter)
+        self._chapter_starts = []
+        self._chapter_refs = []
+
+        total = 0
+        for book, counts in enumerate(self.chapter_verse_counts):
+            offsets = []
+            for chapter, count in enumerate(counts, start=1):
+                offsets.append(total)
+                if count > 0:
+                    self._chapter_starts.append(total)
+                    self._chapter_refs.append((book, chapter))
+                total += count
+            self.chapter_offsets.append(offsets)
+        self.verse_total = total
+
+    def __len__(self):
+        return self.verse_total
+
+    def book_count(self):
+        return len(self.chapter_verse_counts)
+
+    def chapter_count(self, book):
+        return len(self.chapter_verse_counts[book])
+
+    def verse_count(self, book, chapter):
+        return self.chapter_verse_counts[book][chapter - 1]
+
+    def ordinal(self, book, chapter, verse, clamp=False):
+        """
+        Dense ordinal of (book, chapter, verse). With clamp=True, references past the end of a
+        book or chapter (e.g. from a translation with different versification) are pulled back
+        to the nearest real verse instead of raising ValueError.
+        """
+        book, chapter, verse = int(book), int(chapter), int(verse)
+        if clamp:
+            book = min(max(book, 0), self.book_count() - 1)
+            chapter = min(max(chapter, 1), self.chapter_count(book))
+            verse = min(max(verse, 1), self.verse_count(book, chapter))
+        elif not (0 <= book < self.book_count()
+                  and 1 <= chapter <= self.chapter_count(book)
+                  and 1 <= verse <= self.verse_count(book, chapter)):
+            raise ValueError(f"No verse {book}.{chapter}.{verse} in this Bible")
+        return self.chapter_offsets[book][chapter - 1] + verse - 1
+
+    def verse(self, ordinal):
+        """Inverse of ordinal(). Returns (book, chapter, verse)."""
+        if not 0 <= ordinal < self.verse_total:
+            raise ValueError(f"Verse ordinal {ordinal} out of range")
+        i = bisect.bisect_right(self._chapter_starts, ordinal) - 1
+        book, chapter = self._chapter_refs[i]
+        return book, chapter, ordinal - self._chapter_starts[i] + 1
+
+    def verses(self, start, end):
+        """Generator over (book, chapter, verse) for every ordinal from start to end (inclusive)."""
+        if start > end:
+            return
+        i = bisect.bisect_right(self._chapter_starts, start) - 1
+        ordinal = start
+        while ordinal <= end:
+            book, chapter = self._chapter_refs[i]
+            chapter_start = self._chapter_starts[i]
+            chapter_end = min(chapter_start + self.chapter_verse_counts[book][chapter - 1] - 1, end)
+            for verse in range(ordinal - chapter_start + 1, chapter_end - chapter_start + 2):
+                yield (book, chapter, verse)
+            ordinal = chapter_end + 1
+            i += 1
+
+    def chapters(self, start, end):
+        """Generator over every (book, chapter) containing an ordinal from start to end."""
+        if start > end:
+            return
+        first = bisect.bisect_right(self._chapter_starts, start) - 1
+        last = bisect.bisect_right(self._chapter_starts, end) - 1
+        yield from self._chapter_refs[first:last + 1]
+
+    def from_db_ordinal(self, db_ordinal):
+        """Dense ordinal for a packed database ordinal (see make_verse_ordinal), clamped to this Bible."""
+        return self.ordinal(*split_verse_ordinal(db_ordinal), clamp=True)
+
+    def to_db_ordinal(self, ordinal):
+        """Packed database ordinal (see make_verse_ordinal) for a dense ordinal."""
+        return make_verse_ordinal(*self.verse(ordinal))
+
 def extract_book_chapter_verse(verse_id):
     """Extract book, chapter, and verse from a verse_id string."""
     parts = verse_id.split('.')
@@ -417,109 +487,32 @@ def extract_book_chapter_verse(verse_id):
     return int(parts[0]), int(parts[1]), int(parts[2])
 
 # Helper function to expand verse ranges using the loaded Bible data
-def expand_verse_range(start_book, start_chapter, start_verse, end_book, end_chapter, end_verse, bible_data):
+def expand_verse_range(start_book, start_chapter, start_verse, end_book, end_chapter, end_verse, bible_data, bible_index=None):
     """
     Expand a verse range into all individual verses using the loaded Bible data.
     Returns a list of (book, chapter, verse) tuples.
-    
+
     Args:
         start_book, start_chapter, start_verse: Starting reference (0-indexed book)
         end_book, end_chapter, end_verse: Ending reference (0-indexed book)
         bible_data: Dictionary of Bible data {book_name: [[verses_ch1], [verses_ch2], ...]}
     """
-    verses = []
-    
-    # Get book names list (book_proper_names should be populated by getBibleData)
-    if not book_proper_names or start_book >= len(book_proper_names) or end_book >= len(book_proper_names):
-        # Fallback: just return start and end if data not available
+    bible_index = _bible_index(bible_index)
+    if not bible_data or start_book < 0 or end_book < 0 \
+            or start_book >= bible_index.book_count() or end_book >= bible_index.book_count():
         raise Exception("Bible data is required to expand verse ranges.")
-    
-    start_book_name = book_proper_names[start_book]
-    end_book_name = book_proper_names[end_book]
-    
-    # Same book
-    if start_book == end_book:
-        book_name = start_book_name
-        if book_name not in bible_data:
-            raise Exception(f"Book '{book_name}' not found in Bible data.")
-        
-        book_chapters = bible_data[book_name]
-        
-        # Same chapter
-        if start_chapter == end_chapter:
-            for v in range(start_verse, end_verse + 1):
-                verses.append((start_book, start_chapter, v))
-        # Different chapters
-        else:
-            # First chapter: from start_verse to end of chapter
-            if start_chapter - 1 < len(book_chapters):
-                max_verse = len(book_chapters[start_chapter - 1])  # chapter is 1-indexed
-                for v in range(start_verse, max_verse + 1):
-                    verses.append((start_book, start_chapter, v))
-            
-            # Middle chapters: all verses
-            for ch in range(start_chapter + 1, end_chapter):
-                if ch - 1 < len(book_chapters):
-                    max_verse = len(book_chapters[ch - 1])
-                    for v in range(1, max_verse + 1):
-                        verses.append((start_book, ch, v))
-            
-            # Last chapter: from 1 to end_verse
-            for v in range(1, end_verse + 1):
-                verses.append((end_book, end_chapter, v))
-    
-    # Different books
-    else:
-        # First book, starting chapter: from start_verse to end of chapter
-        if start_book_name in bible_data:
-            book_chapters = bible_data[start_book_name]
-            if start_chapter - 1 < len(book_chapters):
-                max_verse = len(book_chapters[start_chapter - 1])
-                for v in range(start_verse, max_verse + 1):
-                    verses.append((start_book, start_chapter, v))
-            
-            # First book, remaining chapters: all verses
-            for ch in range(start_chapter + 1, len(book_chapters) + 1):
-                if ch - 1 < len(book_chapters):
-                    max_verse = len(book_chapters[ch - 1])
-                    for v in range(1, max_verse + 1):
-                        verses.append((start_book, ch, v))
-        
-        # Middle books: all chapters and verses
-        for bk in range(start_book + 1, end_book):
-            if bk < len(book_proper_names):
-                book_name = book_proper_names[bk]
-                if book_name in bible_data:
-                    book_chapters = bible_data[book_name]
-                    for ch_idx, chapter_verses in enumerate(book_chapters):
-                        ch = ch_idx + 1  # chapter is 1-indexed
-                        max_verse = len(chapter_verses)
-                        for v in range(1, max_verse + 1):
-                            verses.append((bk, ch, v))
-        
-        # Last book
-        if end_book_name in bible_data:
-            book_chapters = bible_data[end_book_name]
-            # Chapters before end_chapter: all verses
-            for ch in range(1, end_chapter):
-                if ch - 1 < len(book_chapters):
-                    max_verse = len(book_chapters[ch - 1])
-                    for v in range(1, max_verse + 1):
-                        verses.append((end_book, ch, v))
-            
-            # Last chapter: from 1 to end_verse
-            for v in range(1, end_verse + 1):
-                verses.append((end_book, end_chapter, v))
-    
-    return verses
+
+    start = bible_index.ordinal(start_book, start_chapter, start_verse, clamp=True)
+    end = bible_index.ordinal(end_book, end_chapter, end_verse, clamp=True)
+    return list(bible_index.verses(start, end))
 
 # Functions to parse verse references and return a formatted dictionary
-def tagVerseEntry(verse_ref, tag_name):
-    verses = parseVerseReference(verse_ref)
+def tagVerseEntry(verse_ref, tag_name, bible_index=None):
+    verses = parseVerseReference(verse_ref, bible_index)
     return {"start_book": verses['sb'], "end_book": verses['eb'], "start_chapter": verses['sc'], "end_chapter": verses['ec'], "start_verse": verses['sv'], "end_verse": verses['ev'], "tag": tag_name}
 
-def verseNoteEntry(verse_ref, note):
-    verses = parseVerseReference(verse_ref)
+def verseNoteEntry(verse_ref, note, bible_index=None):
+    verses = parseVerseReference(verse_ref, bible_index)
     return {"start_book": verses['sb'], "end_book": verses['eb'], "start_chapter": verses['sc'], "end_chapter": verses['ec'], "start_verse": verses['sv'], "end_verse": verses['ev'], "note": note}
 
 # I probably don't need this one....
@@ -527,6 +520,99 @@ def tagNoteEntry(tag_name, note_data):
     return {"note": note_data, "tag": tag_name}
 
 
+class BibleIndex(VerseIndex):
+    """
+    Everything about one translation that bibledb_lib needs: its book names, every name
+    and alias for each book, and the VerseIndex numbering of its verses.
+
+    Built once per loaded Bible (parseBibleData builds one from the JSON data and makes it
+    active_bible_index) and never changed afterwards, so loading another Bible builds a new
+    one instead of adding to this one, and two translations can be used side by side by
+    passing bible_index= to the functions that take it.
+
+    books is a list of (book, chapter_verse_counts) pairs, where book is the book's object
+    from the Bible JSON (only its "book" and "names" are used). See from_json.
+    """
+
+    def __init__(self, books):
+        book_names = []
+        book_headers = []
+        aliases = {}
+        chapter_verse_counts = []
+        for book, counts in books:
+            # use first name from 'names' array as primary name, falling back to the 'book' field
+            if "names" in book and len(book["names"]) > 0:
+                book_name = book["names"][0]
+            else:
+                book_name = book["book"]
+
+            # every name maps to its book; the first book to claim an alias keeps it
+            for alias in [book_name, book.get("book", "")] + list(book.get("names", [])):
+                if alias and alias.strip():
+                    aliases.setdefault(alias.strip().lower(), len(book_names))
+            book_names.append(book_name)
+            book_headers.append({"book": book.get("book", ""), "names": list(book.get("names", []))})
+            chapter_verse_counts.append(counts)
+
+        super().__init__(chapter_verse_counts)
+        self.book_names = tuple(book_names)
+        # each book's "book" and "names" as given, so the index can be rebuilt (see bible_binary)
+        self.book_headers = tuple(book_headers)
+        self.aliases = aliases
+
+        # the same names and references get looked up over and over by the exports and
+        # get_db_stuff, so both are cached (per translation, since they depend on its names)
+        self.find_book = functools.lru_cache(maxsize=1024)(self._find_book)
+        self.parse_reference = functools.lru_cache(maxsize=4096)(self._parse_reference)
+
+    @classmethod
+    def from_json(cls, data):
+        """BibleIndex for a parsed Bible JSON (see validate_bible_schema)."""
+        return cls([(book, [len(chapter["verses"]) for chapter in book["chapters"]]) for book in data["books"]])
+
+    def _find_book(self, book_name):
+        # Book index for a book name, alias or partial name, or -1 if there's no such book.
+        # Names and aliases from the Bible JSON are a dict lookup; anything else falls back to
+        # the first book whose proper name contains it (e.g. "Gen" -> Genesis).
+        if not book_name or not book_name.strip():
+            return -1
+        key = book_name.strip().lower()
+        if key in self.aliases:
+            return self.aliases[key]
+        for index, name in enumerate(self.book_names):
+            if key in name.lower():
+                return index
+        return -1
+
+    def _parse_reference(self, verse_ref):
+        # (sb, sc, sv, eb, ec, ev) for parseVerseReference, or None. Tuples, so cached results can't be changed.
+        match = _verse_reference_pattern.match(verse_ref)
+        if not match:
+            return None
+
+        sb = self.find_book(match.group('sb'))
+        sc = match.group('sc')
+        sv = match.group('sv')
+        #if two or more books... (e.g. Gen 1:1-Exod 1:1)
+        if match.group('eb'):
+            eb = self.find_book(match.group('eb'))
+            ec = match.group('ec')
+            ev = match.group('ev')
+        #two or more chapters or verses... (e.g. Gen 1:1-2:2, Gen 1:1-5)
+        elif match.group('ev_only'):
+            eb = sb
+            ec = match.group('ec_only') or sc
+            ev = match.group('ev_only')
+        #just one verse...(e.g. Gen 1:1)
+        else:
+            eb, ec, ev = sb, sc, sv
+
+        return (sb, sc, sv, eb, ec, ev)
+
+#used when no Bible is loaded: no books, so every book lookup gives -1
+_empty_bible_index = BibleIndex([])
+
+
 ######################
 #STEP 1: READ A BIBLE
 ######################
@@ -563,68 +649,116 @@ def validate_bible_schema(data):
       ]
     }
     
+    Every book, chapter and verse is checked, and every problem is reported with its JSON path.
+
     Returns: (is_valid, error_message)
     """
-    try:
-        # Check top level structure
-        if not isinstance(data, dict):
-            return False, "JSON root must be an object"
-        
-        if "books" not in data:
-            return False, "Missing required field 'books'"
-        
-        if not isinstance(data["books"], list) or len(data["books"]) == 0:
-            return False, "'books' must be a non-empty array"
-        
-        # Validate first book structure (sample validation)
-        book = data["books"][0]
-        
-        if not isinstance(book, dict):
-            return False, "Book entries must be objects"
-        
-        if "book" not in book:
-            return False, "Books must have a 'book' field with the book name"
-        
-        if "chapters" not in book:
-            return False, "Books must have a 'chapters' field"
-        
-        if not isinstance(book["chapters"], list) or len(book["chapters"]) == 0:
-            return False, "'chapters' must be a non-empty array"
-        
-        # Validate first chapter structure
-        chapter = book["chapters"][0]
-        
+    errors = []
+    if not isinstance(data, dict):
+        errors.append(("$", "JSON root must be an object"))
+    elif "books" not in data:
+        errors.append(("$", "Missing required field 'books'"))
+    elif not isinstance(data["books"], list) or len(data["books"]) == 0:
+        errors.append(("$.books", "'books' must be a non-empty array"))
+    else:
+        for b, book in enumerate(data["books"]):
+            errors.extend(_book_schema_errors(book, f"$.books[{b}]"))
+
+    if errors:
+        return False, _format_schema_errors(errors)
+    return True, None
+
+def _book_schema_errors(book, path):
+    # every schema problem in one book, as (JSON path, message) pairs
+    if not isinstance(book, dict):
+        return [(path, "Book entries must be objects")]
+
+    errors = []
+    if "book" not in book:
+        errors.append((path, "Books must have a 'book' field with the book name"))
+    if "names" in book and not (isinstance(book["names"], list) and all(isinstance(name, str) for name in book["names"])):
+        errors.append((path + ".names", "'names' must be an array of strings"))
+
+    if "chapters" not in book:
+        errors.append((path, "Books must have a 'chapters' field"))
+        return errors
+    if not isinstance(book["chapters"], list) or len(book["chapters"]) == 0:
+        errors.append((path + ".chapters", "'chapters' must be a non-empty array"))
+        return errors
+
+    for c, chapter in enumerate(book["chapters"]):
+        chapter_path = f"{path}.chapters[{c}]"
         if not isinstance(chapter, dict):
-            return False, "Chapter entries must be objects"
-        
+            errors.append((chapter_path, "Chapter entries must be objects"))
+            continue
         if "verses" not in chapter:
-            return False, "Chapters must have a 'verses' field"
-        
+            errors.append((chapter_path, "Chapters must have a 'verses' field"))
+            continue
         if not isinstance(chapter["verses"], list) or len(chapter["verses"]) == 0:
-            return False, "'verses' must be a non-empty array"
-        
-        # Validate first verse structure
-        verse = chapter["verses"][0]
-        
-        if not isinstance(verse, dict):
-            return False, "Verse entries must be objects"
-        
-        if "verse" not in verse:
-            return False, "Verses must have a 'verse' field with the verse number"
-        
-        if "text" not in verse:
-            return False, "Verses must have a 'text' field with the verse content"
-        
-        return True, None
-        
-    except Exception as e:
-        return False, f"Schema validation error: {str(e)}"
+            errors.append((chapter_path + ".verses", "'verses' must be a non-empty array"))
+            continue
+
+        for v, verse in enumerate(chapter["verses"]):
+            # most verses are just a number and text; check those without building a path
+            if type(verse) is dict and len(verse) == 2 and type(verse.get("verse")) is int and type(verse.get("text")) is str:
+                continue
+            verse_path = f"{chapter_path}.verses[{v}]"
+            if not isinstance(verse, dict):
+                errors.append((verse_path, "Verse entries must be objects"))
+                continue
+            if "verse" not in verse:
+                errors.append((verse_path, "Verses must have a 'verse' field with the verse number"))
+            elif not isinstance(verse["verse"], int) or isinstance(verse["verse"], bool):
+                errors.append((verse_path + ".verse", "'verse' must be a whole number"))
+            if "text" not in verse:
+                errors.append((verse_path, "Verses must have a 'text' field with the verse content"))
+            elif not isinstance(verse["text"], str):
+                errors.append((verse_path + ".text", "'text' must be a string"))
+            if "footnote" in verse and not isinstance(verse["footnote"], str):
+                errors.append((verse_path + ".footnote", "'footnote' must be a string"))
+            if "cross_references" in verse:
+                if not isinstance(verse["cross_references"], dict):
+                    errors.append((verse_path + ".cross_references", "'cross_references' must be an object"))
+                elif not isinstance(verse["cross_references"].get("refers_to", []), list):
+                    errors.append((verse_path + ".cross_references.refers_to", "'refers_to' must be an array"))
+    return errors
+
+def _format_schema_errors(errors, limit=20):
+    # one line per error; past the limit they're only printed to the console
+    lines = [f"{path}: {message}" for path, message in errors]
+    if len(lines) <= limit:
+        return "\n".join(lines)
+    print(f"Bible JSON has {len(lines)} schema errors:")
+    for line in lines:
+        print("  " + line)
+    return "\n".join(lines[:limit]) + f"\n...and {len(lines) - limit} more (see console)"
+
+
+class PackedChapters(Sequence):
+    """
+    The chapters of one book, each kept as a marshal blob and decoded when it's indexed.
+
+    Behaves like the book's "chapters" list from the Bible JSON (indexing gives the same
+    chapter objects), but takes a fraction of the memory of the parsed objects.
+    """
+
+    def __init__(self, blobs):
+        self.blobs = blobs
+
+    def __len__(self):
+        return len(self.blobs)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [marshal.loads(blob) for blob in self.blobs[i]]
+        return marshal.loads(self.blobs[i])
 
 
 def parseBibleData(data):
     """
     Store Bible JSON data as-is with minimal processing.
     Just extract book names and store chapters directly.
+    Also builds the Bible's BibleIndex and makes it active_bible_index.
     
     Returns:
     bibleData: dict - {book_name: [chapters_array]}
@@ -635,31 +769,130 @@ def parseBibleData(data):
     if not is_valid:
         raise ValueError(f"Invalid Bible JSON schema: {error_msg}")
     
+    bible_index = BibleIndex.from_json(data)
+
+    # Store chapters directly as they are in the JSON
     bibleData = {}
-    
-    # Iterate over books
-    for book in data["books"]:
-        # Extract book name - use first name from 'names' array as primary name
-        # Fall back to 'book' field if names array is empty
-        if "names" in book and len(book["names"]) > 0:
-            book_name = book["names"][0]
-        else:
-            book_name = book["book"]
-        
-        book_proper_names.append(book_name)
-        
-        # Store chapters directly as they are in the JSON
+    for book_name, book in zip(bible_index.book_names, data["books"]):
         bibleData[book_name] = book["chapters"]
-    
+
+    set_active_bible_index(bible_index)
+
     return bibleData
 
+def set_active_bible_index(bible_index):
+    # make bible_index the Bible the UI (and every function called without bible_index=) uses.
+    # This replaces, not extends, the active Bible, so nothing is left over from the last one.
+    global active_bible_index, book_proper_names
+    active_bible_index = bible_index
+    book_proper_names = list(bible_index.book_names)
+
+
+_json_whitespace = re.compile(r'[ \t\n\r]*')
+
+def _iter_bible_json_books(content):
+    """
+    Parse a Bible JSON string one book at a time: yields (index, book) for each entry of the
+    root object's "books" array, so only one book's objects exist at a time.
+
+    Raises json.JSONDecodeError for malformed JSON and ValueError if there's no "books" array.
+    """
+    decoder = json.JSONDecoder()
+
+    def skip(pos):
+        return _json_whitespace.match(content, pos).end()
+
+    def expect(pos, char, what):
+        if content[pos:pos + 1] != char:
+            raise json.JSONDecodeError(f"Expecting {what}", content, pos)
+        return skip(pos + 1)
+
+    pos = skip(0)
+    if content[pos:pos + 1] != '{':
+        # still a JSON error if it isn't JSON at all
+        decoder.raw_decode(content, pos)
+        raise ValueError("Invalid Bible JSON schema: $: JSON root must be an object")
+    pos = skip(pos + 1)
+
+    found_books = False
+    while content[pos:pos + 1] != '}':
+        if content[pos:pos + 1] != '"':
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes", content, pos)
+        key, pos = decoder.raw_decode(content, pos)
+        pos = expect(skip(pos), ':', "':' delimiter")
+
+        if key == "books" and content[pos:pos + 1] == '[':
+            found_books = True
+            pos = skip(pos + 1)
+            b = 0
+            while content[pos:pos + 1] != ']':
+                book, pos = decoder.raw_decode(content, pos)
+                yield b, book
+                # let the caller's packed copy be the only one before parsing the next book
+                del book
+                b += 1
+                pos = skip(pos)
+                if content[pos:pos + 1] == ',':
+                    pos = skip(pos + 1)
+                    if content[pos:pos + 1] == ']':
+                        raise json.JSONDecodeError("Illegal trailing comma before end of array", content, pos)
+                elif content[pos:pos + 1] != ']':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", content, pos)
+            pos += 1
+        elif key == "books":
+            raise ValueError("Invalid Bible JSON schema: $.books: 'books' must be a non-empty array")
+        else:
+            # anything else at the root (e.g. translation info) is parsed and ignored
+            value, pos = decoder.raw_decode(content, pos)
+
+        pos = skip(pos)
+        if content[pos:pos + 1] == ',':
+            pos = skip(pos + 1)
+            if content[pos:pos + 1] == '}':
+                raise json.JSONDecodeError("Illegal trailing comma before end of object", content, pos)
+        elif content[pos:pos + 1] != '}':
+            raise json.JSONDecodeError("Expecting ',' delimiter", content, pos)
+
+    if skip(pos + 1) != len(content):
+        raise json.JSONDecodeError("Extra data", content, skip(pos + 1))
+    if not found_books:
+        raise ValueError("Invalid Bible JSON schema: $: Missing required field 'books'")
 
 def getBibleData(bible_file_content):
-    """Load and parse Bible JSON data"""
-    # Load JSON data
-    data = json.loads(bible_file_content)
+    """
+    Load and parse Bible JSON data, and make it the active Bible (like parseBibleData).
+
+    Validation and parsing are one pass: each book is parsed, checked (see
+    validate_bible_schema) and packed into PackedChapters before the next book is parsed,
+    so the full tree of JSON objects is never in memory at once.
 
-    return parseBibleData(data)
+    Raises ValueError listing every schema error with its JSON path.
+
+    Returns:
+    bibleData: dict - {book_name: PackedChapters}
+    """
+    errors = []
+    books = []
+    book_chapters = []
+    for b, book in _iter_bible_json_books(bible_file_content):
+        errors.extend(_book_schema_errors(book, f"$.books[{b}]"))
+        # once there are errors nothing will be loaded, so just keep checking
+        if not errors:
+            chapters = book["chapters"]
+            books.append(({"book": book["book"], "names": book.get("names", [])}, [len(chapter["verses"]) for chapter in chapters]))
+            book_chapters.append(PackedChapters([marshal.dumps(chapter) for chapter in chapters]))
+
+    if not books and not errors:
+        errors.append(("$.books", "'books' must be a non-empty array"))
+    if errors:
+        raise ValueError(f"Invalid Bible JSON schema: {_format_schema_errors(errors)}")
+
+    bible_index = BibleIndex(books)
+    bibleData = dict(zip(bible_index.book_names, book_chapters))
+
+    set_active_bible_index(bible_index)
+
+    return bibleData
 
 
 ######################
@@ -674,24 +907,14 @@ def makeDB(sqlite_database):
     cursor = conn.cursor()
 
     # Create the 'verse_group' table
+    # A verse_group covers every verse from start_ordinal to end_ordinal (see make_verse_ordinal)
     cursor.execute('''
             CREATE TABLE IF NOT EXISTS verse_group (
                 verse_group_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                note TEXT
-            )
-    ''')
-
-    # Create the 'verse_group_verse' table
-    # BOOK, CHAPTER, VERSE are included. verse_id is calculated based on these three fields
-    cursor.execute('''
-            CREATE TABLE IF NOT EXISTS verse_group_verse (
-                verse_group_id INTEGER NOT NULL,
-                verse_id TEXT NOT NULL,
-                book INTEGER NOT NULL,
-                chapter INTEGER NOT NULL,
-                verse INTEGER NOT NULL,
-                PRIMARY KEY (verse_group_id, verse_id),
-                FOREIGN KEY (verse_group_id) REFERENCES verse_group (verse_group_id) ON DELETE CASCADE
+                start_ordinal INTEGER NOT NULL,
+                end_ordinal INTEGER NOT NULL,
+                note TEXT,
+                CHECK (start_ordinal <= end_ordinal)
             )
     ''')
 
@@ -727,13 +950,53 @@ def makeDB(sqlite_database):
             )
     ''')
 
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verse_group_tag_tag_id ON verse_group_tag (tag_id)')
+    # covering index for tag -> verse_group lookups
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verse_group_tag_tag_group ON verse_group_tag (tag_id, verse_group_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_verse_group_tag_group_id ON verse_group_tag (verse_group_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verse_group_verse_verse_id ON verse_group_verse (verse_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verse_group_verse_book_chapter_verse ON verse_group_verse (book, chapter, verse)')
+    # interval indexes: overlap queries are "start_ordinal <= hi AND end_ordinal >= lo"
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verse_group_interval ON verse_group (start_ordinal, end_ordinal)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_verse_group_end ON verse_group (end_ordinal)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_tag_tag_tag1 ON tag_tag (tag_1_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_tag_tag_tag2 ON tag_tag (tag_2_id)')
 
+    # synonym_group is the connected components of tag_tag: every tag with at least one synonym
+    # has a row, and tags are synonyms (directly or through other tags) when their group_id matches.
+    # group_id is the tag_id of one of the group's tags. add_tag_tag and delete_tag_tag keep it up to date.
+    cursor.execute('''
+            CREATE TABLE IF NOT EXISTS synonym_group (
+                tag_id INTEGER PRIMARY KEY,
+                group_id INTEGER NOT NULL,
+                FOREIGN KEY (tag_id) REFERENCES tag(tag_id) ON DELETE CASCADE
+            )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_synonym_group_group ON synonym_group (group_id)')
+
+    # full-text indexes over verse_group.note and tag.note, for search_notes. They're external-content
+    # FTS5 tables (the text itself stays in verse_group and tag) kept in step by the triggers below
+    for table, id_column in (("verse_group", "verse_group_id"), ("tag", "tag_id")):
+        fts_table = f"{table}_note_fts"
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                note, content='{table}', content_rowid='{id_column}', tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table} (rowid, note) VALUES (new.{id_column}, new.note);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, note) VALUES ('delete', old.{id_column}, old.note);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF note ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, note) VALUES ('delete', old.{id_column}, old.note);
+                INSERT INTO {fts_table} (rowid, note) VALUES (new.{id_column}, new.note);
+            END
+        """)
+
     cursor.execute(f"PRAGMA user_version = {CURRENT_DATABASE_VERSION}")
 
     conn.commit()
@@ -743,626 +1006,1412 @@ def makeDB(sqlite_database):
 
 
 ######################
-#STEP 3: MODIFY DB DATA
+# DATABASE SESSIONS
 ######################
-def add_verse_tag(database_file, verse_ref, tag_name, bible_data):
-    tag_name = tag_name.lower()
-    entry = tagVerseEntry(verse_ref, tag_name)
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
 
-    start_book    = entry["start_book"]
-    end_book      = entry["end_book"]
-    start_chapter = int(entry["start_chapter"])
-    end_chapter   = int(entry["end_chapter"])
-    start_verse   = int(entry["start_verse"])
-    end_verse     = int(entry["end_verse"])
+def synonym_components(pairs):
+    # union-find over (tag_1_id, tag_2_id) pairs: returns {tag_id: group_id} for every tag in a pair,
+    # where group_id is the smallest tag_id in that tag's connected component
+    parent = {}
+
+    def find(tag_id):
+        root = tag_id
+        while parent[root] != root:
+            root = parent[root]
+        # path compression, so the next find is one step
+        while parent[tag_id] != root:
+            parent[tag_id], tag_id = root, parent[tag_id]
+        return root
+
+    for tag_1_id, tag_2_id in pairs:
+        parent.setdefault(tag_1_id, tag_1_id)
+        parent.setdefault(tag_2_id, tag_2_id)
+        root_1 = find(tag_1_id)
+        root_2 = find(tag_2_id)
+        if root_1 != root_2:
+            # the smaller id is the root, so it ends up as the group_id
+            parent[max(root_1, root_2)] = min(root_1, root_2)
+
+    return {tag_id: find(tag_id) for tag_id in parent}
+
+def rebuild_synonym_groups(cursor):
+    # recompute the whole synonym_group table from tag_tag
+    cursor.execute("SELECT tag_1_id, tag_2_id FROM tag_tag")
+    groups = synonym_components(cursor.fetchall())
+    cursor.execute("DELETE FROM synonym_group")
+    cursor.executemany("INSERT INTO synonym_group (tag_id, group_id) VALUES (?, ?)", groups.items())
+    return groups
 
-    if bible_data:
-        all_verses = expand_verse_range(start_book, start_chapter, start_verse, end_book, end_chapter, end_verse, bible_data)
-    else:
-        raise Exception("Bible data is required to expand verse ranges.")
+def fts_plain_words(query):
+    # an FTS5 query matching every word of query literally, for input that isn't valid FTS5 syntax
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
 
-    # Create verse_group entry (AUTOINCREMENT will assign ID)
-    cursor.execute('''
-        INSERT INTO verse_group (note) VALUES (NULL)
-    ''')
-    verse_group_id = cursor.lastrowid
-    
-    # Insert all verses in the range into verse_group_verse
-    for book, chapter, verse in all_verses:
-        verse_id = make_verse_id(book, chapter, verse)
-        cursor.execute('''
-            INSERT OR IGNORE INTO verse_group_verse (verse_group_id, verse_id, book, chapter, verse)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (verse_group_id, verse_id, book, chapter, verse))
-    
-    # Insert tag into 'tag' table if it doesn't exist
-    cursor.execute('''
-        INSERT OR IGNORE INTO tag (tag) VALUES (?)
-    ''', (entry["tag"],))
-    
-    cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (entry["tag"],))
-    tag_id = cursor.fetchone()[0]
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
 
-    # Insert association into 'verse_group_tag' table
-    cursor.execute('''
-        INSERT OR IGNORE INTO verse_group_tag (verse_group_id, tag_id) VALUES (?, ?)
-    ''', (verse_group_id, tag_id))
-    
-    conn.commit()
-    conn.close()
+class TagIndex:
+    """
+    In-memory index of a database's tag names, for autocomplete.
 
-def delete_verse_tag(database_file, verse, tag):
-    tag = tag.lower()
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
+    Prefix matches are a bisect over the sorted names; substring matches intersect the
+    sets of names containing each trigram of the input. Results are ranked exact match
+    first, then prefix matches, then other substrings, and within each of those by how
+    many verse ranges use the tag.
 
-    entry = tagVerseEntry(verse, tag)
-    
-    # Find verse_group_id(s) that contain this verse range
-    start_verse_id = make_verse_id(entry["start_book"], entry["start_chapter"], entry["start_verse"])
-    
-    # Get tag_id
-    cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (entry["tag"],))
-    tag_result = cursor.fetchone()
-    
-    if not tag_result:
-        print(f"Tag '{tag}' not found.")
-        conn.close()
-        return
-        
-    tag_id = tag_result[0]
+    BibleDB builds one the first time it's asked for tags and keeps it up to date
+    through its own writes (see BibleDB.tag_index).
+    """
 
-    # Find verse_groups containing this verse
-    cursor.execute('''
-        SELECT verse_group_id FROM verse_group_verse WHERE verse_id = ?
-    ''', (start_verse_id,))
-    verse_groups = cursor.fetchall()
+    def __init__(self, usage_counts=()):
+        # usage_counts is (tag, number of verse_groups with that tag) pairs
+        self.usage = dict(usage_counts)
+        self.sorted_tags = sorted(self.usage)
+        self.trigrams = {}
+        for tag in self.sorted_tags:
+            self._index_trigrams(tag)
+
+    def __len__(self):
+        return len(self.sorted_tags)
+
+    def __contains__(self, tag):
+        return tag in self.usage
+
+    def _index_trigrams(self, tag):
+        for trigram in _trigrams(tag):
+            self.trigrams.setdefault(trigram, set()).add(tag)
+
+    def add(self, tag, uses=0):
+        # a new tag (or more uses of an existing one)
+        if tag not in self.usage:
+            self.usage[tag] = 0
+            bisect.insort(self.sorted_tags, tag)
+            self._index_trigrams(tag)
+        self.usage[tag] += uses
+
+    def add_usage(self, tag, uses):
+        if tag in self.usage:
+            self.usage[tag] = max(0, self.usage[tag] + uses)
+
+    def remove(self, tag):
+        if tag not in self.usage:
+            return
+        del self.usage[tag]
+        i = bisect.bisect_left(self.sorted_tags, tag)
+        del self.sorted_tags[i]
+        for trigram in _trigrams(tag):
+            tags = self.trigrams[trigram]
+            tags.discard(tag)
+            if not tags:
+                del self.trigrams[trigram]
+
+    def prefix_matches(self, prefix):
+        # every tag starting with prefix, in sorted order
+        start = bisect.bisect_left(self.sorted_tags, prefix)
+        end = bisect.bisect_left(self.sorted_tags, prefix + "\U0010ffff", start)
+        return self.sorted_tags[start:end]
+
+    def substring_matches(self, partial):
+        # every tag containing partial, in no particular order
+        if len(partial) < 3:
+            # too short for trigrams; a scan of the names is still quick at this size
+            return [tag for tag in self.sorted_tags if partial in tag]
+        candidates = None
+        for trigram in sorted(_trigrams(partial), key=lambda t: len(self.trigrams.get(t, ()))):
+            tags = self.trigrams.get(trigram)
+            if not tags:
+                return []
+            candidates = set(tags) if candidates is None else candidates & tags
+            if not candidates:
+                return []
+        # having every trigram doesn't mean they're next to each other
+        return [tag for tag in candidates if partial in tag]
+
+    def search(self, partial, limit=50):
+        """
+        Tags matching partial (lowercased), best first, at most limit of them.
+        An empty partial gives the most used tags.
+        """
+        partial = partial.lower()
+        usage = self.usage
+        if not partial:
+            return heapq.nsmallest(limit, self.sorted_tags, key=lambda tag: (-usage[tag], tag))
+
+        prefixed = self.prefix_matches(partial)
+        results = heapq.nsmallest(limit, prefixed, key=lambda tag: (tag != partial, -usage[tag], tag))
+        if len(results) < limit:
+            prefixed = set(prefixed)
+            others = [tag for tag in self.substring_matches(partial) if tag not in prefixed]
+            results += heapq.nsmallest(limit - len(results), others, key=lambda tag: (-usage[tag], tag))
+        return results
+
+class BibleDB:
+    """
+    A session on one Bible Tagger database.
 
-    if verse_groups:
-        for (verse_group_id,) in verse_groups:
-            # Delete the association between the verse_group and tag
-            cursor.execute('''
-                DELETE FROM verse_group_tag WHERE verse_group_id = ? AND tag_id = ?
-            ''', (verse_group_id, tag_id))
-            
-            # Check if this verse_group has any tags, verses, or notes
-            cursor.execute('''
-                SELECT COUNT(*) FROM verse_group_tag WHERE verse_group_id = ?
-            ''', (verse_group_id,))
-            tag_count = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM verse_group_verse WHERE verse_group_id = ?
-            ''', (verse_group_id,))
-            verse_count = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                SELECT note FROM verse_group WHERE verse_group_id = ?
-            ''', (verse_group_id,))
-            note_result = cursor.fetchone()
-            has_note = note_result and note_result[0] is not None
-            
-            # If no tags, no verses, and no note, delete the verse_group
-            if tag_count == 0 and verse_count == 0 and not has_note:
-                cursor.execute('''
-                    DELETE FROM verse_group WHERE verse_group_id = ?
-                ''', (verse_group_id,))
+    Holds a single long-lived sqlite3 connection (with sqlite's prepared statement
+    cache turned up) instead of connecting and disconnecting on every call.
+    The module-level functions below are thin wrappers that look up a pooled
+    session with get_session() and call the matching method on it.
 
-        # Don't delete orphaned tags (per user requirement)
-        conn.commit()
-    else:
-        print(f"Verse '{verse}' not found.")
+    Use it as a context manager to group several calls into one transaction:
 
-    conn.close()
+        with BibleDB("MyDB.bdb") as db:
+            db.add_verse_tag("John 3:16", "love", bible_data)
+            db.add_verse_note("John 3:16", "...", bible_data)
 
-def add_tag_tag(database_file, tag1, tag2):
-    tag1 = tag1.lower()
-    tag2 = tag2.lower()
-    
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-    
-    # Insert both tags into 'tag' table if they don't exist
-    cursor.execute('''
-        INSERT OR IGNORE INTO tag (tag) VALUES (?)
-    ''', (tag1,))
+    Like a sqlite3 connection, leaving the with-block commits (or rolls back if
+    there was an exception) but does not close the session. Call close() for that.
+    """
 
-    cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag1,))
-    tag1_id = cursor.fetchone()[0]
-    
-    cursor.execute('''
-        INSERT OR IGNORE INTO tag (tag) VALUES (?)
-    ''', (tag2,))
-    
-    cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag2,))
-    tag2_id = cursor.fetchone()[0]
+    def __init__(self, database_file, cached_statements=256, bible_index=None):
+        self.database_file = database_file
+        # the BibleIndex used to read and write verse references; None means active_bible_index
+        self.bible_index = bible_index
+        # check_same_thread is off so close_sessions() can close a worker thread's
+        # session from the main thread. Each thread still gets its own session.
+        self.conn = sqlite3.connect(database_file, cached_statements=cached_statements, check_same_thread=False)
+        self._transaction_depth = 0
+
+        # find_note_tag_verses results by (book, chapter). The write methods bump
+        # _write_generation; PRAGMA data_version changes when another connection commits.
+        # Either one throws the whole cache away.
+        self._write_generation = 0
+        self._annotation_cache = {}
+        self._annotation_cache_version = None
+
+        # TagIndex of every tag, for get_tags_like. This session's writes update it in place;
+        # it's rebuilt when PRAGMA data_version shows another connection has committed.
+        self._tag_index = None
+        self._tag_index_version = None
+
+    def __enter__(self):
+        self._transaction_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._transaction_depth -= 1
+        # only the outermost with-block ends the transaction
+        if self._transaction_depth == 0:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+                # the tag index may have been updated for writes that were just rolled back
+                self._tag_index = None
+        return False
 
-    # Insert association into 'tag_tag' table
-    cursor.execute('''
-        INSERT OR IGNORE INTO tag_tag (tag_1_id, tag_2_id) VALUES (?, ?)
-    ''', (tag1_id, tag2_id))
-    
-    conn.commit()
-    conn.close()
+    def cursor(self):
+        return self.conn.cursor()
 
-def delete_tag_tag(database_file, tag1, tag2):
-    tag1 = tag1.lower()
-    tag2 = tag2.lower()
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-    
-    # Get tag IDs
-    cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag1,))
-    tag1_result = cursor.fetchone()
-    cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag2,))
-    tag2_result = cursor.fetchone()
-
-    if not tag1_result or not tag2_result:
-        print(f"Tag '{tag1}' or tag '{tag2}' not found.")
-        conn.close()
-        return
+    def _data_changed(self):
+        # called by every method that writes verse_groups, their notes or their tags
+        self._write_generation += 1
+
+    def tag_index(self):
+        # the TagIndex for this database, built on first use
+        cursor = self.cursor()
+        cursor.execute("PRAGMA data_version")
+        version = cursor.fetchone()[0]
+        if self._tag_index is None or version != self._tag_index_version:
+            cursor.execute('''
+                SELECT t.tag, COUNT(vgt.verse_group_id)
+                FROM tag t
+                LEFT JOIN verse_group_tag vgt ON vgt.tag_id = t.tag_id
+                GROUP BY t.tag_id
+            ''')
+            self._tag_index = TagIndex(cursor.fetchall())
+            self._tag_index_version = version
+        return self._tag_index
+
+    def _tags_added(self, tag_uses):
+        # keep the tag index (if there is one yet) in step with tags this session inserted or used.
+        # tag_uses is {tag: number of verse_groups newly tagged with it}
+        if self._tag_index is not None:
+            for tag, uses in tag_uses.items():
+                self._tag_index.add(tag, uses)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    ######################
+    # STEP 3: MODIFY DB DATA
+    ######################
+    def add_verse_tag(self, verse_ref, tag_name, bible_data):
+        self.add_verse_tags_bulk([(verse_ref, tag_name)], bible_data)
+
+    def add_verse_tags_bulk(self, entries, bible_data):
+        """
+        Tag many verse ranges at once. entries is a list of (verse_ref, tag_name) pairs.
+        A range that already has a verse_group gets the tag added to that group; other ranges
+        get one new verse_group each. All the references are parsed up front and the rows go
+        in with executemany in one transaction. Returns the verse_group_ids in the same order
+        as entries. bible_data isn't needed to store a range any more; it's kept so callers don't change.
+        """
+        entries = [tagVerseEntry(verse_ref, tag_name.lower(), self.bible_index) for verse_ref, tag_name in entries]
+        intervals = [self._entry_interval(entry) for entry in entries]
+        if not entries:
+            return []
+
+        with self:
+            self._data_changed()
+            cursor = self.cursor()
+
+            # Insert any new tags, then look up every tag_id once
+            tag_names = sorted(set(entry["tag"] for entry in entries))
+            cursor.executemany('''
+                INSERT OR IGNORE INTO tag (tag) VALUES (?)
+            ''', [(tag,) for tag in tag_names])
+            tag_ids = self._get_tag_ids(cursor, tag_names)
+
+            group_ids = self._get_or_insert_verse_groups(cursor, intervals)
+            verse_group_ids = [group_ids[interval] for interval in intervals]
+
+            # Only the (verse_group, tag) pairs that aren't there yet, so the tag index counts each use once
+            pairs = set((verse_group_id, tag_ids[entry["tag"]]) for verse_group_id, entry in zip(verse_group_ids, entries))
+            pairs -= self._get_verse_group_tag_pairs(cursor, set(verse_group_ids))
+
+            # Insert associations into 'verse_group_tag' table
+            cursor.executemany('''
+                INSERT OR IGNORE INTO verse_group_tag (verse_group_id, tag_id) VALUES (?, ?)
+            ''', sorted(pairs))
+
+            tag_names_by_id = {tag_id: tag for tag, tag_id in tag_ids.items()}
+            tag_uses = dict.fromkeys(tag_names, 0)
+            for verse_group_id, tag_id in pairs:
+                tag_uses[tag_names_by_id[tag_id]] += 1
+            self._tags_added(tag_uses)
+
+        return verse_group_ids
+
+    def _entry_interval(self, entry):
+        # (start_ordinal, end_ordinal) for a tagVerseEntry/verseNoteEntry
+        if entry["start_book"] == -1 or entry["end_book"] == -1:
+            raise Exception("Unknown book in verse reference.")
+        start = make_verse_ordinal(entry["start_book"], entry["start_chapter"], entry["start_verse"])
+        end = make_verse_ordinal(entry["end_book"], entry["end_chapter"], entry["end_verse"])
+        return min(start, end), max(start, end)
+
+    def _get_tag_ids(self, cursor, tag_names):
+        # returns {tag: tag_id} for the given tag names, 500 names per query
+        tag_names = list(tag_names)
+        tag_ids = {}
+        for i in range(0, len(tag_names), 500):
+            chunk = tag_names[i:i + 500]
+            cursor.execute('SELECT tag, tag_id FROM tag WHERE tag IN ({})'.format(','.join('?' * len(chunk))), chunk)
+            tag_ids.update(cursor.fetchall())
+        return tag_ids
+
+    def _find_verse_groups(self, cursor, intervals):
+        # returns {(start_ordinal, end_ordinal): verse_group_id} for the intervals that already have
+        # a verse_group (the oldest one, if an old database has several), 400 intervals per query
+        intervals = list(set(intervals))
+        found = {}
+        for i in range(0, len(intervals), 400):
+            chunk = intervals[i:i + 400]
+            cursor.execute('''
+                SELECT start_ordinal, end_ordinal, MIN(verse_group_id)
+                FROM verse_group
+                WHERE (start_ordinal, end_ordinal) IN (VALUES {})
+                GROUP BY start_ordinal, end_ordinal
+            '''.format(','.join(['(?, ?)'] * len(chunk))), [ordinal for interval in chunk for ordinal in interval])
+            for start, end, verse_group_id in cursor.fetchall():
+                found[(start, end)] = verse_group_id
+        return found
+
+    def _get_or_insert_verse_groups(self, cursor, intervals):
+        # returns {(start_ordinal, end_ordinal): verse_group_id} for every interval, reusing the
+        # verse_group with exactly that range if there is one and inserting one (with no note) if not
+        if not self.conn.in_transaction:
+            # take the write lock before looking, so another writer can't add the same range in between
+            cursor.execute('BEGIN IMMEDIATE')
+        group_ids = self._find_verse_groups(cursor, intervals)
+        missing = sorted(set(intervals) - set(group_ids))
+        if missing:
+            group_ids.update(zip(missing, self._insert_verse_groups(cursor, [None] * len(missing), missing)))
+        return group_ids
+
+    def _get_verse_group_tag_pairs(self, cursor, verse_group_ids):
+        # returns the set of (verse_group_id, tag_id) pairs already stored for these verse_groups
+        verse_group_ids = list(verse_group_ids)
+        pairs = set()
+        for i in range(0, len(verse_group_ids), 500):
+            chunk = verse_group_ids[i:i + 500]
+            cursor.execute('SELECT verse_group_id, tag_id FROM verse_group_tag WHERE verse_group_id IN ({})'.format(','.join('?' * len(chunk))), chunk)
+            pairs.update(cursor.fetchall())
+        return pairs
+
+    def _insert_verse_groups(self, cursor, notes, intervals):
+        # Insert one verse_group (with its note) per (start_ordinal, end_ordinal) and return the new ids.
+        # The ids are handed out here instead of by AUTOINCREMENT so the inserts can be
+        # batched. Taking the write lock first keeps another writer from claiming them.
+        if not self.conn.in_transaction:
+            cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('''
+            SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'verse_group'), 0),
+                       COALESCE((SELECT MAX(verse_group_id) FROM verse_group), 0))
+        ''')
+        first_id = cursor.fetchone()[0] + 1
+        verse_group_ids = list(range(first_id, first_id + len(notes)))
+
+        cursor.executemany('''
+            INSERT INTO verse_group (verse_group_id, start_ordinal, end_ordinal, note) VALUES (?, ?, ?, ?)
+        ''', ((verse_group_id, start, end, note)
+              for verse_group_id, (start, end), note in zip(verse_group_ids, intervals, notes)))
+
+        return verse_group_ids
+
+    def delete_verse_tag(self, verse, tag):
+        tag = tag.lower()
+        entry = tagVerseEntry(verse, tag, self.bible_index)
         
-    tag1_id = tag1_result[0]
-    tag2_id = tag2_result[0]
+        # Find verse_group_id(s) that contain this verse range
+        start_ordinal = make_verse_ordinal(entry["start_book"], entry["start_chapter"], entry["start_verse"])
 
-    # Ensure we handle both orderings of the tag pair
-    # Since we have CHECK (tag_1_id < tag_2_id), normalize the order
-    if tag1_id > tag2_id:
-        tag1_id, tag2_id = tag2_id, tag1_id
-    
-    # Delete the association (only one direction due to CHECK constraint)
-    cursor.execute('''
-        DELETE FROM tag_tag WHERE tag_1_id = ? AND tag_2_id = ?
-    ''', (tag1_id, tag2_id))
-    
-    # Don't delete orphaned tags (per user requirement)
+        with self:
+            self._data_changed()
+            cursor = self.cursor()
+            
+            # Get tag_id
+            cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (entry["tag"],))
+            tag_result = cursor.fetchone()
+            
+            if not tag_result:
+                print(f"Tag '{tag}' not found.")
+                return
+                
+            tag_id = tag_result[0]
 
-    conn.commit()
-    conn.close()
+            # Find verse_groups containing this verse
+            cursor.execute('''
+                SELECT verse_group_id FROM verse_group WHERE start_ordinal <= ? AND end_ordinal >= ?
+            ''', (start_ordinal, start_ordinal))
+            verse_groups = cursor.fetchall()
 
+            if not verse_groups:
+                print(f"Verse '{verse}' not found.")
+                return
 
-def add_verse_note(database_file, verse_ref, note, bible_data):
-    entry = verseNoteEntry(verse_ref, note)
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-    
-    # Insert all verses in the range into verse_group
-    start_book = entry["start_book"]
-    end_book = entry["end_book"]
-    start_chapter = int(entry["start_chapter"])
-    end_chapter = int(entry["end_chapter"])
-    start_verse = int(entry["start_verse"])
-    end_verse = int(entry["end_verse"])
-
-    if bible_data:
-        all_verses = expand_verse_range(start_book, start_chapter, start_verse, end_book, end_chapter, end_verse, bible_data)
-    else:
-        raise Exception("Bible data is required to expand verse ranges.")
+            for (verse_group_id,) in verse_groups:
+                # Delete the association between the verse_group and tag
+                cursor.execute('''
+                    DELETE FROM verse_group_tag WHERE verse_group_id = ? AND tag_id = ?
+                ''', (verse_group_id, tag_id))
+                if self._tag_index is not None:
+                    self._tag_index.add_usage(entry["tag"], -cursor.rowcount)
+                
+                # If no tags and no note, delete the verse_group
+                self._delete_verse_group_if_empty(cursor, verse_group_id)
 
-    # Create verse_group entry (AUTOINCREMENT will assign ID)
-    cursor.execute('''
-        INSERT INTO verse_group (note) VALUES (NULL)
-    ''')
-    verse_group_id = cursor.lastrowid
-    
-    # Insert all verses in the range into verse_group_verse
-    for book, chapter, verse in all_verses:
-        verse_id = make_verse_id(book, chapter, verse)
+            # Don't delete orphaned tags (per user requirement)
+
+    def _delete_verse_group_if_empty(self, cursor, verse_group_id):
+        # Check if this verse_group has any tags or notes
+        # (every verse_group has verses now, since its range is stored on the row itself)
         cursor.execute('''
-            INSERT OR IGNORE INTO verse_group_verse (verse_group_id, verse_id, book, chapter, verse)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (verse_group_id, verse_id, book, chapter, verse))
-    
-    # Update note directly on verse_group
-    cursor.execute('''
-        UPDATE verse_group SET note = ? WHERE verse_group_id = ?
-    ''', (entry["note"], verse_group_id))
+            SELECT COUNT(*) FROM verse_group_tag WHERE verse_group_id = ?
+        ''', (verse_group_id,))
+        tag_count = cursor.fetchone()[0]
         
-    conn.commit()
-    conn.close()
-
-def delete_verse_note(database_file, verse):
-    entry = verseNoteEntry(verse, "")
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-    
-    # Find verse_group_id(s) that contain this verse range
-    start_verse_id = make_verse_id(entry["start_book"], entry["start_chapter"], entry["start_verse"])
-    
-    try:
-        # Find verse_groups containing this verse
         cursor.execute('''
-            SELECT verse_group_id FROM verse_group_verse WHERE verse_id = ?
-        ''', (start_verse_id,))
-        verse_groups = cursor.fetchall()
-
-        if not verse_groups:
-            print(f"Verse '{verse}' not found.")
-            conn.close()
-            return
-
-        for (verse_group_id,) in verse_groups:
-            # Set note to NULL on verse_group
-            cursor.execute('''
-                UPDATE verse_group SET note = NULL WHERE verse_group_id = ?
-            ''', (verse_group_id,))
-                
-            # Check if this verse_group has any tags, verses, or notes
+            SELECT note FROM verse_group WHERE verse_group_id = ?
+        ''', (verse_group_id,))
+        note_result = cursor.fetchone()
+        has_note = note_result and note_result[0] is not None
+        
+        # If no tags and no note, delete the verse_group
+        if tag_count == 0 and not has_note:
             cursor.execute('''
-                SELECT COUNT(*) FROM verse_group_tag WHERE verse_group_id = ?
+                DELETE FROM verse_group WHERE verse_group_id = ?
             ''', (verse_group_id,))
-            tag_count = cursor.fetchone()[0]
+
+    def add_tag_tag(self, tag1, tag2):
+        tag1 = tag1.lower()
+        tag2 = tag2.lower()
+
+        with self:
+            cursor = self.cursor()
             
+            # Insert both tags into 'tag' table if they don't exist
             cursor.execute('''
-                SELECT COUNT(*) FROM verse_group_verse WHERE verse_group_id = ?
-            ''', (verse_group_id,))
-            verse_count = cursor.fetchone()[0]
+                INSERT OR IGNORE INTO tag (tag) VALUES (?)
+            ''', (tag1,))
+
+            cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag1,))
+            tag1_id = cursor.fetchone()[0]
             
             cursor.execute('''
-                SELECT note FROM verse_group WHERE verse_group_id = ?
-            ''', (verse_group_id,))
-            note_result = cursor.fetchone()
-            has_note = note_result and note_result[0] is not None
+                INSERT OR IGNORE INTO tag (tag) VALUES (?)
+            ''', (tag2,))
             
-            # If no tags, no verses, and no note, delete the verse_group
-            if tag_count == 0 and verse_count == 0 and not has_note:
-                cursor.execute('''
-                    DELETE FROM verse_group WHERE verse_group_id = ?
-                ''', (verse_group_id,))
-
-        conn.commit()
-        
-    except Exception as e:
-        print("Can't delete note:", e)
-        conn.close()
-        return
+            cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag2,))
+            tag2_id = cursor.fetchone()[0]
 
-    conn.close()
-
-
-def add_tag_note(database_file, tag_name, note):
-    tag_name = tag_name.lower()
-    entry = tagNoteEntry(tag_name, note)
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
+            self._tags_added({tag1: 0, tag2: 0})
+            if tag1_id == tag2_id:
+                return
 
-    # Insert tag into 'tag' table if it doesn't exist
-    cursor.execute('''
-        INSERT OR IGNORE INTO tag (tag) VALUES (?)
-    ''', (entry["tag"],))
+            # Insert association into 'tag_tag' table, in the order the CHECK constraint wants
+            # (OR IGNORE would otherwise skip the pair without a word when tag1 is the newer tag)
+            cursor.execute('''
+                INSERT OR IGNORE INTO tag_tag (tag_1_id, tag_2_id) VALUES (?, ?)
+            ''', (min(tag1_id, tag2_id), max(tag1_id, tag2_id)))
+            if cursor.rowcount > 0:
+                self._union_synonym_groups(cursor, tag1_id, tag2_id)
+
+    def _union_synonym_groups(self, cursor, tag1_id, tag2_id):
+        # union step for a new tag_tag pair. The groups are kept flat (every row points at the
+        # group_id directly), so joining two groups relabels the smaller one
+        cursor.execute('SELECT tag_id, group_id FROM synonym_group WHERE tag_id IN (?, ?)', (tag1_id, tag2_id))
+        group_of = dict(cursor.fetchall())
+        group1 = group_of.get(tag1_id)
+        group2 = group_of.get(tag2_id)
+
+        if group1 is None and group2 is None:
+            group_id = min(tag1_id, tag2_id)
+            cursor.executemany('INSERT INTO synonym_group (tag_id, group_id) VALUES (?, ?)',
+                               [(tag1_id, group_id), (tag2_id, group_id)])
+        elif group1 is None:
+            cursor.execute('INSERT INTO synonym_group (tag_id, group_id) VALUES (?, ?)', (tag1_id, group2))
+        elif group2 is None:
+            cursor.execute('INSERT INTO synonym_group (tag_id, group_id) VALUES (?, ?)', (tag2_id, group1))
+        elif group1 != group2:
+            cursor.execute('SELECT COUNT(*) FROM synonym_group WHERE group_id = ?', (group1,))
+            size1 = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) FROM synonym_group WHERE group_id = ?', (group2,))
+            size2 = cursor.fetchone()[0]
+            keep, relabel = (group1, group2) if size1 >= size2 else (group2, group1)
+            cursor.execute('UPDATE synonym_group SET group_id = ? WHERE group_id = ?', (keep, relabel))
+
+    def _split_synonym_group(self, cursor, tag_id):
+        # after a tag_tag pair is deleted, work out tag_id's old group again from its remaining pairs.
+        # Only that group's tags and pairs are read
+        cursor.execute('SELECT group_id FROM synonym_group WHERE tag_id = ?', (tag_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return
+        group_id = row[0]
 
-    cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (entry["tag"],))
-    tag_id = cursor.fetchone()[0]
+        cursor.execute('''
+            SELECT tt.tag_1_id, tt.tag_2_id
+            FROM synonym_group sg
+            JOIN tag_tag tt ON tt.tag_1_id = sg.tag_id
+            WHERE sg.group_id = ?
+        ''', (group_id,))
+        groups = synonym_components(cursor.fetchall())
+
+        # tags left without any synonym drop out of the table
+        cursor.execute('DELETE FROM synonym_group WHERE group_id = ?', (group_id,))
+        cursor.executemany('INSERT INTO synonym_group (tag_id, group_id) VALUES (?, ?)', groups.items())
+
+    def delete_tag_tag(self, tag1, tag2):
+        tag1 = tag1.lower()
+        tag2 = tag2.lower()
+
+        with self:
+            cursor = self.cursor()
+            
+            # Get tag IDs
+            cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag1,))
+            tag1_result = cursor.fetchone()
+            cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag2,))
+            tag2_result = cursor.fetchone()
+
+            if not tag1_result or not tag2_result:
+                print(f"Tag '{tag1}' or tag '{tag2}' not found.")
+                return
+                
+            tag1_id = tag1_result[0]
+            tag2_id = tag2_result[0]
 
-    # Update note directly on tag
-    cursor.execute('''
-        UPDATE tag SET note = ? WHERE tag_id = ?
-    ''', (entry["note"], tag_id))
-    
-    conn.commit()
-    conn.close()
+            # Ensure we handle both orderings of the tag pair
+            # Since we have CHECK (tag_1_id < tag_2_id), normalize the order
+            if tag1_id > tag2_id:
+                tag1_id, tag2_id = tag2_id, tag1_id
+            
+            # Delete the association (only one direction due to CHECK constraint)
+            cursor.execute('''
+                DELETE FROM tag_tag WHERE tag_1_id = ? AND tag_2_id = ?
+            ''', (tag1_id, tag2_id))
+            if cursor.rowcount > 0:
+                self._split_synonym_group(cursor, tag1_id)
+            
+            # Don't delete orphaned tags (per user requirement)
+
+    def add_verse_note(self, verse_ref, note, bible_data):
+        self.add_verse_notes_bulk([(verse_ref, note)], bible_data)
+
+    def add_verse_notes_bulk(self, entries, bible_data):
+        """
+        Add many verse notes at once. entries is a list of (verse_ref, note) pairs.
+        Like add_verse_tags_bulk, a range that already has a verse_group gets the note
+        on that group (replacing the note it had, which is how a note is edited), and
+        other ranges get a new verse_group. If a range comes up more than once, its last
+        note wins. Everything is written with executemany in one transaction.
+        Returns the verse_group_ids in the same order as entries.
+        """
+        entries = [verseNoteEntry(verse_ref, note, self.bible_index) for verse_ref, note in entries]
+        intervals = [self._entry_interval(entry) for entry in entries]
+        if not entries:
+            return []
+
+        with self:
+            self._data_changed()
+            cursor = self.cursor()
+            if not self.conn.in_transaction:
+                cursor.execute('BEGIN IMMEDIATE')
+
+            # the note for each range, last one winning
+            notes = dict(zip(intervals, (entry["note"] for entry in entries)))
+            group_ids = self._find_verse_groups(cursor, notes)
+            cursor.executemany('''
+                UPDATE verse_group SET note = ? WHERE verse_group_id = ?
+            ''', [(notes[interval], verse_group_id) for interval, verse_group_id in group_ids.items()])
+
+            missing = [interval for interval in notes if interval not in group_ids]
+            group_ids.update(zip(missing, self._insert_verse_groups(cursor, [notes[interval] for interval in missing], missing)))
+
+            return [group_ids[interval] for interval in intervals]
+
+    def delete_verse_note(self, verse):
+        entry = verseNoteEntry(verse, "", self.bible_index)
+        
+        # Find verse_group_id(s) that contain this verse range
+        start_ordinal = make_verse_ordinal(entry["start_book"], entry["start_chapter"], entry["start_verse"])
+        
+        try:
+            with self:
+                self._data_changed()
+                cursor = self.cursor()
 
+                # Find verse_groups containing this verse
+                cursor.execute('''
+                    SELECT verse_group_id FROM verse_group WHERE start_ordinal <= ? AND end_ordinal >= ?
+                ''', (start_ordinal, start_ordinal))
+                verse_groups = cursor.fetchall()
+
+                if not verse_groups:
+                    print(f"Verse '{verse}' not found.")
+                    return
+
+                for (verse_group_id,) in verse_groups:
+                    # Set note to NULL on verse_group
+                    cursor.execute('''
+                        UPDATE verse_group SET note = NULL WHERE verse_group_id = ?
+                    ''', (verse_group_id,))
+                        
+                    # If no tags and no note, delete the verse_group
+                    self._delete_verse_group_if_empty(cursor, verse_group_id)
+            
+        except Exception as e:
+            print("Can't delete note:", e)
 
-def delete_tag_note(database_file, tag):
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-    
-    # Get tag ID
-    cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag,))
-    tag_result = cursor.fetchone()
-    
-    if not tag_result:
-        print(f"Tag '{tag}' not found.")
-        conn.close()
-        return
-        
-    tag_id = tag_result[0]
+    def add_tag_note(self, tag_name, note):
+        tag_name = tag_name.lower()
+        entry = tagNoteEntry(tag_name, note)
 
-    # Set note to NULL on tag
-    cursor.execute('''
-        UPDATE tag SET note = NULL WHERE tag_id = ?
-    ''', (tag_id,))
-    
-    # Don't delete orphaned tags (per user requirement)
+        with self:
+            cursor = self.cursor()
 
-    conn.commit()
-    conn.close()
+            # Insert tag into 'tag' table if it doesn't exist
+            cursor.execute('''
+                INSERT OR IGNORE INTO tag (tag) VALUES (?)
+            ''', (entry["tag"],))
 
+            cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (entry["tag"],))
+            tag_id = cursor.fetchone()[0]
 
+            # Update note directly on tag
+            cursor.execute('''
+                UPDATE tag SET note = ? WHERE tag_id = ?
+            ''', (entry["note"], tag_id))
 
-######################
-#STEP 4: READ THE DB
-######################
+            self._tags_added({entry["tag"]: 0})
 
-def get_db_stuff(database_file, x_type, y_type, y_value):
-    # one-size-fits-all to get all X's in relation to Y.
-    # for example, if X is note, and Y is verse: select all notes for that verse.
-    # tolerable xy_type values are.... "note", "verse", "tag"
+    def delete_tag_note(self, tag):
+        with self:
+            cursor = self.cursor()
+            
+            # Get tag ID
+            cursor.execute('SELECT tag_id FROM tag WHERE tag = ?', (tag,))
+            tag_result = cursor.fetchone()
+            
+            if not tag_result:
+                print(f"Tag '{tag}' not found.")
+                return
+                
+            tag_id = tag_result[0]
 
-    if y_type == "tag":
-        y_value = y_value.lower()
-    
-    #let's just double check that I didn't make a programming error.....
-    if x_type not in ["verse", "tag", "note"] or y_type not in ["verse", "tag", "note"]:
-        print("bad parameters in get_db_stuff. types must be verse, tag, or note.")
-        return None
+            # Set note to NULL on tag
+            cursor.execute('''
+                UPDATE tag SET note = NULL WHERE tag_id = ?
+            ''', (tag_id,))
+            
+            # Don't delete orphaned tags (per user requirement)
+
+    ######################
+    # STEP 4: READ THE DB
+    ######################
+    def get_db_stuff(self, x_type, y_type, y_value):
+        # one-size-fits-all to get all X's in relation to Y.
+        # for example, if X is note, and Y is verse: select all notes for that verse.
+        # tolerable xy_type values are.... "note", "verse", "tag"
+
+        if y_type == "tag":
+            y_value = y_value.lower()
+        
+        #let's just double check that I didn't make a programming error.....
+        if x_type not in ["verse", "tag", "note"] or y_type not in ["verse", "tag", "note"]:
+            print("bad parameters in get_db_stuff. types must be verse, tag, or note.")
+            return None
 
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
+        cursor = self.cursor()
 
-    result = []
+        result = []
 
-    if y_type == "verse": 
-        # Get tags or notes for a verse
-        y_value_parsed = parseVerseReference(y_value)
-        verse_id = make_verse_id(y_value_parsed["sb"], y_value_parsed["sc"], y_value_parsed["sv"])
-        
-        if x_type == "tag":
-            query_string = '''
-                SELECT t.*
-                FROM tag t
-                JOIN verse_group_tag vgt ON t.tag_id = vgt.tag_id
-                JOIN verse_group_verse vgv ON vgt.verse_group_id = vgv.verse_group_id
-                WHERE vgv.verse_id = ?
-            '''
-            cursor.execute(query_string, (verse_id,))
-        elif x_type == "note":
-            query_string = '''
-                SELECT vg.note
-                FROM verse_group vg
-                JOIN verse_group_verse vgv ON vg.verse_group_id = vgv.verse_group_id
-                WHERE vgv.verse_id = ? AND vg.note IS NOT NULL
-            '''
-            cursor.execute(query_string, (verse_id,))
+        if y_type == "verse": 
+            # Get tags or notes for a verse
+            y_value_parsed = parseVerseReference(y_value, self.bible_index)
+            ordinal = make_verse_ordinal(y_value_parsed["sb"], y_value_parsed["sc"], y_value_parsed["sv"])
             
-    elif x_type == y_type == "tag":   
-        # Get related tags (tag_tag)     
-        query_string = '''
-            SELECT t2.*
-            FROM tag as t1
-            JOIN tag_tag AS tt ON (t1.tag_id = tt.tag_1_id OR t1.tag_id = tt.tag_2_id)
-            JOIN tag AS t2 ON (tt.tag_1_id = t2.tag_id OR tt.tag_2_id = t2.tag_id) AND t2.tag_id != t1.tag_id
-            WHERE t1.tag = ? AND t2.tag != ?
-        '''
-        cursor.execute(query_string, (y_value, y_value))
-        
-    elif y_type == "tag":
-        # Get verses or notes for a tag
-        if x_type == "verse":
-            # Get all verse_groups that have this tag
+            if x_type == "tag":
+                query_string = '''
+                    SELECT t.*
+                    FROM tag t
+                    JOIN verse_group_tag vgt ON t.tag_id = vgt.tag_id
+                    JOIN verse_group vg ON vgt.verse_group_id = vg.verse_group_id
+                    WHERE vg.start_ordinal <= ? AND vg.end_ordinal >= ?
+                '''
+                cursor.execute(query_string, (ordinal, ordinal))
+            elif x_type == "note":
+                query_string = '''
+                    SELECT vg.note
+                    FROM verse_group vg
+                    WHERE vg.start_ordinal <= ? AND vg.end_ordinal >= ? AND vg.note IS NOT NULL
+                '''
+                cursor.execute(query_string, (ordinal, ordinal))
+                
+        elif x_type == y_type == "tag":   
+            # Get related tags (tag_tag)     
             query_string = '''
-                SELECT DISTINCT vg.verse_group_id
-                FROM verse_group vg
-                JOIN verse_group_tag vgt ON vg.verse_group_id = vgt.verse_group_id
-                JOIN tag t ON vgt.tag_id = t.tag_id
-                WHERE t.tag = ?
+                SELECT t2.*
+                FROM tag as t1
+                JOIN tag_tag AS tt ON (t1.tag_id = tt.tag_1_id OR t1.tag_id = tt.tag_2_id)
+                JOIN tag AS t2 ON (tt.tag_1_id = t2.tag_id OR tt.tag_2_id = t2.tag_id) AND t2.tag_id != t1.tag_id
+                WHERE t1.tag = ? AND t2.tag != ?
             '''
-            cursor.execute(query_string, (y_value,))
-            verse_group_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(query_string, (y_value, y_value))
             
-            # For each verse_group, get the range of verses
-            for vg_id in verse_group_ids:
+        elif y_type == "tag":
+            # Get verses or notes for a tag
+            if x_type == "verse":
+                # Every verse_group with this tag and its range, in one pass over the
+                # (tag_id, verse_group_id) covering index
                 cursor.execute('''
-                    SELECT book, chapter, verse
-                    FROM verse_group_verse
-                    WHERE verse_group_id = ?
-                    ORDER BY book, chapter, verse
-                ''', (vg_id,))
-                verses_in_group = cursor.fetchall()
-                
-                if verses_in_group:
-                    first = verses_in_group[0]
-                    last = verses_in_group[-1]
-                    result.append({
-                        'verse_group_id': vg_id,
-                        'start_book': first[0],
-                        'start_chapter': first[1],
-                        'start_verse': first[2],
-                        'end_book': last[0],
-                        'end_chapter': last[1],
-                        'end_verse': last[2]
-                    })
-            
-            conn.close()
-            return result
-        elif x_type == "note":
-            # Get note for this tag
+                    SELECT DISTINCT vg.verse_group_id, vg.start_ordinal, vg.end_ordinal
+                    FROM tag t
+                    JOIN verse_group_tag vgt ON vgt.tag_id = t.tag_id
+                    JOIN verse_group vg ON vg.verse_group_id = vgt.verse_group_id
+                    WHERE t.tag = ?
+                ''', (y_value,))
+                for vg_id, start_ordinal, end_ordinal in cursor.fetchall():
+                    result.append(verse_group_range(vg_id, start_ordinal, end_ordinal))
+
+                return result
+            elif x_type == "note":
+                # Get note for this tag
+                query_string = '''
+                    SELECT t.note
+                    FROM tag t
+                    WHERE t.tag = ? AND t.note IS NOT NULL
+                '''
+                cursor.execute(query_string, (y_value,))
+        elif y_type == "note" and x_type == "verse":
+            # get all verse_group_id's that have a note matching y_value
             query_string = '''
-                SELECT t.note
-                FROM tag t
-                WHERE t.tag = ? AND t.note IS NOT NULL
+                SELECT DISTINCT vg.verse_group_id
+                FROM verse_group vg
+                WHERE vg.note = ?
             '''
             cursor.execute(query_string, (y_value,))
-    elif y_type == "note" and x_type == "verse":
-        # get all verse_group_id's that have a note matching y_value
+        else:
+            # Other cases not yet implemented
+            print(f"get_db_stuff: combination x_type={x_type}, y_type={y_type} not yet implemented")
+            return []
+
+        column_names = [description[0] for description in cursor.description]
+        rows = cursor.fetchall()
+
+        for row in rows:
+            row_dict = dict(zip(column_names, row))
+            result.append(row_dict)
+
+        return result
+
+    def get_tag_verse_ranges(self, tags=None):
+        """
+        Verse ranges for many tags at once: {tag: [range dict, ...]}, where each range dict is
+        what get_db_stuff("verse", "tag", tag) returns. Pass tags=None to get every tag.
+        Tags with no verses map to an empty list. Uses one query per 500 tags instead of one per tag.
+        """
+        cursor = self.cursor()
         query_string = '''
-            SELECT DISTINCT vg.verse_group_id
-            FROM verse_group vg
-            WHERE vg.note = ?
+            SELECT t.tag, vg.verse_group_id, vg.start_ordinal, vg.end_ordinal
+            FROM tag t
+            JOIN verse_group_tag vgt ON vgt.tag_id = t.tag_id
+            JOIN verse_group vg ON vg.verse_group_id = vgt.verse_group_id
         '''
-        cursor.execute(query_string, (y_value,))
-    else:
-        # Other cases not yet implemented
-        print(f"get_db_stuff: combination x_type={x_type}, y_type={y_type} not yet implemented")
-        conn.close()
-        return []
 
-    column_names = [description[0] for description in cursor.description]
-    rows = cursor.fetchall()
+        if tags is None:
+            cursor.execute("SELECT tag FROM tag")
+            result = {row[0]: [] for row in cursor.fetchall()}
+            cursor.execute(query_string)
+            rows = cursor.fetchall()
+        else:
+            result = {tag.lower(): [] for tag in tags}
+            tag_names = list(result)
+            rows = []
+            for i in range(0, len(tag_names), 500):
+                chunk = tag_names[i:i + 500]
+                cursor.execute(query_string + 'WHERE t.tag IN ({})'.format(','.join('?' * len(chunk))), chunk)
+                rows.extend(cursor.fetchall())
+
+        for tag, vg_id, start_ordinal, end_ordinal in rows:
+            result[tag].append(verse_group_range(vg_id, start_ordinal, end_ordinal))
+        return result
+
+    def get_tag_list(self):
+        # returns all the tags in the database
+        cursor = self.cursor()
+        cursor.execute("SELECT tag_id, tag FROM tag")
+        return cursor.fetchall()
+
+    def get_synonym_pairs(self):
+        # returns every (tag_1_id, tag_2_id) synonym pair
+        cursor = self.cursor()
+        cursor.execute("SELECT tag_1_id, tag_2_id FROM tag_tag")
+        return cursor.fetchall()
+
+    def get_synonyms(self, tag):
+        # returns every other tag in tag's synonym group (its synonyms, their synonyms, and so on),
+        # as the same {"tag_id", "tag", "note"} dicts get_db_stuff("tag", "tag", tag) gives for direct synonyms
+        cursor = self.cursor()
+        cursor.execute('''
+            SELECT t2.*
+            FROM tag t1
+            JOIN synonym_group sg1 ON sg1.tag_id = t1.tag_id
+            JOIN synonym_group sg2 ON sg2.group_id = sg1.group_id
+            JOIN tag t2 ON t2.tag_id = sg2.tag_id
+            WHERE t1.tag = ? AND t2.tag_id != t1.tag_id
+            ORDER BY t2.tag
+        ''', (tag.lower(),))
+        column_names = [description[0] for description in cursor.description]
+        return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+
+    def get_synonym_groups(self):
+        # returns {tag: group_id} for every tag that has a synonym; tags with the same group_id are synonyms
+        cursor = self.cursor()
+        cursor.execute('''
+            SELECT t.tag, sg.group_id
+            FROM synonym_group sg
+            JOIN tag t ON t.tag_id = sg.tag_id
+        ''')
+        return dict(cursor.fetchall())
+
+    def get_all_tag_verse(self):
+        # returns a (tag, verse_id) row for every tagged verse
+        cursor = self.cursor()
+        cursor.execute("""
+            SELECT t.tag, vg.start_ordinal, vg.end_ordinal
+            FROM verse_group_tag vgt
+            JOIN verse_group vg ON vgt.verse_group_id = vg.verse_group_id
+            JOIN tag t ON vgt.tag_id = t.tag_id
+        """)
+        result = []
+        for tag, start_ordinal, end_ordinal in cursor.fetchall():
+            for book, chapter, verse in expand_verse_ordinals(start_ordinal, end_ordinal, self.bible_index):
+                result.append((tag, make_verse_id(book, chapter, verse)))
+        return result
+
+    def get_note(self, verse_ref, bible_data):
+        """
+        Get the note for a verse group that matches the given verse reference.
+        Returns the note text or None if no exact match found.
+        """
+        # Parse the verse reference
+        parsed = parseVerseReference(verse_ref, self.bible_index)
+        if not parsed:
+            return None
+
+        cursor = self.cursor()
+
+        # The reference as an ordinal range
+        ref_start = make_verse_ordinal(parsed["sb"], parsed["sc"], parsed["sv"])
+        ref_end = make_verse_ordinal(parsed["eb"], parsed["ec"], parsed["ev"])
+        ref_start, ref_end = min(ref_start, ref_end), max(ref_start, ref_end)
+
+        # A verse group's range is its whole verse set, so an exact match is
+        # one probe of idx_verse_group_interval
+        cursor.execute("""
+            SELECT vg.note
+            FROM verse_group vg
+            WHERE vg.start_ordinal = ? AND vg.end_ordinal = ?
+            AND vg.note IS NOT NULL
+            ORDER BY vg.verse_group_id
+            LIMIT 1
+        """, (ref_start, ref_end))
+
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def get_overlapping_notes(self, verse_ref, bible_data):
+        """
+        Get all verse groups that have notes and overlap with the given verse reference.
+        Returns a list of normalized verse reference strings, in Bible order.
+        """
+        # Parse the verse reference to get the range
+        parsed = parseVerseReference(verse_ref, self.bible_index)
+        if not parsed:
+            return []
+        ref_start, ref_end = self._entry_interval(tagVerseEntry(verse_ref, None, self.bible_index))
+
+        cursor = self.cursor()
+
+        # Every noted verse_group whose range overlaps ours, with its bounds, in one query
+        cursor.execute("""
+            SELECT vg.verse_group_id, vg.start_ordinal, vg.end_ordinal
+            FROM verse_group vg
+            WHERE vg.note IS NOT NULL
+            AND vg.start_ordinal <= ? AND vg.end_ordinal >= ?
+            ORDER BY vg.start_ordinal, vg.end_ordinal, vg.verse_group_id
+        """, (ref_end, ref_start))
+
+        return [normalize_vref(verse_group_range(vg_id, start_ordinal, end_ordinal), self.bible_index)
+                for vg_id, start_ordinal, end_ordinal in cursor.fetchall()]
+
+    def search_notes(self, query, limit=100):
+        """
+        Full-text search over verse notes and tag notes, best matches first.
+
+        query uses FTS5 syntax: words (all must match), "a phrase", prefix*, OR, NOT.
+        Input that isn't valid FTS5 syntax is searched as plain words instead.
+
+        Returns a list of dicts, at most limit of them:
+            {"kind": "verse", "ref": normalized verse reference, "start_ref": first verse,
+             "end_ref": last verse, "snippet": ...}
+            {"kind": "tag", "ref": tag name, "snippet": ...}
+        where snippet is the part of the note around the matches, with matched words in [brackets].
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        # bm25 ranks (lower is better) from both indexes, merged into one list
+        search_query = """
+            SELECT 'verse', vg.verse_group_id, vg.start_ordinal, vg.end_ordinal,
+                   snippet(verse_group_note_fts, 0, '[', ']', '...', 16), verse_group_note_fts.rank AS score
+            FROM verse_group_note_fts
+            JOIN verse_group vg ON vg.verse_group_id = verse_group_note_fts.rowid
+            WHERE verse_group_note_fts MATCH ?
+            UNION ALL
+            SELECT 'tag', t.tag_id, t.tag, NULL,
+                   snippet(tag_note_fts, 0, '[', ']', '...', 16), tag_note_fts.rank AS score
+            FROM tag_note_fts
+            JOIN tag t ON t.tag_id = tag_note_fts.rowid
+            WHERE tag_note_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+        """
+        cursor = self.cursor()
+        try:
+            cursor.execute(search_query, (query, query, limit))
+        except sqlite3.OperationalError:
+            plain_query = fts_plain_words(query)
+            try:
+                cursor.execute(search_query, (plain_query, plain_query, limit))
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Invalid search: {e}")
+
+        book_names = _bible_index(self.bible_index).book_names
+        results = []
+        for kind, item_id, first, last, snippet, score in cursor.fetchall():
+            if kind == "tag":
+                results.append({"kind": "tag", "ref": first, "snippet": snippet})
+                continue
+            start_book, start_chapter, start_verse = split_verse_ordinal(first)
+            end_book, end_chapter, end_verse = split_verse_ordinal(last)
+            results.append({
+                "kind": "verse",
+                "ref": normalize_vref(verse_group_range(item_id, first, last), self.bible_index),
+                "start_ref": f"{book_names[start_book]} {start_chapter}:{start_verse}",
+                "end_ref": f"{book_names[end_book]} {end_chapter}:{end_verse}",
+                "snippet": snippet,
+            })
+        return results
+
+    def tag_exists(self, tag):
+        # Return True if tag exists, otherwise False
+        cursor = self.cursor()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM tag WHERE tag = ? LIMIT 1)", (tag,))
+        tag_exists = cursor.fetchone()[0]  # fetchone returns a tuple, get the first element
+        return bool(tag_exists)
+
+    def find_note_tag_chapters(self):
+        #return a list of book/chapter, formatted like the Treeview tags, for every chapter that has notes and tags.
+        cursor = self.cursor()
+
+        #get the range of every verse_group which has tags or notes
+        cursor.execute('''
+            SELECT vg.start_ordinal, vg.end_ordinal
+            FROM verse_group vg
+            WHERE vg.note IS NOT NULL
+               OR EXISTS (SELECT 1 FROM verse_group_tag vgt WHERE vgt.verse_group_id = vg.verse_group_id)
+            ''',)
+
+        chapters = set()
+        for start_ordinal, end_ordinal in cursor.fetchall():
+            chapters.update(iterate_chapter_range(start_ordinal, end_ordinal, self.bible_index))
 
-    for row in rows:
-        row_dict = dict(zip(column_names, row))
-        result.append(row_dict)
+        book_names = _bible_index(self.bible_index).book_names
+        tagged_chapters = []
+        for book, chapter in sorted(chapters):
+            bc = "/"+book_names[book] + '/Ch ' + str(chapter)
+            tagged_chapters.append(bc)
+
+        return tagged_chapters
+
+    def get_all_verses_with_notes(self):
+        #returns a list of dictionary entries:
+        # [ {"verse":string_verse_ref, "note", string_note},...]
+        cursor = self.cursor()
+
+        # Get all verse_groups that have notes
+        cursor.execute("""
+                SELECT vg.verse_group_id, vg.start_ordinal, vg.end_ordinal, vg.note
+                FROM verse_group vg
+                WHERE vg.note IS NOT NULL
+            """)
+
+        verses_notes = []
+        for vg_id, start_ordinal, end_ordinal, note_text in cursor.fetchall():
+            verse_ref = normalize_vref(verse_group_range(vg_id, start_ordinal, end_ordinal), self.bible_index)
+            verses_notes.append({"verse": verse_ref, "note": note_text})
+
+        return verses_notes
+
+    def find_note_tag_verses(self, book, chapter):
+        # for a given book and chapter, get all verse ranges that have tags and/or notes.
+        # this function is used to make the little indicator lines to the left of the verses in the UI.
+        # It runs on every redraw, so results are cached per chapter until the database changes.
+        book = getBookIndex(book, self.bible_index)
+        if book == -1:
+            return None
+
+        cursor = self.cursor()
+
+        cursor.execute("PRAGMA data_version")
+        version = (self._write_generation, cursor.fetchone()[0])
+        if version != self._annotation_cache_version:
+            self._annotation_cache.clear()
+            self._annotation_cache_version = version
+        cached = self._annotation_cache.get((book, int(chapter)))
+        if cached is not None:
+            # copies, so a caller changing a row can't change the cache
+            return [dict(row) for row in cached]
+
+        # every verse_group overlapping this chapter
+        chapter_lo = make_verse_ordinal(book, chapter, 0)
+        chapter_hi = make_verse_ordinal(book, chapter, 999)
+
+        # Get all verse_groups that have tags
+        cursor.execute('''
+            SELECT vg.verse_group_id, vg.start_ordinal, vg.end_ordinal
+            FROM verse_group vg
+            WHERE vg.start_ordinal <= ? AND vg.end_ordinal >= ?
+                AND vg.verse_group_id IN (
+                    SELECT verse_group_id FROM verse_group_tag
+                )
+            ''', (chapter_hi, chapter_lo))
+        tagged_groups = {row[0]: row for row in cursor.fetchall()}
+
+        # Get all verse_groups that have notes
+        cursor.execute('''
+            SELECT vg.verse_group_id, vg.start_ordinal, vg.end_ordinal
+            FROM verse_group vg
+            WHERE vg.start_ordinal <= ? AND vg.end_ordinal >= ?
+                AND vg.note IS NOT NULL
+            ''', (chapter_hi, chapter_lo))
+        noted_groups = {row[0]: row for row in cursor.fetchall()}
+
+        # Combine all unique verse_groups
+        all_groups = dict(tagged_groups)
+        all_groups.update(noted_groups)
+
+        combined_verses = []
+        for verse_group_id, start_ordinal, end_ordinal in all_groups.values():
+            # Determine the type
+            if verse_group_id in tagged_groups and verse_group_id in noted_groups:
+                type_str = "both"
+            elif verse_group_id in tagged_groups:
+                type_str = "tag"
+            else:
+                type_str = "note"
+
+            # Build result in old format for compatibility
+            row_dict = verse_group_range(verse_group_id, start_ordinal, end_ordinal)
+            row_dict['type'] = type_str
+            combined_verses.append(row_dict)
+
+        self._annotation_cache[(book, int(chapter))] = tuple(combined_verses)
+        return [dict(row) for row in combined_verses]
+
+    def get_tags_like(self, partial_tag, limit=50):
+        # returns the tags in the database that contain partial_tag, best matches first (see TagIndex.search),
+        # as (tag,) rows like the query this used to run
+        return [(tag,) for tag in self.tag_index().search(partial_tag, limit)]
+
+    def cleanup_database(self, delete_unused_tags=False, vacuum=False):
+        """
+        Cleanup the database by:
+        1. Setting empty/whitespace string notes to NULL for both tags and verse_groups
+        2. Deleting orphaned verse_groups (no tags and no note), and any verse_group_tag,
+           tag_tag or synonym_group rows left pointing at a verse_group or tag that's gone
+        3. If delete_unused_tags, deleting tags with no verses, no note and no synonyms
+        4. Refreshing the query planner's statistics (ANALYZE, PRAGMA optimize)
+        5. If vacuum, giving the free pages back to the file system. This is a full VACUUM,
+           which rewrites the whole file, unless the database was made with
+           auto_vacuum = INCREMENTAL (none of ours are), when it's PRAGMA incremental_vacuum
+
+        Every step is one statement over the whole table, so nothing is limited by how many
+        ids fit in a query.
+
+        Returns {"empty_notes", "orphaned_groups", "dangling_rows", "unused_tags",
+                 "free_bytes", "bytes_before", "bytes_after", "steps": [(step name, seconds), ...]}
+        free_bytes is the size of the free pages after the deletes, which is what a VACUUM gives
+        back. bytes_before and bytes_after are the file's size just before and after the VACUUM
+        step (the same if vacuum is False).
+        """
+        cursor = self.cursor()
+        report = {"empty_notes": 0, "orphaned_groups": 0, "dangling_rows": 0, "unused_tags": 0, "steps": []}
+
+        def timed(name, function):
+            start = time.perf_counter()
+            function()
+            report["steps"].append((name, time.perf_counter() - start))
+
+        def database_bytes():
+            cursor.execute("PRAGMA page_count")
+            page_count = cursor.fetchone()[0]
+            cursor.execute("PRAGMA page_size")
+            return page_count * cursor.fetchone()[0]
+
+        def free_bytes():
+            cursor.execute("PRAGMA freelist_count")
+            freelist_count = cursor.fetchone()[0]
+            cursor.execute("PRAGMA page_size")
+            return freelist_count * cursor.fetchone()[0]
+
+        def clean_notes():
+            # STEP 1: Set empty/whitespace string notes to NULL for tags and verse_groups
+            for table in ("tag", "verse_group"):
+                cursor.execute(f"""
+                    UPDATE {table}
+                    SET note = NULL
+                    WHERE note IS NOT NULL AND trim(note) = ''
+                """)
+                report["empty_notes"] += cursor.rowcount
+
+        def delete_orphans():
+            # STEP 2: Delete orphaned verse_groups (no tags and no note)
+            # We don't check for verses because a verse_group with verses but no tags or note is worthless
+            #    and can be remade when a tag or note is added.
+            cursor.execute("""
+                DELETE FROM verse_group
+                WHERE note IS NULL
+                  AND NOT EXISTS (SELECT 1 FROM verse_group_tag vgt WHERE vgt.verse_group_id = verse_group.verse_group_id)
+            """)
+            report["orphaned_groups"] = cursor.rowcount
+
+            # rows whose verse_group or tag is gone (foreign keys aren't enforced, so these can pile up)
+            cursor.execute("""
+                DELETE FROM verse_group_tag
+                WHERE NOT EXISTS (SELECT 1 FROM verse_group vg WHERE vg.verse_group_id = verse_group_tag.verse_group_id)
+                   OR NOT EXISTS (SELECT 1 FROM tag t WHERE t.tag_id = verse_group_tag.tag_id)
+            """)
+            report["dangling_rows"] += cursor.rowcount
+            delete_dangling_synonyms()
+
+        def delete_dangling_synonyms():
+            cursor.execute("""
+                DELETE FROM tag_tag
+                WHERE NOT EXISTS (SELECT 1 FROM tag t WHERE t.tag_id = tag_tag.tag_1_id)
+                   OR NOT EXISTS (SELECT 1 FROM tag t WHERE t.tag_id = tag_tag.tag_2_id)
+            """)
+            dangling_pairs = cursor.rowcount
+            cursor.execute("""
+                DELETE FROM synonym_group
+                WHERE NOT EXISTS (SELECT 1 FROM tag t WHERE t.tag_id = synonym_group.tag_id)
+            """)
+            report["dangling_rows"] += dangling_pairs + cursor.rowcount
+            if dangling_pairs:
+                # a pair going away can split a synonym group
+                rebuild_synonym_groups(cursor)
+
+        def delete_tags():
+            # STEP 3: tags nothing refers to any more
+            cursor.execute("""
+                DELETE FROM tag
+                WHERE note IS NULL
+                  AND NOT EXISTS (SELECT 1 FROM verse_group_tag vgt WHERE vgt.tag_id = tag.tag_id)
+                  AND NOT EXISTS (SELECT 1 FROM tag_tag tt WHERE tt.tag_1_id = tag.tag_id OR tt.tag_2_id = tag.tag_id)
+            """)
+            report["unused_tags"] = cursor.rowcount
+            self._tag_index = None
+
+        def incremental_vacuum():
+            cursor.execute("PRAGMA incremental_vacuum")
+            cursor.fetchall()
+
+        try:
+            with self:
+                self._data_changed()
+                if not self.conn.in_transaction:
+                    cursor.execute('BEGIN IMMEDIATE')
+                timed("Clean empty notes", clean_notes)
+                timed("Delete orphaned rows", delete_orphans)
+                if delete_unused_tags:
+                    timed("Delete unused tags", delete_tags)
+
+            # STEP 4: refresh the statistics the query planner picks indexes with
+            timed("ANALYZE", lambda: cursor.execute("ANALYZE"))
+            timed("PRAGMA optimize", lambda: cursor.execute("PRAGMA optimize"))
+            report["free_bytes"] = free_bytes()
+
+            # STEP 5: VACUUM can't run inside a transaction, so this comes after the commit.
+            # The size is measured right around it, so the statistics ANALYZE adds aren't counted.
+            report["bytes_before"] = database_bytes()
+            if vacuum:
+                cursor.execute("PRAGMA auto_vacuum")
+                if cursor.fetchone()[0] == 2:
+                    timed("Incremental VACUUM", incremental_vacuum)
+                else:
+                    timed("Full VACUUM", lambda: cursor.execute("VACUUM"))
+            report["bytes_after"] = database_bytes()
+
+            # Log cleanup results
+            print("Database cleanup completed:")
+            if report["empty_notes"] > 0:
+                print(f"  - Cleaned {report['empty_notes']} empty note(s)")
+            if report["orphaned_groups"] > 0:
+                print(f"  - Deleted {report['orphaned_groups']} orphaned verse_group(s)")
+            if report["dangling_rows"] > 0:
+                print(f"  - Deleted {report['dangling_rows']} dangling link row(s)")
+            if report["unused_tags"] > 0:
+                print(f"  - Deleted {report['unused_tags']} unused tag(s)")
+            if vacuum:
+                print(f"  - Reclaimed {report['bytes_before'] - report['bytes_after']} bytes")
+            else:
+                print(f"  - {report['free_bytes']} bytes of free pages left in the file (VACUUM gives them back)")
+            for name, seconds in report["steps"]:
+                print(f"  - {name}: {seconds * 1000:.0f} ms")
+            return report
+
+        except Exception as e:
+            print(f"Error during database cleanup: {e}")
+            raise
+
+    def compact_database(self):
+        """
+        Merge verse_groups that have exactly the same range into one (the oldest).
+
+        Older versions made a new verse_group every time a tag or note was added, so a
+        range with five tags was stored five times. The kept group gets every tag of its
+        duplicates, and their notes joined in order with the same ---MERGED--- line
+        merge_dbs uses (a note that's the same as one already kept isn't repeated).
+
+        Returns {"ranges": ranges that had duplicates, "removed": verse_groups deleted}
+        """
+        with self:
+            self._data_changed()
+            # how often each tag is used changes, so the tag index is rebuilt next time
+            self._tag_index = None
+            cursor = self.cursor()
+            if not self.conn.in_transaction:
+                cursor.execute('BEGIN IMMEDIATE')
+
+            # every duplicate verse_group and the group it goes into
+            cursor.execute("DROP TABLE IF EXISTS temp.compact_group_map")
+            cursor.execute("""
+                CREATE TEMP TABLE compact_group_map AS
+                SELECT vg.verse_group_id AS old_id, keep.keep_id AS new_id
+                FROM verse_group vg
+                JOIN (
+                    SELECT start_ordinal, end_ordinal, MIN(verse_group_id) AS keep_id
+                    FROM verse_group
+                    GROUP BY start_ordinal, end_ordinal
+                    HAVING COUNT(*) > 1
+                ) keep ON keep.start_ordinal = vg.start_ordinal AND keep.end_ordinal = vg.end_ordinal
+                WHERE vg.verse_group_id != keep.keep_id
+            """)
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT new_id) FROM compact_group_map")
+            removed, ranges = cursor.fetchone()
+
+            if removed:
+                # join the notes of each range's groups, oldest first
+                cursor.execute("""
+                    SELECT keep_id, note FROM (
+                        SELECT new_id AS keep_id, new_id AS verse_group_id FROM compact_group_map
+                        UNION
+                        SELECT new_id, old_id FROM compact_group_map
+                    ) g
+                    JOIN verse_group vg ON vg.verse_group_id = g.verse_group_id
+                    WHERE vg.note IS NOT NULL AND trim(vg.note) != ''
+                    ORDER BY keep_id, g.verse_group_id
+                """)
+                notes = {}
+                for keep_id, note in cursor.fetchall():
+                    kept = notes.setdefault(keep_id, [])
+                    if note not in kept:
+                        kept.append(note)
+                cursor.executemany("UPDATE verse_group SET note = ? WHERE verse_group_id = ?",
+                                   [(MERGED_NOTE_SEPARATOR.join(kept), keep_id) for keep_id, kept in notes.items()])
+
+                # move the duplicates' tags onto the kept group, then drop the duplicates
+                cursor.execute("""
+                    INSERT OR IGNORE INTO verse_group_tag (verse_group_id, tag_id)
+                    SELECT m.new_id, vgt.tag_id
+                    FROM compact_group_map m
+                    JOIN verse_group_tag vgt ON vgt.verse_group_id = m.old_id
+                """)
+                cursor.execute("DELETE FROM verse_group_tag WHERE verse_group_id IN (SELECT old_id FROM compact_group_map)")
+                cursor.execute("DELETE FROM verse_group WHERE verse_group_id IN (SELECT old_id FROM compact_group_map)")
+
+            cursor.execute("DROP TABLE temp.compact_group_map")
+
+        print(f"Database compaction completed: merged {removed} duplicate verse_group(s) into {ranges} range(s)")
+        return {"ranges": ranges, "removed": removed}
+
+
+# One pooled session per (database file, thread). The UI thread reuses its session
+# for every call; worker threads each get their own, since sqlite3 connections
+# shouldn't be shared between threads without extra locking.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(database_file):
+    """Return the pooled BibleDB session for database_file on the calling thread."""
+    key = (os.path.abspath(database_file), threading.get_ident())
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = BibleDB(database_file)
+            _sessions[key] = session
+    return session
+
+def close_sessions(database_file=None):
+    """
+    Close pooled sessions for database_file, or every pooled session if it's None.
+    Call this before a database file is overwritten, replaced or migrated.
+    """
+    path = os.path.abspath(database_file) if database_file else None
+    with _sessions_lock:
+        for key in list(_sessions):
+            if path is None or key[0] == path:
+                _sessions.pop(key).close()
 
-    conn.close()
-    return result
+
+######################
+#STEP 3: MODIFY DB DATA
+######################
+def add_verse_tag(database_file, verse_ref, tag_name, bible_data):
+    get_session(database_file).add_verse_tag(verse_ref, tag_name, bible_data)
+
+def add_verse_tags_bulk(database_file, entries, bible_data):
+    # entries: [(verse_ref, tag_name), ...]. Returns the new verse_group_ids in the same order.
+    return get_session(database_file).add_verse_tags_bulk(entries, bible_data)
+
+def delete_verse_tag(database_file, verse, tag):
+    get_session(database_file).delete_verse_tag(verse, tag)
+
+def add_tag_tag(database_file, tag1, tag2):
+    get_session(database_file).add_tag_tag(tag1, tag2)
+
+def delete_tag_tag(database_file, tag1, tag2):
+    get_session(database_file).delete_tag_tag(tag1, tag2)
+
+def add_verse_note(database_file, verse_ref, note, bible_data):
+    get_session(database_file).add_verse_note(verse_ref, note, bible_data)
+
+def add_verse_notes_bulk(database_file, entries, bible_data):
+    # entries: [(verse_ref, note), ...]. Returns the new verse_group_ids in the same order.
+    return get_session(database_file).add_verse_notes_bulk(entries, bible_data)
+
+def delete_verse_note(database_file, verse):
+    get_session(database_file).delete_verse_note(verse)
+
+def add_tag_note(database_file, tag_name, note):
+    get_session(database_file).add_tag_note(tag_name, note)
+
+def delete_tag_note(database_file, tag):
+    get_session(database_file).delete_tag_note(tag)
+
+
+
+######################
+#STEP 4: READ THE DB
+######################
+
+def get_db_stuff(database_file, x_type, y_type, y_value):
+    return get_session(database_file).get_db_stuff(x_type, y_type, y_value)
+
+def get_tag_verse_ranges(database_file, tags=None):
+    # {tag: [verse range dicts]} for a batch of tags (or every tag); see BibleDB.get_tag_verse_ranges
+    if database_file is None:
+        return {}
+    return get_session(database_file).get_tag_verse_ranges(tags)
 
 def get_tag_list(database_file):
     # returns all the tags in the database
     if database_file is None:
         return []
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
+    return get_session(database_file).get_tag_list()
 
-    cursor.execute("SELECT tag_id, tag FROM tag")
-    result = cursor.fetchall()
+def get_synonyms(database_file, tag):
+    if database_file is None:
+        return []
+    return get_session(database_file).get_synonyms(tag)
 
-    # Close the connection
-    conn.close()
-    return result
+def get_synonym_groups(database_file):
+    if database_file is None:
+        return {}
+    return get_session(database_file).get_synonym_groups()
 
 def get_synonym_pairs(database_file):
-    #return a list of book/chapter, formatted like the Treeview tags, for every chapter that has notes and tags.
     if database_file is None:
         return []
-    
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT tag_1_id, tag_2_id FROM tag_tag")
-    result = cursor.fetchall()
-
-    conn.close()
-    return result
+    return get_session(database_file).get_synonym_pairs()
 
 def get_all_tag_verse(database_file):
-    #return a list of book/chapter, formatted like the Treeview tags, for every chapter that has notes and tags.
     if database_file is None:
         return []
-    
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT t.tag, vgv.verse_id 
-        FROM verse_group_tag vgt 
-        JOIN verse_group_verse vgv ON vgt.verse_group_id = vgv.verse_group_id
-        JOIN tag t ON vgt.tag_id = t.tag_id
-    """)
-    result = cursor.fetchall()
-
-    conn.close()
-    return result
+    return get_session(database_file).get_all_tag_verse()
 
 def get_note(database_file, verse_ref, bible_data):
-    """
-    Get the note for a verse group that matches the given verse reference.
-    Returns the note text or None if no exact match found.
-    """
     if database_file is None:
         return None
-    
-    # Parse the verse reference
-    parsed = parseVerseReference(verse_ref)
-    if not parsed:
-        return None
-    
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-    
-    # Expand the verse range to get all verses in the reference
-    verse_range = expand_verse_range(
-        parsed["sb"], int(parsed["sc"]), int(parsed["sv"]),
-        parsed["eb"], int(parsed["ec"]), int(parsed["ev"]),
-        bible_data
-    )
-    
-    # Create a set of verse_ids for the reference
-    ref_verse_ids = set(make_verse_id(v[0], v[1], v[2]) for v in verse_range)
-    
-    # Get all verse groups that have notes and contain at least one of our verses
-    cursor.execute("""
-        SELECT DISTINCT vg.verse_group_id, vg.note
-        FROM verse_group vg
-        JOIN verse_group_verse vgv ON vg.verse_group_id = vgv.verse_group_id
-        WHERE vg.note IS NOT NULL
-        AND vgv.verse_id IN ({})
-    """.format(','.join('?' * len(ref_verse_ids))), tuple(ref_verse_ids))
-    
-    candidates = cursor.fetchall()
-    
-    # For each candidate, check if it's an exact match
-    for vg_id, note in candidates:
-        # Get all verses in this verse_group
-        cursor.execute("""
-            SELECT verse_id FROM verse_group_verse
-            WHERE verse_group_id = ?
-        """, (vg_id,))
-        
-        vg_verse_ids = set(row[0] for row in cursor.fetchall())
-        
-        # Check if the sets are exactly equal
-        if vg_verse_ids == ref_verse_ids:
-            conn.close()
-            return note
-    
-    conn.close()
-    return None
+    return get_session(database_file).get_note(verse_ref, bible_data)
 
 def get_overlapping_notes(database_file, verse_ref, bible_data):
-    """
-    Get all verse groups that have notes and overlap with the given verse reference.
-    Returns a list of dictionaries with verse_group_id, verse_ref, and note.
-    """
     if database_file is None:
         return []
-    
-    # Parse the verse reference to get the range
-    parsed = parseVerseReference(verse_ref)
-    verse_range = expand_verse_range(parsed["sb"], int(parsed["sc"]), int(parsed["sv"]), parsed["eb"], int(parsed["ec"]), int(parsed["ev"]), bible_data)
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-    
-    # Find all verse_groups that:
-    # 1. Have a note (note IS NOT NULL)
-    # 2. Contain at least one verse that overlaps with our range
-    verse_group_ids = set()
-    for verse in iterate_verse_range(verse_range):
-        verse_id = make_verse_id(verse[0], verse[1], verse[2])
-        cursor.execute("""
-            SELECT DISTINCT vg.verse_group_id
-            FROM verse_group vg
-            JOIN verse_group_verse vgv ON vg.verse_group_id = vgv.verse_group_id
-            WHERE vg.note IS NOT NULL
-            AND vgv.verse_id = ?
-        """, (verse_id,))
-
-        for row in cursor.fetchall():
-            verse_group_ids.add(row[0])
-
-    # Now get full details for each verse_group_id
-    results = []
-    for vg_id in verse_group_ids:
-        # Get all verses in this verse_group to build the reference
-        cursor.execute("""
-            SELECT verse_id
-            FROM verse_group_verse
-            WHERE verse_group_id = ?
-            ORDER BY verse_id ASC
-        """, (vg_id,))
-        
-        verses = cursor.fetchall()
-        first_verse = verses[0]
-        last_verse = verses[-1]
-
-        first_book, first_chapter, first_verse_num = extract_book_chapter_verse(first_verse[0])
-        last_book, last_chapter, last_verse_num = extract_book_chapter_verse(last_verse[0])
-        verse_dict = {
-            'verse_group_id': vg_id,
-            'start_book': first_book,
-            'start_chapter': first_chapter,
-            'start_verse': first_verse_num,
-            'end_book': last_book,
-            'end_chapter': last_chapter,
-            'end_verse': last_verse_num
-        }
-        verse_ref = normalize_vref(verse_dict)
-        results.append(verse_ref)
+    return get_session(database_file).get_overlapping_notes(verse_ref, bible_data)
 
-    conn.close()
-    return results
+def search_notes(database_file, query, limit=100):
+    # ranked full-text search over verse and tag notes; see BibleDB.search_notes
+    if database_file is None:
+        return []
+    return get_session(database_file).search_notes(query, limit)
 
 def iterate_verse_range(verse_range):
     # Generator to iterate over a list of verses in the format (book, chapter, verse)
@@ -1373,260 +2422,34 @@ def tag_exists(database_file, tag):
     # Return True if tag exists, otherwise False
     if database_file is None:
         return False
-
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-
-    query = f"SELECT EXISTS(SELECT 1 FROM tag WHERE tag = ? LIMIT 1)"
-    cursor.execute(query, (tag,))
-    tag_exists = cursor.fetchone()[0]  # fetchone returns a tuple, get the first element
-
-    conn.close()
-
-    return bool(tag_exists)
+    return get_session(database_file).tag_exists(tag)
 
 def find_note_tag_chapters(database_file):
-    #return a list of book/chapter, formatted like the Treeview tags, for every chapter that has notes and tags.
     if database_file is None:
         return []
-    
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-
-    #get all verses which have tags or notes via verse_groups
-    cursor.execute('''
-        SELECT DISTINCT 
-            vgv.book AS book,
-            vgv.chapter AS chapter
-        FROM verse_group_verse vgv
-        JOIN verse_group vg ON vgv.verse_group_id = vg.verse_group_id
-        LEFT JOIN verse_group_tag vgt ON vg.verse_group_id = vgt.verse_group_id
-        WHERE vgt.tag_id IS NOT NULL 
-           OR vg.note IS NOT NULL
-        ORDER BY book, chapter;
-        ''',)
-
-    column_names = [description[0] for description in cursor.description]
-    rows = cursor.fetchall()
-    #zip them into a dictionary for easy use
-    tagged_chapters = []
-    for row in rows:
-        bc = "/"+book_proper_names[int(row[0])] + '/Ch ' + str(row[1])
-        tagged_chapters.append(bc)
-
-    return tagged_chapters
+    return get_session(database_file).find_note_tag_chapters()
 
 def get_all_verses_with_notes(database_file):
-    #returns a list of dictionary entries:
-    # [ {"verse":string_verse_ref, "note", string_note},...]
-
     if database_file is None:
         return []
-
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-
-    # Get all verse_groups that have notes
-    cursor.execute("""
-            SELECT DISTINCT vg.verse_group_id, vg.note
-            FROM verse_group vg
-            WHERE vg.note IS NOT NULL
-        """)
-
-    verse_groups = cursor.fetchall()
-    
-    verses_notes = []
-    for vg_id, note_text in verse_groups:
-        # Get all verses in this verse_group
-        cursor.execute("""
-            SELECT book, chapter, verse
-            FROM verse_group_verse
-            WHERE verse_group_id = ?
-            ORDER BY book, chapter, verse
-        """, (vg_id,))
-        
-        verses_in_group = cursor.fetchall()
-        if verses_in_group:
-            # Build a verse range from first to last verse
-            first = verses_in_group[0]
-            last = verses_in_group[-1]
-            verse_dict = {
-                'verse_group_id': vg_id,
-                'start_book': first[0],
-                'start_chapter': first[1],
-                'start_verse': first[2],
-                'end_book': last[0],
-                'end_chapter': last[1],
-                'end_verse': last[2]
-            }
-            verse_ref = normalize_vref(verse_dict)
-            verses_notes.append({"verse": verse_ref, "note": note_text})
-    
-    conn.close()
-    return verses_notes
-
-
+    return get_session(database_file).get_all_verses_with_notes()
 
 def find_note_tag_verses(database_file, book, chapter):
-    # for a given book and chapter, get all verse ranges that have tags and/or notes.
-    # this function is used to make the little indicator lines to the left of the verses in the UI.
     if database_file is None:
         return []
+    return get_session(database_file).find_note_tag_verses(book, chapter)
 
-    book = getBookIndex(qualifyBook(book))
-    if book == -1:
-        return None
-    
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-
-    # Get all verse_groups that have tags
-    cursor.execute('''
-        SELECT DISTINCT vgv.verse_group_id
-        FROM verse_group_verse vgv
-        WHERE vgv.book = ? AND vgv.chapter = ?
-            AND vgv.verse_group_id IN (
-                SELECT verse_group_id FROM verse_group_tag
-            )
-        ''', (book, chapter))
-    tagged_group_ids = set(row[0] for row in cursor.fetchall())
-
-    # Get all verse_groups that have notes
-    cursor.execute('''
-        SELECT DISTINCT vgv.verse_group_id
-        FROM verse_group_verse vgv
-        JOIN verse_group vg ON vgv.verse_group_id = vg.verse_group_id
-        WHERE vgv.book = ? AND vgv.chapter = ?
-            AND vg.note IS NOT NULL
-        ''', (book, chapter))
-    noted_group_ids = set(row[0] for row in cursor.fetchall())
-
-    # Combine all unique verse_group_ids
-    all_group_ids = tagged_group_ids | noted_group_ids
-    
-    combined_verses = []
-    for verse_group_id in all_group_ids:
-        # Get all verses in this verse_group to determine the range
-        cursor.execute('''
-            SELECT book, chapter, verse
-            FROM verse_group_verse
-            WHERE verse_group_id = ?
-            ORDER BY book, chapter, verse
-        ''', (verse_group_id,))
-        
-        verses_in_group = cursor.fetchall()
-        if verses_in_group:
-            first = verses_in_group[0]
-            last = verses_in_group[-1]
-            
-            # Determine the type
-            if verse_group_id in tagged_group_ids and verse_group_id in noted_group_ids:
-                type_str = "both"
-            elif verse_group_id in tagged_group_ids:
-                type_str = "tag"
-            else:
-                type_str = "note"
-            
-            # Build result in old format for compatibility
-            row_dict = {
-                'verse_group_id': verse_group_id,
-                'start_book': first[0],
-                'start_chapter': first[1],
-                'start_verse': first[2],
-                'end_book': last[0],
-                'end_chapter': last[1],
-                'end_verse': last[2],
-                'type': type_str
-            }
-            combined_verses.append(row_dict)
-    
-    conn.close()
-    return combined_verses
-
-def get_tags_like(database_file, partial_tag):
-    # returns a dictionary of all the tags in the database that are like the partial_tag
+def get_tags_like(database_file, partial_tag, limit=50):
     if database_file is None:
         return []
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-
-    partial_tag = partial_tag.lower() #all my tags are lowercase
-    
-    cursor.execute("SELECT tag FROM tag WHERE tag LIKE ?;",("%" + partial_tag + "%",))
-
-    rows = cursor.fetchall()
+    return get_session(database_file).get_tags_like(partial_tag, limit)
 
-    # Close the connection
-    conn.close()
-
-    #return a list of tag names
-    return rows
+def cleanup_database(database_file, delete_unused_tags=False, vacuum=False):
+    if database_file is None:
+        return None
+    return get_session(database_file).cleanup_database(delete_unused_tags, vacuum)
 
-def cleanup_database(database_file):
-    """
-    Cleanup the database by:
-    1. Setting empty/whitespace string notes to NULL for both tags and verse_groups
-    2. Deleting orphaned verse_groups (no tags and no note)
-    """
+def compact_database(database_file):
     if database_file is None:
-        return
-    
-    conn = sqlite3.connect(database_file)
-    cursor = conn.cursor()
-    
-    try:
-        # STEP 1: Set empty/whitespace string notes to NULL for tags
-        cursor.execute("""
-            UPDATE tag 
-            SET note = NULL 
-            WHERE note IS NOT NULL AND trim(note) = ''
-        """)
-        empty_tag_notes = cursor.rowcount
-        
-        # Set empty/whitespace string notes to NULL for verse_groups
-        cursor.execute("""
-            UPDATE verse_group 
-            SET note = NULL 
-            WHERE note IS NOT NULL AND trim(note) = ''
-        """)
-        empty_vg_notes = cursor.rowcount
-        
-        conn.commit()
-        
-        # STEP 2: Find orphaned verse_groups (no tags and no note)
-        # We don't check for verses because a verse_group with verses but no tags or note is worthless
-        #    and can be remade when a tag or note is added.
-        cursor.execute("""
-            SELECT vg.verse_group_id
-            FROM verse_group vg
-            LEFT JOIN verse_group_tag vgt ON vg.verse_group_id = vgt.verse_group_id
-            WHERE vgt.verse_group_id IS NULL
-              AND vg.note IS NULL
-        """)
-        orphaned_ids = [row[0] for row in cursor.fetchall()]
-        
-        # Delete orphaned verse_groups
-        if orphaned_ids:
-            placeholders = ','.join('?' * len(orphaned_ids))
-            cursor.execute(f"""
-                DELETE FROM verse_group 
-                WHERE verse_group_id IN ({placeholders})
-            """, orphaned_ids)
-        
-        conn.commit()
-        
-        # Log cleanup results
-        if empty_tag_notes > 0 or empty_vg_notes > 0 or len(orphaned_ids) > 0:
-            print(f"Database cleanup completed:")
-            if empty_tag_notes > 0:
-                print(f"  - Cleaned {empty_tag_notes} empty tag note(s)")
-            if empty_vg_notes > 0:
-                print(f"  - Cleaned {empty_vg_notes} empty verse_group note(s)")
-            if len(orphaned_ids) > 0:
-                print(f"  - Deleted {len(orphaned_ids)} orphaned verse_group(s)")
-        
-    except Exception as e:
-        print(f"Error during database cleanup: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+        return None
+    return get_session(database_file).compact_database()
@@ -4,7 +4,7 @@ import bibledb_lib as bdblib
 from tkinter.font import Font
 from openpyxl import Workbook
 import os
-from collections import defaultdict, deque
+from collections import defaultdict
 import numpy as np
 import numpy as np
 import matplotlib.pyplot as plt
@@ -98,6 +98,7 @@ class TagInputDialog(simpledialog.Dialog):
         self.selected_tag = None
         self.dbdata = dbdata
         self.bookinputdialog = bookinputdialog
+        self.suggestions_after_id = None
         super().__init__(parent, title=thistitle)
 
     def body(self, master):
@@ -117,6 +118,19 @@ class TagInputDialog(simpledialog.Dialog):
         return self.entry  # Focus on entry widget
 
     def update_suggestions(self, event):
+        # wait until typing pauses before looking anything up, so a fast typist doesn't queue a lookup per key
+        if self.suggestions_after_id:
+            self.after_cancel(self.suggestions_after_id)
+        self.suggestions_after_id = self.after(120, self.show_suggestions)
+
+    def flush_suggestions(self):
+        # show the suggestions now if a lookup is still waiting (e.g. Enter pressed mid-typing)
+        if self.suggestions_after_id:
+            self.after_cancel(self.suggestions_after_id)
+            self.show_suggestions()
+
+    def show_suggestions(self):
+        self.suggestions_after_id = None
         # Get the current input from the entry widget
         partial_tag = self.entry.get()
 
@@ -140,6 +154,7 @@ class TagInputDialog(simpledialog.Dialog):
             self.listbox.grid_remove()
 
     def focus_listbox(self, event):
+        self.flush_suggestions()
         # If there are items in the listbox, select the first one and focus the listbox
         if self.listbox.size() > 0:
             self.listbox.selection_set(0)  # Select the first item
@@ -170,6 +185,7 @@ class TagInputDialog(simpledialog.Dialog):
 
     def apply(self):
         #print("apply")
+        self.flush_suggestions()
         selected = None
         # Get the final tag value (from entry or listbox)
         if self.topselection and self.listbox.size() > 0:
@@ -214,6 +230,7 @@ class DBManager:
         self.dbdata = dbdata #info about the currend db that's open
         self.bible_path = None #path to the currently loaded Bible JSON
         self.top_window = None
+        self.note_search_window = None
         
         # Callbacks for DB operations
         self.load_bible_callback = load_bible_callback
@@ -288,6 +305,63 @@ class DBManager:
         if hasattr(self, 'bible_name_label') and self.bible_name_label:
             self.bible_name_label.config(text=self.get_bible_display_name())
     
+    def search_notes(self, event=None):
+        """Search the verse and tag notes for the text in the search box, and show the results"""
+        query = self.note_search_entry.get()
+        if self.dbdata is None:
+            messagebox.showwarning("No Database", "No database is currently loaded.", parent=self.top_window)
+            return
+
+        if not (self.note_search_window and self.note_search_window.winfo_exists()):
+            self.note_search_window = tk.Toplevel(self.top_window if self.top_window else self.master)
+            self.note_search_window.iconbitmap("./bibletaggericon.ico")
+            self.note_search_window.geometry("750x400")
+
+            results_frame = ttk.Frame(self.note_search_window)
+            results_frame.pack(fill="both", expand=True, padx=5, pady=5)
+            self.note_search_results = ttk.Treeview(results_frame, columns=("ref", "snippet"), show="headings")
+            self.note_search_results.heading("ref", text="Verse / Tag")
+            self.note_search_results.heading("snippet", text="Note")
+            self.note_search_results.column("ref", width=170, stretch=False)
+            self.note_search_results.column("snippet", width=540)
+            vsb = ttk.Scrollbar(results_frame, orient="vertical", command=self.note_search_results.yview)
+            self.note_search_results.configure(yscrollcommand=vsb.set)
+            self.note_search_results.pack(side="left", fill="both", expand=True)
+            vsb.pack(side="right", fill="y")
+            self.note_search_results.bind("<<TreeviewSelect>>", self.on_note_search_click)
+
+            self.note_search_status = ttk.Label(self.note_search_window, text="")
+            self.note_search_status.pack(anchor="w", padx=5, pady=(0, 5))
+        self.note_search_window.title(f"Notes matching: {query}")
+        self.note_search_window.lift()
+
+        try:
+            results = bdblib.search_notes(self.dbdata, query)
+        except ValueError as e:
+            self.note_search_status.config(text=str(e))
+            return
+
+        self.note_search_results.delete(*self.note_search_results.get_children())
+        self.note_search_items = {}
+        for result in results:
+            # tags are shown by name, verses by reference
+            label = "Tag: " + result["ref"] if result["kind"] == "tag" else result["ref"]
+            snippet = " ".join(result["snippet"].split()) #notes can span lines; the list has one line per row
+            item_id = self.note_search_results.insert("", "end", values=(label, snippet))
+            self.note_search_items[item_id] = result
+        self.note_search_status.config(text=f"{len(results)} notes, best matches first")
+
+    def on_note_search_click(self, event=None):
+        #clicking a result goes to that verse or tag in the main window
+        selection = self.note_search_results.selection()
+        if not selection:
+            return
+        result = self.note_search_items[selection[0]]
+        if result["kind"] == "tag":
+            self.callback(result["ref"])
+        else:
+            self.callback((result["start_ref"], result["end_ref"]), "verse")
+
     def cleanup_db(self):
         """Show confirmation dialog and run database cleanup"""
         if self.dbdata is None:
@@ -299,7 +373,7 @@ class DBManager:
         # Create custom dialog with two buttons
         dialog = tk.Toplevel(self.master)
         dialog.title("Cleanup Database")
-        dialog.geometry("450x200")
+        dialog.geometry("450x300")
         dialog.transient(self.top_window if self.top_window else self.master)
         dialog.grab_set()
         
@@ -307,12 +381,20 @@ class DBManager:
         message = (
             "Database Cleanup will:\n\n"
             "1. Delete notes that are empty or whitespace\n"
-            "2. Delete orphaned verse groups (no tags and no note)\n\n"
+            "2. Delete orphaned verse groups (no tags and no note)\n"
+            "3. Refresh the database's query statistics\n\n"
             "This operation cannot be undone, you are advised to create a backup."
         )
         
         label = tk.Label(dialog, text=message, justify=tk.LEFT, padx=20, pady=20)
         label.pack()
+
+        delete_unused_tags = tk.BooleanVar(value=False)
+        vacuum = tk.BooleanVar(value=False)
+        tk.Checkbutton(dialog, text="Also delete unused tags (no verses, note or synonyms)",
+                       variable=delete_unused_tags).pack(anchor='w', padx=20)
+        tk.Checkbutton(dialog, text="Shrink the database file (full VACUUM)",
+                       variable=vacuum).pack(anchor='w', padx=20)
         
         # Button frame
         button_frame = ttk.Frame(dialog)
@@ -348,8 +430,21 @@ class DBManager:
         
         # Run cleanup
         try:
-            bdblib.cleanup_database(self.dbdata)
-            messagebox.showinfo("Cleanup Complete", "Database cleanup completed successfully.")
+            report = bdblib.cleanup_database(self.dbdata, delete_unused_tags.get(), vacuum.get())
+            summary = (
+                f"Database cleanup completed successfully.\n\n"
+                f"Empty notes cleaned: {report['empty_notes']}\n"
+                f"Orphaned verse groups deleted: {report['orphaned_groups']}\n"
+                f"Dangling link rows deleted: {report['dangling_rows']}\n"
+                f"Unused tags deleted: {report['unused_tags']}\n"
+            )
+            if vacuum.get():
+                summary += (f"Space reclaimed: {(report['bytes_before'] - report['bytes_after']) / 1024:.0f} KB "
+                            f"({report['bytes_before'] / 1024:.0f} KB -> {report['bytes_after'] / 1024:.0f} KB)\n\n")
+            else:
+                summary += f"Free space left in the file: {report['free_bytes'] / 1024:.0f} KB (a full VACUUM gives it back)\n\n"
+            summary += "\n".join(f"{name}: {seconds * 1000:.0f} ms" for name, seconds in report["steps"])
+            messagebox.showinfo("Cleanup Complete", summary)
             if self.top_window:
                 self.top_window.lift()
             # Refresh the display
@@ -359,6 +454,38 @@ class DBManager:
             if self.top_window:
                 self.top_window.lift()
 
+    def compact_db(self):
+        """Merge verse groups with identical ranges, after asking first"""
+        if self.dbdata is None:
+            messagebox.showwarning("No Database", "No database is currently loaded.")
+            if self.top_window:
+                self.top_window.lift()
+            return
+
+        message = (
+            "Database Compaction will merge verse groups that cover exactly the same verses into one.\n\n"
+            "Their tags are combined, and different notes on the same verses are joined with a ---MERGED--- line.\n\n"
+            "This operation cannot be undone, you are advised to create a backup.\n\n"
+            "Continue?"
+        )
+        if not messagebox.askyesno("Compact Database", message, parent=self.top_window):
+            if self.top_window:
+                self.top_window.lift()
+            return
+
+        try:
+            result = bdblib.compact_database(self.dbdata)
+            messagebox.showinfo("Compaction Complete",
+                                f"Merged {result['removed']} duplicate verse group(s) into {result['ranges']} range(s).")
+            if self.top_window:
+                self.top_window.lift()
+            # Refresh the display
+            self.display_attributes()
+        except Exception as e:
+            messagebox.showerror("Compaction Failed", f"Database compaction failed:\n{str(e)}")
+            if self.top_window:
+                self.top_window.lift()
+
 
     def populate(self):
         #I am accustomed to dealing with paned windows
@@ -407,9 +534,18 @@ class DBManager:
                   command=self.backup_db_callback).grid(row=7, column=0, sticky="ew", padx=2, pady=2)
         tk.Button(button_container, text="Cleanup DB", 
                   command=self.cleanup_db).grid(row=8, column=0, sticky="ew", padx=2, pady=2)
+        tk.Button(button_container, text="Compact DB", 
+                  command=self.compact_db).grid(row=9, column=0, sticky="ew", padx=2, pady=2)
+
+        # Search box for verse and tag notes; Enter shows the results window
+        ttk.Separator(button_container, orient='horizontal').grid(row=10, column=0, sticky="ew", padx=2, pady=10)
+        ttk.Label(button_container, text="Search notes:", font=('TkDefaultFont', 9, 'bold')).grid(row=11, column=0, sticky="w", padx=2)
+        self.note_search_entry = ttk.Entry(button_container, width=14)
+        self.note_search_entry.grid(row=12, column=0, sticky="ew", padx=2, pady=2)
+        self.note_search_entry.bind("<Return>", self.search_notes)
         
         # Configure button width
-        for i in range(9):
+        for i in range(13):
             button_container.grid_rowconfigure(i, weight=0)
         button_container.grid_columnconfigure(0, weight=1, minsize=100)
         
@@ -603,38 +739,15 @@ class DBManager:
             # Database name is now displayed in the left button panel above the buttons
             
             tag_rows = bdblib.get_tag_list(self.dbdata)
-            tag_to_id = {row[1]: row[0] for row in tag_rows}
-            id_to_tag = {row[0]: row[1] for row in tag_rows}
             checklist = [row[1] for row in tag_rows]
             
-            # Fetch all synonym pairs and build adjacency list (undirected graph)
-            syn_pairs = bdblib.get_synonym_pairs(self.dbdata)
-            adj = defaultdict(list)
-            for t1_id, t2_id in syn_pairs:
-                t1 = id_to_tag[t1_id]
-                t2 = id_to_tag[t2_id]
-                if t2 not in adj[t1]:
-                    adj[t1].append(t2)
-                if t1 not in adj[t2]:
-                    adj[t2].append(t1)
-            
-            # Find connected components (synonym groups) using BFS
-            syngroups = []
-            checked = set()
+            # Synonym groups come straight from the synonym_group table; a tag without synonyms is its own group
+            group_of = bdblib.get_synonym_groups(self.dbdata)
+            group_tags = {}
             for tag in checklist:
-                if tag not in checked:
-                    synonymlist = []
-                    queue = deque([tag])
-                    checked.add(tag)
-                    while queue:
-                        current = queue.popleft()
-                        synonymlist.append(current)
-                        for neighbor in adj[current]:
-                            if neighbor not in checked:
-                                checked.add(neighbor)
-                                queue.append(neighbor)
-                    # Sort tags in group for consistent display
-                    syngroups.append({"tags": sorted(synonymlist)})
+                group_tags.setdefault(group_of.get(tag, tag), []).append(tag)
+            # Sort tags in group for consistent display
+            syngroups = [{"tags": sorted(synonymlist)} for synonymlist in group_tags.values()]
             
             # Fetch all tag-verse associations in one query
             assoc_rows = bdblib.get_all_tag_verse(self.dbdata)
@@ -871,7 +984,7 @@ class VerseSortingPanel(ttk.Frame):
         #replace tagSelect() with the actual code for tag selection, to get the popup.
         selected_tag = TagInputDialog(self.master, self.dbdata, topselection = True).selected_tag
         if (selected_tag is not None) and (selected_tag != "") and bdblib.tag_exists(self.dbdata, selected_tag):
-            selected_tag_synonyms = [b['tag'] for b in bdblib.get_db_stuff(self.dbdata,"tag","tag",selected_tag)]
+            selected_tag_synonyms = [b['tag'] for b in bdblib.get_synonyms(self.dbdata, selected_tag)]
             
             if selected_tag and (selected_tag not in self.tags_list) and all(item not in self.tags_list for item in selected_tag_synonyms):
                 self.tags_list.append(selected_tag)
@@ -925,6 +1038,7 @@ class VerseSortingPanel(ttk.Frame):
 
         def get_verses_for_taglist(tags):
             result = []
+            ranges_by_tag = bdblib.get_tag_verse_ranges(self.dbdata, [tag for synonym_group in tags for tag in synonym_group])
             for synonym_group in tags:
                 verses = []
                 notes = []
@@ -933,7 +1047,7 @@ class VerseSortingPanel(ttk.Frame):
                     if this_note:
                         this_note = this_note[0]['note']
                         notes.append(this_note)
-                    checkverses = bdblib.get_db_stuff(self.dbdata, "verse", "tag", tag)
+                    checkverses = ranges_by_tag[tag.lower()]
                     for verse in checkverses:
                         if verse not in verses:
                             #print(verse)
@@ -990,10 +1104,11 @@ class VerseSortingPanel(ttk.Frame):
         tagslist = self.left_frame.all_tags_list
         def get_verses_for_taglist(tags):
             result = []
+            ranges_by_tag = bdblib.get_tag_verse_ranges(self.dbdata, [tag for synonym_group in tags for tag in synonym_group])
             for synonym_group in tags:
                 verses = []
                 for tag in synonym_group:
-                    checkverses = bdblib.get_db_stuff(self.dbdata, "verse", "tag", tag)
+                    checkverses = ranges_by_tag[tag.lower()]
                     for verse in checkverses:
                         if verse not in verses:
                             verses.append(verse)
@@ -1030,10 +1145,15 @@ class VerseSortingPanel(ttk.Frame):
         folder = os.path.join(out_dir, subfolder_name)
         os.makedirs(folder, exist_ok=True)
         tagslist = self.left_frame.all_tags_list
+        group_of = bdblib.get_synonym_groups(self.dbdata)
+        group_tags = defaultdict(list)
+        for tag, group_id in group_of.items():
+            group_tags[group_id].append(tag)
+        ranges_by_tag = bdblib.get_tag_verse_ranges(self.dbdata, [tag for synonym_group in tagslist for tag in synonym_group])
         for synonym_group in tagslist:
             verses = []
             for tag in synonym_group:
-                checkverses = bdblib.get_db_stuff(self.dbdata, "verse", "tag", tag)
+                checkverses = ranges_by_tag[tag.lower()]
                 for verse in checkverses:
                     if verse not in verses:
                         verses.append(verse)
@@ -1050,22 +1170,13 @@ class VerseSortingPanel(ttk.Frame):
                 co_tags.update(tags)
             checklist = list(co_tags)
             sub_syngroups = []
-            synonymlist = []
-            checkedlist = []
-            synonyms = []
+            checked_groups = set()
             for tag in checklist:
-                if tag not in checkedlist:
-                    checkedlist.append(tag)
-                    synonymlist.append(tag)
-                    synonyms = [b['tag'] for b in bdblib.get_db_stuff(self.dbdata,"tag","tag",tag)]
-                    while len(synonyms) > 0:
-                        synonym = synonyms.pop()
-                        if synonym not in checkedlist:
-                            checkedlist.append(synonym)
-                            synonymlist.append(synonym)
-                            synonyms += [b['tag'] for b in bdblib.get_db_stuff(self.dbdata,"tag","tag",synonym)]
-                    sub_syngroups.append(synonymlist)
-                    synonymlist = []
+                # each co-occurring tag brings its whole synonym group along, once
+                group_id = group_of.get(tag, tag)
+                if group_id not in checked_groups:
+                    checked_groups.add(group_id)
+                    sub_syngroups.append([tag] + sorted(t for t in group_tags.get(group_id, []) if t != tag))
             t_set = set(synonym_group)
             sub_syngroups = [sg for sg in sub_syngroups if set(sg) != t_set]
             sub_data = []
@@ -1327,6 +1438,7 @@ class VerseSortingPanel(ttk.Frame):
         self.parent_window.lift()
         def get_verses_for_taglist(tags):
             result = []
+            ranges_by_tag = bdblib.get_tag_verse_ranges(self.dbdata, [tag for synonym_group in tags for tag in synonym_group])
             for synonym_group in tags:
                 verses = []
                 notes = []
@@ -1335,7 +1447,7 @@ class VerseSortingPanel(ttk.Frame):
                     if this_note:
                         this_note = this_note[0]['note']
                         notes.append(this_note)
-                    checkverses = bdblib.get_db_stuff(self.dbdata, "verse", "tag", tag)
+                    checkverses = ranges_by_tag[tag.lower()]
                     for verse in checkverses:
                         if verse not in verses:
                             verses.append(verse)
@@ -1405,11 +1517,10 @@ class VerseSortingPanel(ttk.Frame):
 
         # Build tag→verse mapping
         tag_to_verses = defaultdict(set)
-        all_tags = [r['tag'] for r in bdblib.get_tag_list(self.dbdata)]
-        all_tags = sorted(set(all_tags))
+        tag_ranges = bdblib.get_tag_verse_ranges(self.dbdata)
+        all_tags = sorted(tag_ranges)
         for t in all_tags:
-            verses = bdblib.get_db_stuff(self.dbdata, "verse", "tag", t)
-            for v in verses:
+            for v in tag_ranges[t]:
                 vref = bdblib.normalize_vref(v)
                 tag_to_verses[t].add(vref)
 
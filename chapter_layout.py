@@ -0,0 +1,334 @@
+"""
+Chapter layout for the scripture panel, without Tk.
+
+layout_chapter works out where everything in a chapter goes: the header, each verse's
+wrapped lines, the footnotes and cross-references at the bottom, and the top and bottom of
+every verse. It returns them as a list of draw operations that ScripturePanel replays onto
+its canvas. layout_annotations does the same for the note/tag bars left of the verses.
+
+Text is measured through a metrics provider, so the layout can be run (and profiled) with
+no display. A provider has two methods, both taking a font name from FONT_NAMES:
+
+    measure(font, text)     width of text in pixels
+    linespace(font)         height of a line in pixels
+
+FontMetrics wraps real fonts (e.g. tkinter.font.Font) as a provider.
+
+OpIndex finds the ops in a horizontal band, so only the part of a chapter that's
+scrolled into view needs to be drawn.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import bibledb_lib
+
+# the fonts a layout refers to
+FONT_NAMES = ("text", "italic", "bold", "italic_underline")
+
+# what's drawn. font is one of FONT_NAMES. Text with a verse number is part of that verse, and
+# its fill (None) is set from the selection when it's drawn; link is where a cross-reference goes.
+TextOp = namedtuple("TextOp", "x y text font fill anchor verse link")
+LineOp = namedtuple("LineOp", "x y x2 y2 fill width")
+# ops are in drawing order; verse_heights is a {'v', 'ordinal', 'top', 'bot'} dict per verse;
+# footnotes maps verse number -> footnote text for the verses that show a footnote tooltip;
+# height is the y just below the last thing drawn
+ChapterLayout = namedtuple("ChapterLayout", "book chapter ops verse_heights footnotes height")
+
+
+class FontMetrics:
+    """
+    Metrics provider for a {font name: font} dict, where each font has measure(text) and
+    metrics("linespace") like tkinter.font.Font.
+
+    Measuring is a round trip to Tk, so each font's word widths are remembered.
+    A Bible's vocabulary is a few tens of thousands of words, so this stays small.
+    """
+
+    def __init__(self, fonts):
+        self.fonts = fonts
+        self._widths = {name: {} for name in fonts}
+        self._linespace = {}
+
+    def measure(self, font, text):
+        widths = self._widths[font]
+        width = widths.get(text)
+        if width is None:
+            width = widths[text] = self.fonts[font].measure(text)
+        return width
+
+    def linespace(self, font):
+        height = self._linespace.get(font)
+        if height is None:
+            height = self._linespace[font] = self.fonts[font].metrics("linespace")
+        return height
+
+
+def wrap_text(text, width, measure):
+    """
+    Split text into lines narrower than width, breaking at spaces.
+    measure gives the width of one word. A line's width is the sum of its words' widths plus
+    the spaces, so each word is measured once instead of re-measuring the line as it grows.
+    (The first line starts with a space, as it always has.)
+    """
+    space = measure(" ")
+    line = ''
+    linewidth = 0
+
+    lines = []
+    for word in text.split(' '):
+        wordwidth = measure(word)
+        if linewidth + space + wordwidth < width:
+            line += " " + word
+            linewidth += space + wordwidth
+        else:
+            lines.append(line)
+            line = word
+            linewidth = wordwidth
+    if line != '':
+        lines.append(line)
+    return lines
+
+
+def group_cross_references(refs):
+    """
+    Cross-reference texts for a verse's "refers_to" list, with runs of consecutive verses
+    in the same chapter joined: [Gen 1:1, Gen 1:2, Gen 1:3, Exod 2:1] -> ["Gen 1:1-3", "Exod 2:1"]
+    """
+    grouped_refs = []
+    i = 0
+    while i < len(refs):
+        ref = refs[i]
+        book = ref['book']
+        chapter = ref['chapter']
+        ref_verses = [ref['verse']]
+
+        # Look ahead for consecutive verses in same book/chapter
+        j = i + 1
+        while j < len(refs):
+            next_ref = refs[j]
+            if next_ref['book'] == book and next_ref['chapter'] == chapter:
+                # Check if verse is consecutive
+                try:
+                    if int(next_ref['verse']) == int(ref_verses[-1]) + 1:
+                        ref_verses.append(next_ref['verse'])
+                        j += 1
+                    else:
+                        break
+                except:
+                    break
+            else:
+                break
+
+        if len(ref_verses) == 1:
+            grouped_refs.append(f"{book} {chapter}:{ref_verses[0]}")
+        else:
+            grouped_refs.append(f"{book} {chapter}:{ref_verses[0]}-{ref_verses[-1]}")
+
+        i = j
+    return grouped_refs
+
+
+def layout_chapter(book, chapter, data, width, x_offset, metrics, show_footnotes=True, show_crossrefs=True,
+                   footnote_tooltips=True, line_gap=2, elbow_room=6, bible_index=None):
+    """
+    Lay out one chapter.
+
+    Args:
+        book: the book's name, as shown in the header
+        chapter: chapter number
+        data: the chapter's object from the Bible data (or its list of verses)
+        width: right edge of the text area, in pixels
+        x_offset: left edge of the text (past the annotation bars)
+        metrics: metrics provider (see the module docstring)
+        show_footnotes, show_crossrefs: list the footnotes / cross-references under the chapter
+        footnote_tooltips: underline verse numbers that have a footnote, and record the footnote
+            in the layout's footnotes so hovering the verse can show it
+        line_gap, elbow_room: spacing between lines, and between a verse number and its text
+
+    Returns: ChapterLayout
+
+    Raises ValueError if book isn't a book of bible_index (its verses would get another book's ordinals).
+    """
+    bible_index = bibledb_lib._bible_index(bible_index)
+    b = int(bible_index.find_book(book))
+    if b == -1:
+        raise ValueError(f"Unknown book: {book}")
+    c = int(chapter)
+    textlineheight = metrics.linespace("text")
+    boldlineheight = metrics.linespace("bold")
+
+    ops = []
+    verse_heights = []
+    tooltips = {}
+    footnotes = []  # Collect footnotes for display at bottom
+    cross_refs = []  # Collect cross-references for display at bottom
+    y_offset = 40  # Initial Y offset
+
+    #the chapter header
+    ops.append(TextOp(x_offset, y_offset, str(book)+" Chapter "+str(chapter), "bold", "black", "w", None, None))
+    y_offset += boldlineheight + line_gap*2
+
+    verses = data.get("verses", []) if isinstance(data, dict) else data
+
+    for verse_obj in verses:
+        v = verse_obj.get("verse")
+        verse_ordinal = bible_index.ordinal(b, c, v, clamp=True)
+        verse_text = verse_obj.get("text", "")
+        has_footnote = bool(verse_obj.get("footnote")) if footnote_tooltips else False
+        if has_footnote:
+            tooltips[v] = verse_obj["footnote"]
+
+        vtop = y_offset - line_gap
+
+        #the verse number in italics (underline if it has a footnote)
+        verse_font = "italic_underline" if has_footnote else "italic"
+        ops.append(TextOp(x_offset, y_offset, str(v), verse_font, None, "nw", v, None))
+
+        v_offset = metrics.measure(verse_font, str(v)) + elbow_room + x_offset #offset for the verse, to the right of the verse number.
+        for line in wrap_text(verse_text, width - v_offset, lambda word: metrics.measure("text", word)):
+            ops.append(TextOp(v_offset, y_offset, line, "text", None, "nw", v, None))
+            y_offset += textlineheight + line_gap
+
+        vbot = y_offset - line_gap
+
+        #keep track of the top and bottom coord for each verse, to mark which ones have notes and tags.
+        verse_heights.append({'v':v,'ordinal':verse_ordinal,'top':vtop,'bot':vbot})
+
+        if verse_obj.get("footnote") and show_footnotes:
+            footnotes.append((v, verse_obj["footnote"]))
+        if verse_obj.get("cross_references") and show_crossrefs:
+            refs = verse_obj["cross_references"].get("refers_to", [])
+            if refs:
+                cross_refs.append((v, refs))
+
+    # Footnotes and cross-references at the bottom
+    if footnotes or cross_refs:
+        y_offset += line_gap * 3
+
+        # Horizontal separator line
+        ops.append(LineOp(x_offset, y_offset, width, y_offset, "gray", 1))
+        y_offset += line_gap * 2
+
+        for verse_num, footnote in footnotes:
+            # verse number in regular font, then the footnote in italic, lined up after it
+            verse_label = f"[{verse_num}]"
+            ops.append(TextOp(x_offset, y_offset, verse_label, "text", "darkblue", "nw", None, None))
+            label_width = metrics.measure("text", verse_label) + elbow_room
+
+            for line in wrap_text(footnote, width - x_offset - label_width, lambda word: metrics.measure("text", word)):
+                ops.append(TextOp(x_offset + label_width, y_offset, line, "italic", "darkblue", "nw", None, None))
+                y_offset += textlineheight + line_gap
+            y_offset += line_gap  # Extra space between footnotes
+
+        if cross_refs and footnotes:  # Add extra space if there were footnotes
+            y_offset += line_gap * 2
+
+        for verse_num, refs in cross_refs:
+            # verse number in regular font, then "See also:" and the references in italic
+            verse_label = f"[{verse_num}]"
+            ops.append(TextOp(x_offset, y_offset, verse_label, "text", "darkgreen", "nw", None, None))
+            label_width = metrics.measure("text", verse_label) + elbow_room
+
+            see_also_text = "See also: "
+            ops.append(TextOp(x_offset + label_width, y_offset, see_also_text, "italic", "darkgreen", "nw", None, None))
+            current_x = x_offset + label_width + metrics.measure("italic", see_also_text)
+
+            # Each reference is a clickable link
+            for idx, ref_text in enumerate(group_cross_references(refs)):
+                if idx > 0:
+                    ops.append(TextOp(current_x, y_offset, ", ", "italic", "darkgreen", "nw", None, None))
+                    current_x += metrics.measure("italic", ", ")
+
+                # wrap to the next line if the reference doesn't fit
+                ref_width = metrics.measure("italic", ref_text)
+                if current_x + ref_width > width:
+                    y_offset += textlineheight + line_gap
+                    current_x = x_offset + label_width
+
+                ops.append(TextOp(current_x, y_offset, ref_text, "italic", "blue", "nw", None, ref_text))
+                current_x += ref_width
+
+            y_offset += textlineheight + line_gap * 2  # Extra space between cross-references
+
+    return ChapterLayout(b, c, ops, verse_heights, tooltips, y_offset)
+
+
+def layout_annotations(layout, notestags, x_offset, bible_index=None):
+    """
+    The bars left of the verses that have notes or tags: one 2px column per verse group in
+    notestags (rows from bibledb_lib.find_note_tag_verses), the first one furthest left.
+    Blue for tags, orange for notes, maroon for both. Groups that run into another chapter
+    get a short thick mark at their top and bottom verse in this one.
+
+    x_offset is the left edge of the verse text, as passed to layout_chapter.
+
+    Returns: list of LineOp
+    """
+    bible_index = bibledb_lib._bible_index(bible_index)
+    chapter_first = bible_index.ordinal(layout.book, layout.chapter, 1)
+    chapter_last = chapter_first + bible_index.verse_count(layout.book, layout.chapter) - 1
+    ops = []
+    id_lines = len(notestags)*2
+    for row in notestags:
+        group_lo = bible_index.ordinal(row['start_book'], row['start_chapter'], row['start_verse'], clamp=True)
+        group_hi = bible_index.ordinal(row['end_book'], row['end_chapter'], row['end_verse'], clamp=True)
+        t = row['type']
+        #maroon if there's both a note and a tag.
+        color = "maroon"
+        lx = x_offset - id_lines
+        if t == "tag": #blue if just a tag
+            color = "blue"
+        elif t == "note": #orange if just a note
+            color = "orange2"
+
+        #capture the top and bottom verse in a group which spans multiple chapters
+        low_vh = None
+        high_vh = None
+        for verse in layout.verse_heights:
+            if group_lo <= verse['ordinal'] <= group_hi:
+                if low_vh is None or verse['v'] < low_vh['v']:
+                    low_vh = verse
+                if high_vh is None or verse['v'] > high_vh['v']:
+                    high_vh = verse
+                ops.append(LineOp(lx, verse['top'], lx, verse['bot'], color, 1))
+        if (group_lo < chapter_first or group_hi > chapter_last) and low_vh is not None:
+            #if this group spans multiple chapters, give it a little hat and a little shoe to indicate it.
+            ops.append(LineOp(lx, high_vh['bot'], lx+2, high_vh['bot'], color, 5))
+            ops.append(LineOp(lx, low_vh['top'], lx+2, low_vh['top'], color, 5))
+        id_lines -= 2
+    return ops
+
+
+def op_extent(op, metrics):
+    # (top, bottom) of what op draws
+    if type(op) is LineOp:
+        half_width = op.width / 2
+        return min(op.y, op.y2) - half_width, max(op.y, op.y2) + half_width
+    height = metrics.linespace(op.font)
+    if op.anchor == "w":
+        return op.y - height / 2, op.y + height / 2
+    return op.y, op.y + height
+
+
+class OpIndex:
+    """
+    Draw ops sorted by their top, for finding the ones that overlap a band of the canvas
+    without looking at the rest. Positions returned by in_band index into self.ops.
+    """
+
+    def __init__(self, ops, metrics):
+        extents = sorted((op_extent(op, metrics) + (op,) for op in ops), key=lambda extent: extent[0])
+        self.ops = [extent[2] for extent in extents]
+        self.tops = [extent[0] for extent in extents]
+        self.bottoms = [extent[1] for extent in extents]
+        # nothing overlapping the band starts more than this far above it
+        self.tallest = max((extent[1] - extent[0] for extent in extents), default=0)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def in_band(self, top, bottom):
+        lo = bisect_left(self.tops, top - self.tallest)
+        hi = bisect_right(self.tops, bottom)
+        return [i for i in range(lo, hi) if self.bottoms[i] >= top]
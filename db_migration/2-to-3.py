@@ -0,0 +1,272 @@
+"""
+Database Schema Migration Script: Version 2 to Version 3
+Migrates Bible Tagger databases from schema v2 to schema v3.
+
+CHANGES FROM V2 TO V3:
+- Add 'start_ordinal' and 'end_ordinal' columns (INTEGER) to 'verse_group'
+  - An ordinal packs a verse into one integer: book * 1000000 + chapter * 1000 + verse
+  - A verse_group covers every verse from start_ordinal to end_ordinal
+- Remove 'verse_group_verse' junction table (one row per verse in every group)
+  - Each group's range becomes its first verse to its last verse
+- Remove verse_group_verse indexes
+- Add interval indexes on verse_group (start_ordinal, end_ordinal) and (end_ordinal)
+- Replace the verse_group_tag (tag_id) index with a covering (tag_id, verse_group_id) index
+- Verse groups with no verses are removed, along with their verse_group_tag rows
+
+OLD SCHEMA (v2):
+- verse_group (verse_group_id INTEGER PRIMARY KEY AUTOINCREMENT, note TEXT)
+- verse_group_verse (verse_group_id, verse_id, book, chapter, verse) - junction table with CASCADE
+- tag (tag_id INTEGER PRIMARY KEY AUTOINCREMENT, tag TEXT NOT NULL UNIQUE, note TEXT)
+- verse_group_tag (verse_group_id INT, tag_id INT) - with CASCADE
+- tag_tag (tag_1_id INT, tag_2_id INT, CHECK (tag_1_id < tag_2_id)) - with CASCADE
+
+NEW SCHEMA (v3):
+- verse_group (verse_group_id INTEGER PRIMARY KEY AUTOINCREMENT, start_ordinal INTEGER, end_ordinal INTEGER, note TEXT,
+               CHECK (start_ordinal <= end_ordinal))
+- tag (tag_id INTEGER PRIMARY KEY AUTOINCREMENT, tag TEXT NOT NULL UNIQUE, note TEXT)
+- verse_group_tag (verse_group_id INT, tag_id INT) - with CASCADE
+- tag_tag (tag_1_id INT, tag_2_id INT, CHECK (tag_1_id < tag_2_id)) - with CASCADE
+
+Usage:
+    python 2-to-3.py <database_path> [--no-backup]
+"""
+
+import sqlite3
+import os
+import sys
+import shutil
+import argparse
+from datetime import datetime
+
+
+def backup_database(db_path):
+    """
+    Create a backup of the database with _backup.bdb suffix.
+    """
+    # Remove extension and add _backup.bdb
+    base_path = os.path.splitext(db_path)[0]
+    backup_path = f"{base_path}_backup.bdb"
+
+    print(f"Creating backup: {backup_path}")
+    shutil.copy2(db_path, backup_path)
+    print(f"✓ Backup created")
+
+    return backup_path
+
+
+def migrate_database(old_db_path, create_backup=True):
+    """
+    Main migration function.
+    Migrates a Bible Tagger database from version 2 to version 3.
+
+    Args:
+        old_db_path: Path to the database file to migrate
+        create_backup: Whether to create a backup (default True)
+
+    Returns:
+        True if migration successful, False otherwise
+    """
+    print("\n" + "=" * 60)
+    print("Bible Tagger Database Migration: Version 2 -> 3")
+    print("=" * 60)
+    print(f"Database: {old_db_path}\n")
+
+    # Check if database exists
+    if not os.path.exists(old_db_path):
+        print(f"✗ Error: Database file not found: {old_db_path}")
+        return False
+
+    # Create backup if requested
+    backup_path = None
+    if create_backup:
+        try:
+            backup_path = backup_database(old_db_path)
+        except Exception as e:
+            print(f"✗ Error creating backup: {e}")
+            return False
+    else:
+        print("⚠ Skipping backup (--no-backup specified)")
+
+    # Connect to database
+    conn = sqlite3.connect(old_db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    try:
+        # Check current version
+        cursor.execute("PRAGMA user_version")
+        current_version = cursor.fetchone()[0]
+
+        if current_version != 2:
+            print(f"✗ Error: Database version is {current_version}, expected 2")
+            print("  This migration script only works for version 2 databases")
+            conn.close()
+            return False
+
+        print(f"✓ Database version confirmed: {current_version}")
+
+        # Begin transaction
+        print("\n" + "-" * 60)
+        print("Starting migration...")
+        print("-" * 60)
+
+        # Step 1: Create new schema tables
+        print("\n1. Creating new schema tables...")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS verse_group_new (
+                verse_group_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start_ordinal INTEGER NOT NULL,
+                end_ordinal INTEGER NOT NULL,
+                note TEXT,
+                CHECK (start_ordinal <= end_ordinal)
+            )
+        """)
+        print("  ✓ Created verse_group_new table")
+
+        # Step 2: Migrate data
+        print("\n2. Migrating data...")
+
+        # Remember the AUTOINCREMENT counter so ids of deleted groups are never reused
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'verse_group'")
+        seq_row = cursor.fetchone()
+        old_seq = seq_row['seq'] if seq_row else 0
+
+        # Each verse_group's range runs from its first verse to its last verse
+        print("  - Converting verse_groups to verse ranges...")
+        cursor.execute("""
+            INSERT INTO verse_group_new (verse_group_id, start_ordinal, end_ordinal, note)
+            SELECT vg.verse_group_id,
+                   MIN(vgv.book * 1000000 + vgv.chapter * 1000 + vgv.verse),
+                   MAX(vgv.book * 1000000 + vgv.chapter * 1000 + vgv.verse),
+                   vg.note
+            FROM verse_group vg
+            JOIN verse_group_verse vgv ON vg.verse_group_id = vgv.verse_group_id
+            GROUP BY vg.verse_group_id
+        """)
+        migrated_count = cursor.rowcount
+        print(f"    ✓ Migrated {migrated_count} verse_groups")
+
+        # Groups without any verses can't be turned into a range
+        cursor.execute("""
+            SELECT COUNT(*) FROM verse_group
+            WHERE verse_group_id NOT IN (SELECT verse_group_id FROM verse_group_new)
+        """)
+        empty_count = cursor.fetchone()[0]
+        if empty_count:
+            print(f"    ⚠ Warning: Dropped {empty_count} verse_groups that had no verses")
+
+        cursor.execute("""
+            DELETE FROM verse_group_tag
+            WHERE verse_group_id NOT IN (SELECT verse_group_id FROM verse_group_new)
+        """)
+        if cursor.rowcount:
+            print(f"    ⚠ Warning: Dropped {cursor.rowcount} verse-tag relationships to those verse_groups")
+
+        # Step 3: Drop old tables and rename new ones
+        print("\n3. Replacing old tables with new schema...")
+
+        cursor.execute("DROP INDEX IF EXISTS idx_verse_group_verse_verse_id")
+        cursor.execute("DROP INDEX IF EXISTS idx_verse_group_verse_book_chapter_verse")
+        cursor.execute("DROP TABLE IF EXISTS verse_group_verse")
+        cursor.execute("DROP TABLE IF EXISTS verse_group")
+        print("  ✓ Dropped old tables")
+
+        cursor.execute("ALTER TABLE verse_group_new RENAME TO verse_group")
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'verse_group'", (old_seq,))
+        print("  ✓ Renamed new tables")
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_verse_group_interval ON verse_group (start_ordinal, end_ordinal)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_verse_group_end ON verse_group (end_ordinal)")
+        print("  ✓ Created interval indexes")
+
+        # (tag_id, verse_group_id) covers tag -> verse_group lookups; it replaces the tag_id-only index
+        cursor.execute("DROP INDEX IF EXISTS idx_verse_group_tag_tag_id")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_verse_group_tag_tag_group ON verse_group_tag (tag_id, verse_group_id)")
+        print("  ✓ Created verse_group_tag covering index")
+
+        # Step 4: Update database version
+        print("\n4. Updating database version...")
+        cursor.execute("PRAGMA user_version = 3")
+        print("  ✓ Database version set to 3")
+
+        # Commit all changes
+        conn.commit()
+
+        # Reclaim the space the per-verse rows used
+        cursor.execute("VACUUM")
+
+        # Verify migration
+        print("\n5. Verifying migration...")
+        cursor.execute("PRAGMA user_version")
+        new_version = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM tag")
+        tag_count = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM verse_group")
+        vg_count = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM verse_group_tag")
+        vgt_count = cursor.fetchone()[0]
+
+        print(f"  ✓ Database version: {new_version}")
+        print(f"  ✓ Tags: {tag_count}")
+        print(f"  ✓ Verse groups: {vg_count}")
+        print(f"  ✓ Verse-tag associations: {vgt_count}")
+
+        print("\n" + "=" * 60)
+        print("✓ Migration completed successfully!")
+        print("=" * 60)
+
+        if backup_path:
+            print(f"\nBackup saved at: {backup_path}")
+
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"\n✗ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+
+        conn.rollback()
+        conn.close()
+
+        if backup_path:
+            print(f"\n⚠ Migration failed. Your original database is backed up at:")
+            print(f"  {backup_path}")
+            print("\nYou can restore it by copying it back:")
+            print(f"  copy \"{backup_path}\" \"{old_db_path}\"")
+
+        return False
+
+
+def main():
+    """
+    Main entry point for the migration script.
+    """
+    parser = argparse.ArgumentParser(
+        description="Migrate Bible Tagger database from version 2 to version 3"
+    )
+    parser.add_argument(
+        "database",
+        help="Path to the database file to migrate"
+    )
+    parser.add_argument(
+        "--no-backup",
+        action="store_true",
+        help="Skip creating a backup (not recommended)"
+    )
+
+    args = parser.parse_args()
+
+    # Run migration
+    success = migrate_database(args.database, create_backup=not args.no_backup)
+
+    # Exit with appropriate code
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
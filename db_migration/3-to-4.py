@@ -0,0 +1,228 @@
+"""
+Database Schema Migration Script: Version 3 to Version 4
+Migrates Bible Tagger databases from schema v3 to schema v4.
+
+CHANGES FROM V3 TO V4:
+- Add full-text (FTS5) indexes over the notes, used by search_notes:
+  - 'verse_group_note_fts' indexes verse_group.note
+  - 'tag_note_fts' indexes tag.note
+  - Both are external-content tables: the note text stays in verse_group and tag
+- Add triggers on verse_group and tag (after insert, after delete, after update of note)
+  that keep the FTS indexes in step with the notes
+- Existing notes are indexed during the migration; no existing data changes
+
+OLD SCHEMA (v3):
+- verse_group (verse_group_id INTEGER PRIMARY KEY AUTOINCREMENT, start_ordinal INTEGER, end_ordinal INTEGER, note TEXT,
+               CHECK (start_ordinal <= end_ordinal))
+- tag (tag_id INTEGER PRIMARY KEY AUTOINCREMENT, tag TEXT NOT NULL UNIQUE, note TEXT)
+- verse_group_tag (verse_group_id INT, tag_id INT) - with CASCADE
+- tag_tag (tag_1_id INT, tag_2_id INT, CHECK (tag_1_id < tag_2_id)) - with CASCADE
+
+NEW SCHEMA (v4):
+- the v3 tables, unchanged
+- verse_group_note_fts USING fts5(note, content='verse_group', content_rowid='verse_group_id')
+- tag_note_fts USING fts5(note, content='tag', content_rowid='tag_id')
+- triggers <fts table>_insert, <fts table>_delete, <fts table>_update on verse_group and tag
+
+Usage:
+    python 3-to-4.py <database_path> [--no-backup]
+"""
+
+import sqlite3
+import os
+import sys
+import shutil
+import argparse
+from datetime import datetime
+
+
+def backup_database(db_path):
+    """
+    Create a backup of the database with _backup.bdb suffix.
+    """
+    # Remove extension and add _backup.bdb
+    base_path = os.path.splitext(db_path)[0]
+    backup_path = f"{base_path}_backup.bdb"
+
+    print(f"Creating backup: {backup_path}")
+    shutil.copy2(db_path, backup_path)
+    print(f"✓ Backup created")
+
+    return backup_path
+
+
+def migrate_database(old_db_path, create_backup=True):
+    """
+    Main migration function.
+    Migrates a Bible Tagger database from version 3 to version 4.
+
+    Args:
+        old_db_path: Path to the database file to migrate
+        create_backup: Whether to create a backup (default True)
+
+    Returns:
+        True if migration successful, False otherwise
+    """
+    print("\n" + "=" * 60)
+    print("Bible Tagger Database Migration: Version 3 -> 4")
+    print("=" * 60)
+    print(f"Database: {old_db_path}\n")
+
+    # Check if database exists
+    if not os.path.exists(old_db_path):
+        print(f"✗ Error: Database file not found: {old_db_path}")
+        return False
+
+    # Create backup if requested
+    backup_path = None
+    if create_backup:
+        try:
+            backup_path = backup_database(old_db_path)
+        except Exception as e:
+            print(f"✗ Error creating backup: {e}")
+            return False
+    else:
+        print("⚠ Skipping backup (--no-backup specified)")
+
+    # Connect to database
+    conn = sqlite3.connect(old_db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    try:
+        # Check current version
+        cursor.execute("PRAGMA user_version")
+        current_version = cursor.fetchone()[0]
+
+        if current_version != 3:
+            print(f"✗ Error: Database version is {current_version}, expected 3")
+            print("  This migration script only works for version 3 databases")
+            conn.close()
+            return False
+
+        print(f"✓ Database version confirmed: {current_version}")
+
+        # Begin transaction
+        print("\n" + "-" * 60)
+        print("Starting migration...")
+        print("-" * 60)
+
+        # Step 1: Create the FTS tables and their triggers
+        print("\n1. Creating note search indexes...")
+
+        for table, id_column in (("verse_group", "verse_group_id"), ("tag", "tag_id")):
+            fts_table = f"{table}_note_fts"
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    note, content='{table}', content_rowid='{id_column}', tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts_table} (rowid, note) VALUES (new.{id_column}, new.note);
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, note) VALUES ('delete', old.{id_column}, old.note);
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF note ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, note) VALUES ('delete', old.{id_column}, old.note);
+                    INSERT INTO {fts_table} (rowid, note) VALUES (new.{id_column}, new.note);
+                END
+            """)
+            print(f"  ✓ Created {fts_table} and its triggers")
+
+        # Step 2: Index the notes that are already there
+        print("\n2. Indexing existing notes...")
+        for table in ("verse_group", "tag"):
+            fts_table = f"{table}_note_fts"
+            cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+            cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE note IS NOT NULL AND note != ''")
+            print(f"  ✓ Indexed {cursor.fetchone()[0]} {table} notes")
+
+        # Step 3: Update database version
+        print("\n3. Updating database version...")
+        cursor.execute("PRAGMA user_version = 4")
+        print("  ✓ Database version set to 4")
+
+        # Commit all changes
+        conn.commit()
+
+        # Verify migration
+        print("\n4. Verifying migration...")
+        cursor.execute("PRAGMA user_version")
+        new_version = cursor.fetchone()[0]
+
+        # checks that each index matches its table
+        cursor.execute("INSERT INTO verse_group_note_fts (verse_group_note_fts, rank) VALUES ('integrity-check', 1)")
+        cursor.execute("INSERT INTO tag_note_fts (tag_note_fts, rank) VALUES ('integrity-check', 1)")
+
+        cursor.execute("SELECT COUNT(*) FROM tag")
+        tag_count = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM verse_group")
+        vg_count = cursor.fetchone()[0]
+
+        print(f"  ✓ Database version: {new_version}")
+        print(f"  ✓ Note search indexes match their tables")
+        print(f"  ✓ Tags: {tag_count}")
+        print(f"  ✓ Verse groups: {vg_count}")
+
+        print("\n" + "=" * 60)
+        print("✓ Migration completed successfully!")
+        print("=" * 60)
+
+        if backup_path:
+            print(f"\nBackup saved at: {backup_path}")
+
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"\n✗ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+
+        conn.rollback()
+        conn.close()
+
+        if backup_path:
+            print(f"\n⚠ Migration failed. Your original database is backed up at:")
+            print(f"  {backup_path}")
+            print("\nYou can restore it by copying it back:")
+            print(f"  copy \"{backup_path}\" \"{old_db_path}\"")
+
+        return False
+
+
+def main():
+    """
+    Main entry point for the migration script.
+    """
+    parser = argparse.ArgumentParser(
+        description="Migrate Bible Tagger database from version 3 to version 4"
+    )
+    parser.add_argument(
+        "database",
+        help="Path to the database file to migrate"
+    )
+    parser.add_argument(
+        "--no-backup",
+        action="store_true",
+        help="Skip creating a backup (not recommended)"
+    )
+
+    args = parser.parse_args()
+
+    # Run migration
+    success = migrate_database(args.database, create_backup=not args.no_backup)
+
+    # Exit with appropriate code
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Database Schema Migration Script: Version 4 to Version 5
+Migrates Bible Tagger databases from schema v4 to schema v5.
+
+CHANGES FROM V4 TO V5:
+- Add 'synonym_group', the synonym groups (connected components of tag_tag) worked out ahead of time:
+  - one row per tag that has at least one synonym, mapping its tag_id to a group_id
+  - group_id is the tag_id of one tag in the group; tags with the same group_id are synonyms
+  - add_tag_tag and delete_tag_tag keep it up to date, so finding a tag's synonyms is one indexed read
+- Existing tag_tag pairs are grouped during the migration; no existing data changes
+
+OLD SCHEMA (v4):
+- verse_group (verse_group_id INTEGER PRIMARY KEY AUTOINCREMENT, start_ordinal INTEGER, end_ordinal INTEGER, note TEXT,
+               CHECK (start_ordinal <= end_ordinal))
+- tag (tag_id INTEGER PRIMARY KEY AUTOINCREMENT, tag TEXT NOT NULL UNIQUE, note TEXT)
+- verse_group_tag (verse_group_id INT, tag_id INT) - with CASCADE
+- tag_tag (tag_1_id INT, tag_2_id INT, CHECK (tag_1_id < tag_2_id)) - with CASCADE
+- verse_group_note_fts, tag_note_fts and their triggers
+
+NEW SCHEMA (v5):
+- the v4 tables, unchanged
+- synonym_group (tag_id INTEGER PRIMARY KEY, group_id INTEGER NOT NULL) - with CASCADE
+- index idx_synonym_group_group on synonym_group (group_id)
+
+Usage:
+    python 4-to-5.py <database_path> [--no-backup]
+"""
+
+import sqlite3
+import os
+import sys
+import shutil
+import argparse
+from datetime import datetime
+
+
+def backup_database(db_path):
+    """
+    Create a backup of the database with _backup.bdb suffix.
+    """
+    # Remove extension and add _backup.bdb
+    base_path = os.path.splitext(db_path)[0]
+    backup_path = f"{base_path}_backup.bdb"
+
+    print(f"Creating backup: {backup_path}")
+    shutil.copy2(db_path, backup_path)
+    print(f"✓ Backup created")
+
+    return backup_path
+
+
+def synonym_components(pairs):
+    """
+    Union-find over (tag_1_id, tag_2_id) pairs.
+    Returns {tag_id: group_id} for every tag in a pair, where group_id is the
+    smallest tag_id in that tag's connected component.
+    """
+    parent = {}
+
+    def find(tag_id):
+        root = tag_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[tag_id] != root:
+            parent[tag_id], tag_id = root, parent[tag_id]
+        return root
+
+    for tag_1_id, tag_2_id in pairs:
+        parent.setdefault(tag_1_id, tag_1_id)
+        parent.setdefault(tag_2_id, tag_2_id)
+        root_1 = find(tag_1_id)
+        root_2 = find(tag_2_id)
+        if root_1 != root_2:
+            parent[max(root_1, root_2)] = min(root_1, root_2)
+
+    return {tag_id: find(tag_id) for tag_id in parent}
+
+
+def migrate_database(old_db_path, create_backup=True):
+    """
+    Main migration function.
+    Migrates a Bible Tagger database from version 4 to version 5.
+
+    Args:
+        old_db_path: Path to the database file to migrate
+        create_backup: Whether to create a backup (default True)
+
+    Returns:
+        True if migration successful, False otherwise
+    """
+    print("\n" + "=" * 60)
+    print("Bible Tagger Database Migration: Version 4 -> 5")
+    print("=" * 60)
+    print(f"Database: {old_db_path}\n")
+
+    # Check if database exists
+    if not os.path.exists(old_db_path):
+        print(f"✗ Error: Database file not found: {old_db_path}")
+        return False
+
+    # Create backup if requested
+    backup_path = None
+    if create_backup:
+        try:
+            backup_path = backup_database(old_db_path)
+        except Exception as e:
+            print(f"✗ Error creating backup: {e}")
+            return False
+    else:
+        print("⚠ Skipping backup (--no-backup specified)")
+
+    # Connect to database
+    conn = sqlite3.connect(old_db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    try:
+        # Check current version
+        cursor.execute("PRAGMA user_version")
+        current_version = cursor.fetchone()[0]
+
+        if current_version != 4:
+            print(f"✗ Error: Database version is {current_version}, expected 4")
+            print("  This migration script only works for version 4 databases")
+            conn.close()
+            return False
+
+        print(f"✓ Database version confirmed: {current_version}")
+
+        # Begin transaction
+        print("\n" + "-" * 60)
+        print("Starting migration...")
+        print("-" * 60)
+
+        # Step 1: Create the synonym_group table
+        print("\n1. Creating synonym_group table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS synonym_group (
+                tag_id INTEGER PRIMARY KEY,
+                group_id INTEGER NOT NULL,
+                FOREIGN KEY (tag_id) REFERENCES tag(tag_id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_synonym_group_group ON synonym_group (group_id)")
+        print("  ✓ Created synonym_group")
+
+        # Step 2: Group the existing synonym pairs
+        print("\n2. Grouping existing synonyms...")
+        cursor.execute("SELECT tag_1_id, tag_2_id FROM tag_tag")
+        groups = synonym_components(cursor.fetchall())
+        cursor.execute("DELETE FROM synonym_group")
+        cursor.executemany("INSERT INTO synonym_group (tag_id, group_id) VALUES (?, ?)", groups.items())
+        print(f"  ✓ Grouped {len(groups)} tags into {len(set(groups.values()))} synonym groups")
+
+        # Step 3: Update database version
+        print("\n3. Updating database version...")
+        cursor.execute("PRAGMA user_version = 5")
+        print("  ✓ Database version set to 5")
+
+        # Commit all changes
+        conn.commit()
+
+        # Verify migration
+        print("\n4. Verifying migration...")
+        cursor.execute("PRAGMA user_version")
+        new_version = cursor.fetchone()[0]
+
+        # every tag in a synonym pair has a group, and both tags of a pair are in the same one
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM tag_tag tt
+            LEFT JOIN synonym_group sg1 ON sg1.tag_id = tt.tag_1_id
+            LEFT JOIN synonym_group sg2 ON sg2.tag_id = tt.tag_2_id
+            WHERE sg1.group_id IS NULL OR sg2.group_id IS NULL OR sg1.group_id != sg2.group_id
+        """)
+        if cursor.fetchone()[0] != 0:
+            raise Exception("synonym_group doesn't match tag_tag")
+
+        cursor.execute("SELECT COUNT(*) FROM tag")
+        tag_count = cursor.fetchone()[0]
+
+        cursor.execute("SELECT COUNT(*) FROM verse_group")
+        vg_count = cursor.fetchone()[0]
+
+        print(f"  ✓ Database version: {new_version}")
+        print(f"  ✓ Synonym groups match the synonym pairs")
+        print(f"  ✓ Tags: {tag_count}")
+        print(f"  ✓ Verse groups: {vg_count}")
+
+        print("\n" + "=" * 60)
+        print("✓ Migration completed successfully!")
+        print("=" * 60)
+
+        if backup_path:
+            print(f"\nBackup saved at: {backup_path}")
+
+        conn.close()
+        return True
+
+    except Exception as e:
+        print(f"\n✗ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+
+        conn.rollback()
+        conn.close()
+
+        if backup_path:
+            print(f"\n⚠ Migration failed. Your original database is backed up at:")
+            print(f"  {backup_path}")
+            print("\nYou can restore it by copying it back:")
+            print(f"  copy \"{backup_path}\" \"{old_db_path}\"")
+
+        return False
+
+
+def main():
+    """
+    Main entry point for the migration script.
+    """
+    parser = argparse.ArgumentParser(
+        description="Migrate Bible Tagger database from version 4 to version 5"
+    )
+    parser.add_argument(
+        "database",
+        help="Path to the database file to migrate"
+    )
+    parser.add_argument(
+        "--no-backup",
+        action="store_true",
+        help="Skip creating a backup (not recommended)"
+    )
+
+    args = parser.parse_args()
+
+    # Run migration
+    success = migrate_database(args.database, create_backup=not args.no_backup)
+
+    # Exit with appropriate code
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()